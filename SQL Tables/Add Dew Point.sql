@@ -0,0 +1,2 @@
+-- Upgrade for warehouses created before fact_weather_measurements carried the dew point
+ALTER TABLE fact_weather_measurements ADD COLUMN IF NOT EXISTS dew_point_celsius DECIMAL(5,2);
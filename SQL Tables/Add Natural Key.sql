@@ -0,0 +1,14 @@
+-- Upgrade for warehouses created before fact_weather_measurements had a natural key.
+-- Keeps the first loaded copy of each duplicated reading. The rollups counted the
+-- duplicates, so rebuild them afterwards:
+--   python src/run_maintenance.py rebuild-summary
+--   REFRESH MATERIALIZED VIEW mv_daily_weather_summary;
+DELETE FROM fact_weather_measurements f
+USING fact_weather_measurements d
+WHERE f.location_id = d.location_id
+  AND f.recorded_at = d.recorded_at
+  AND f.api_source IS NOT DISTINCT FROM d.api_source
+  AND f.measurement_id > d.measurement_id;
+
+ALTER TABLE fact_weather_measurements
+    ADD CONSTRAINT uq_weather_natural_key UNIQUE NULLS NOT DISTINCT (location_id, recorded_at, api_source);
@@ -0,0 +1,15 @@
+-- Parquet files holding fact rows moved out of fact_weather_measurements by
+-- src/load/cold_tier.py, one row per file. A file belongs to the cold tier
+-- only once its row is committed, together with the delete of its facts;
+-- readers prune files by location and recorded_at range before opening them.
+CREATE TABLE etl_cold_archive (
+    path TEXT PRIMARY KEY,
+    month DATE NOT NULL,
+    location_id INT NOT NULL REFERENCES dim_location(location_id),
+    row_count INT NOT NULL,
+    first_recorded_at TIMESTAMP NOT NULL,
+    last_recorded_at TIMESTAMP NOT NULL,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_cold_archive_location_month ON etl_cold_archive (location_id, month);
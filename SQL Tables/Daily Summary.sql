@@ -0,0 +1,38 @@
+-- Incrementally maintained daily summary per location.
+-- Stores mergeable partial aggregates (sum, count, min, max) so the loader
+-- can fold each batch into the touched (location, date) groups and averages
+-- stay exact. Replaces full refreshes of mv_daily_weather_summary.
+CREATE TABLE agg_daily_weather_summary (
+    location_id INT NOT NULL,
+    date_id INT NOT NULL,
+    measurement_count BIGINT NOT NULL DEFAULT 0,
+    temperature_sum DECIMAL(14,2),
+    temperature_count BIGINT NOT NULL DEFAULT 0,
+    temperature_min DECIMAL(5,2),
+    temperature_max DECIMAL(5,2),
+    humidity_sum BIGINT,
+    humidity_count BIGINT NOT NULL DEFAULT 0,
+    wind_speed_sum DECIMAL(14,2),
+    wind_speed_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (location_id, date_id),
+    FOREIGN KEY (location_id) REFERENCES dim_location(location_id),
+    FOREIGN KEY (date_id) REFERENCES dim_date(date_id)
+);
+
+-- Same shape as mv_daily_weather_summary, one row per location and day
+CREATE VIEW v_daily_weather_summary AS
+SELECT 
+    l.city_name,
+    l.country,
+    d.full_date,
+    s.temperature_sum / NULLIF(s.temperature_count, 0) as avg_temp_celsius,
+    s.temperature_min as min_temp_celsius,
+    s.temperature_max as max_temp_celsius,
+    s.humidity_sum::DECIMAL / NULLIF(s.humidity_count, 0) as avg_humidity,
+    s.wind_speed_sum / NULLIF(s.wind_speed_count, 0) as avg_wind_speed,
+    s.measurement_count
+FROM agg_daily_weather_summary s
+JOIN dim_location l ON s.location_id = l.location_id
+JOIN dim_date d ON s.date_id = d.date_id;
@@ -10,17 +10,8 @@ updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 UNIQUE(city_name, country)
 );
 
-INSERT INTO dim_location(city_name, country, latitude, longitude, timezone) VALUES
-('Bellevue', 'USA', 47.6101, -122.2015, 'America/Los Angeles'),
-('Ames', 'USA', 42.0308, -93.6319, 'America/Chicago'),
-('Hyderabad', 'India', 17.3850, 78.4867, 'Asia/Kolkata'),
-('Berlin', 'Germany', 52.5200, 13.4050, 'Europe/Berlin'),
-('Sydney', 'Australia', -33.8688, 151.2093, 'Australia/Sydney'),
-('Delhi', 'India', 28.7041, 77.1025, 'Asia/Kolkata'),
-('Cape Town', 'South Africa', -33.9249, 18.4241, 'Africa/Johannesburg'),
-('Rio de Janeiro', 'Brazil', -22.9068, -43.1729, 'America/Sao_Paulo'),
-('London', 'UK', 51.5074, -0.1278, 'Europe/London'),
-('Jakarta', 'Indonesia', -6.2088, 106.8456, 'Asia/Jakarta');
+-- Locations are maintained in data/locations.csv (the location registry) and
+-- loaded with: python src/run_maintenance.py sync-locations
 
 CREATE TABLE dim_date(
 date_id SERIAL PRIMARY KEY,
@@ -79,8 +70,3 @@ INSERT INTO dim_Weather_condition (main_condition,description) VALUES
 ('Dust', 'Dusty conditions'),
 ('Smoke', 'Smoky conditions');
 
-select * from dim_location;
-ALTER TABLE dim_date
-ADD COLUMN month INTEGER;
-ALTER TABLE dim_date
-DROP COLUMN mont;
\ No newline at end of file
@@ -0,0 +1,50 @@
+-- Fact table range-partitioned by month on recorded_at.
+-- Monthly partitions are created and retired by src/load/partitions.py;
+-- each partition carries its own recorded_at index (B-tree while recent,
+-- BRIN once it has aged out of the hot window).
+CREATE TABLE fact_weather_measurements (
+    measurement_id SERIAL,
+    location_id INT NOT NULL,
+    date_id INT NOT NULL,
+    time_id INT NOT NULL,
+    condition_id INT,
+    
+    -- Weather measurements
+    temperature_celsius DECIMAL(5,2),
+    temperature_fahrenheit DECIMAL(5,2),
+    feels_like_celsius DECIMAL(5,2),
+    feels_like_fahrenheit DECIMAL(5,2),
+    dew_point_celsius DECIMAL(5,2),
+    humidity_percent INT,
+    pressure_hpa INT,
+    wind_speed_mps DECIMAL(5,2),
+    wind_direction_degrees INT,
+    wind_gust_mps DECIMAL(5,2),
+    visibility_meters INT,
+    cloudiness_percent INT,
+    precipitation_mm DECIMAL(5,2),
+    snow_mm DECIMAL(5,2),
+    uv_index DECIMAL(3,1),
+    
+    -- Metadata
+    api_source VARCHAR(50),
+    recorded_at TIMESTAMP NOT NULL,
+    inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    -- The partition key must be part of the primary key
+    PRIMARY KEY (measurement_id, recorded_at),
+    
+    -- Natural key: one reading per location, time and provider; the loader
+    -- resolves reruns against it with INSERT ... ON CONFLICT
+    CONSTRAINT uq_weather_natural_key UNIQUE NULLS NOT DISTINCT (location_id, recorded_at, api_source),
+    
+    -- Foreign key constraints
+    FOREIGN KEY (location_id) REFERENCES dim_location(location_id),
+    FOREIGN KEY (date_id) REFERENCES dim_date(date_id),
+    FOREIGN KEY (time_id) REFERENCES dim_time(time_id),
+    FOREIGN KEY (condition_id) REFERENCES dim_weather_condition(condition_id)
+) PARTITION BY RANGE (recorded_at);
+
+-- Indexes cascade to every partition
+CREATE INDEX idx_weather_location_date ON fact_weather_measurements(location_id, date_id);
+CREATE INDEX idx_weather_date_time ON fact_weather_measurements(date_id, time_id);
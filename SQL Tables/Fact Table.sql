@@ -10,6 +10,7 @@ CREATE TABLE fact_weather_measurements (
     temperature_fahrenheit DECIMAL(5,2),
     feels_like_celsius DECIMAL(5,2),
     feels_like_fahrenheit DECIMAL(5,2),
+    dew_point_celsius DECIMAL(5,2),
     humidity_percent INT,
     pressure_hpa INT,
     wind_speed_mps DECIMAL(5,2),
@@ -26,6 +27,10 @@ CREATE TABLE fact_weather_measurements (
     recorded_at TIMESTAMP NOT NULL,
     inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
+    -- Natural key: one reading per location, time and provider; the loader
+    -- resolves reruns against it with INSERT ... ON CONFLICT
+    CONSTRAINT uq_weather_natural_key UNIQUE NULLS NOT DISTINCT (location_id, recorded_at, api_source),
+    
     -- Foreign key constraints
     FOREIGN KEY (location_id) REFERENCES dim_location(location_id),
     FOREIGN KEY (date_id) REFERENCES dim_date(date_id),
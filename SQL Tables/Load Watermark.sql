@@ -0,0 +1,10 @@
+-- Advanced by the loader just before each load commits. Readers such as
+-- the src/query result cache compare version to notice new data.
+CREATE TABLE etl_load_watermark (
+    id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    loaded_through TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO etl_load_watermark (id) VALUES (1);
@@ -0,0 +1,16 @@
+-- Newest reading loaded per location and provider. The loader skips staged
+-- readings that are not newer and advances the row in the same statement;
+-- extractors skip locations whose current provider slot is already loaded.
+CREATE TABLE etl_location_watermark (
+    location_id INT NOT NULL REFERENCES dim_location(location_id),
+    api_source VARCHAR(50) NOT NULL,
+    last_recorded_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (location_id, api_source)
+);
+
+INSERT INTO etl_location_watermark (location_id, api_source, last_recorded_at)
+SELECT location_id, api_source, MAX(recorded_at)
+FROM fact_weather_measurements
+WHERE api_source IS NOT NULL
+GROUP BY location_id, api_source;
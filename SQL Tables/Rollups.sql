@@ -0,0 +1,44 @@
+-- Hourly and monthly rollups alongside agg_daily_weather_summary.
+-- Same mergeable partial aggregates, maintained by the loader in the same
+-- statement as the daily summary; src/query routes reads to the coarsest
+-- rollup that can answer them.
+CREATE TABLE agg_hourly_weather_summary (
+    location_id INT NOT NULL,
+    date_id INT NOT NULL,
+    time_id INT NOT NULL,
+    measurement_count BIGINT NOT NULL DEFAULT 0,
+    temperature_sum DECIMAL(14,2),
+    temperature_count BIGINT NOT NULL DEFAULT 0,
+    temperature_min DECIMAL(5,2),
+    temperature_max DECIMAL(5,2),
+    humidity_sum BIGINT,
+    humidity_count BIGINT NOT NULL DEFAULT 0,
+    wind_speed_sum DECIMAL(14,2),
+    wind_speed_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (location_id, date_id, time_id),
+    FOREIGN KEY (location_id) REFERENCES dim_location(location_id),
+    FOREIGN KEY (date_id) REFERENCES dim_date(date_id),
+    FOREIGN KEY (time_id) REFERENCES dim_time(time_id)
+);
+
+CREATE TABLE agg_monthly_weather_summary (
+    location_id INT NOT NULL,
+    month_start DATE NOT NULL,
+    measurement_count BIGINT NOT NULL DEFAULT 0,
+    temperature_sum DECIMAL(16,2),
+    temperature_count BIGINT NOT NULL DEFAULT 0,
+    temperature_min DECIMAL(5,2),
+    temperature_max DECIMAL(5,2),
+    humidity_sum BIGINT,
+    humidity_count BIGINT NOT NULL DEFAULT 0,
+    wind_speed_sum DECIMAL(16,2),
+    wind_speed_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (location_id, month_start),
+    FOREIGN KEY (location_id) REFERENCES dim_location(location_id)
+);
+
+CREATE INDEX idx_agg_monthly_month ON agg_monthly_weather_summary (month_start);
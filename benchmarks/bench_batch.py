@@ -0,0 +1,118 @@
+"""
+Memory and serialization cost of a WeatherBatch versus a list of reading dicts.
+
+The same synthetic readings are held both ways; the benchmark reports the
+memory each representation keeps alive (traced allocations), the time of a
+full garbage collection while it is alive, and the time and size of
+serializing it (JSON for the dicts, Arrow IPC for the batch).
+"""
+import argparse
+import gc
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+import numpy as np
+import pyarrow as pa
+
+from config.locations import get_registry
+from transform.batch import WeatherBatch
+from transform.measurements import transform
+
+
+def synthetic_batch(count):
+    """Hourly readings cycling through the registry's locations."""
+    registry = get_registry()
+    rng = np.random.default_rng(count)
+    locations = np.arange(count) % len(registry)
+    raw = {
+        "temperature_2m": rng.normal(15, 8, count).round(1),
+        "relative_humidity_2m": rng.integers(20, 100, count),
+        "pressure_msl": rng.normal(1013, 8, count).round(1),
+        "wind_speed_10m": rng.gamma(2, 6, count).round(1),
+        "wind_direction_10m": rng.integers(0, 360, count),
+        "wind_gusts_10m": rng.gamma(2, 10, count).round(1),
+        "visibility": rng.integers(1000, 50000, count),
+        "cloud_cover": rng.integers(0, 100, count),
+        "precipitation": rng.exponential(0.3, count).round(1),
+        "snowfall": np.zeros(count),
+        "uv_index": rng.uniform(0, 9, count).round(1),
+        "weather_code": rng.choice([0, 1, 2, 3, 45, 61, 63, 71, 95], count),
+    }
+    start = np.datetime64("2024-01-01T00:00", "s")
+    recorded_at = start + (np.arange(count) // len(registry)).astype("timedelta64[h]")
+    cities = np.array(registry.cities(), dtype=object)
+    countries = np.array([registry.country(i) for i in registry], dtype=object)
+    return WeatherBatch.build(
+        cities[locations], countries[locations],
+        registry.latitudes[locations], registry.longitudes[locations],
+        transform(raw, length=count), recorded_at,
+    )
+
+
+def retained(build):
+    """Run build() and return (result, bytes it keeps allocated, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before, seconds
+
+
+def gc_seconds():
+    start = time.perf_counter()
+    gc.collect()
+    return time.perf_counter() - start
+
+
+def arrow_ipc(batch):
+    sink = io.BytesIO()
+    table = batch.to_arrow()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    batch, batch_bytes, batch_build = retained(lambda: synthetic_batch(args.readings))
+    batch_gc = gc_seconds()
+    start = time.perf_counter()
+    ipc = arrow_ipc(batch)
+    batch_serialize = time.perf_counter() - start
+
+    records, records_bytes, records_build = retained(batch.to_records)
+    records_gc = gc_seconds()
+    start = time.perf_counter()
+    payload = json.dumps(records, default=str)
+    records_serialize = time.perf_counter() - start
+
+    print(f"{args.readings:,} readings")
+    print(f"{'representation':<16} {'memory MB':>10} {'bytes/row':>10} {'build s':>9} {'gc s':>8} "
+          f"{'serialize s':>12} {'payload MB':>11}")
+    for name, memory, build, collect, serialize, size in (
+        ("WeatherBatch", batch_bytes, batch_build, batch_gc, batch_serialize, len(ipc)),
+        ("list of dicts", records_bytes, records_build, records_gc, records_serialize, len(payload)),
+    ):
+        print(f"{name:<16} {memory / 1e6:>10.1f} {memory / args.readings:>10.1f} {build:>9.2f} "
+              f"{collect:>8.3f} {serialize:>12.2f} {size / 1e6:>11.1f}")
+    print(f"WeatherBatch.nbytes: {batch.nbytes / 1e6:.1f} MB; "
+          f"list of dicts uses {records_bytes / max(batch_bytes, 1):.1f}x the memory")
+
+
+if __name__ == "__main__":
+    main()
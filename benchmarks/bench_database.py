@@ -0,0 +1,51 @@
+"""Compare connects/sec and statements/sec for NullPool, pooled and unit-of-work access."""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from utils.database import DatabaseConnection
+
+LOOKUP = "SELECT location_id FROM dim_location WHERE city_name = :city AND country = :country"
+PARAMS = {"city": "Berlin", "country": "Germany"}
+
+
+def rate(count, fn):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return count / (time.perf_counter() - start)
+
+
+def connects(database):
+    with database.engine.connect():
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<16} {'connects/sec':>14} {'statements/sec':>16}")
+    for mode in ("nullpool", "pooled", "unit_of_work"):
+        database = DatabaseConnection()
+        database.initialize(pooled=mode != "nullpool")
+
+        connect_rate = rate(args.iterations, lambda: connects(database))
+        if mode == "unit_of_work":
+            with database.unit_of_work():
+                statement_rate = rate(args.iterations, lambda: database.execute_query(LOOKUP, PARAMS))
+        else:
+            statement_rate = rate(args.iterations, lambda: database.execute_query(LOOKUP, PARAMS))
+
+        print(f"{mode:<16} {connect_rate:>14,.0f} {statement_rate:>16,.0f}")
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
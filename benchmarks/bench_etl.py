@@ -0,0 +1,227 @@
+"""
+End-to-end ETL benchmark against a fake Open-Meteo server and a throwaway database.
+
+A scratch database is created on the configured Postgres server, loaded
+from the "SQL Tables" schema and dropped afterwards. Each stage is timed
+at several location counts; results are written as JSON and compared
+with a baseline file, exiting non-zero when throughput regresses by more
+than the threshold.
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Every request must reach the fake server
+os.environ.setdefault("CACHE_ENABLED", "false")
+# Responses are archived as in production, to a scratch directory
+RAW_LAKE_DIR = tempfile.mkdtemp(prefix="bench_raw_lake_")
+os.environ.setdefault("RAW_LAKE_DIR", RAW_LAKE_DIR)
+atexit.register(shutil.rmtree, RAW_LAKE_DIR, ignore_errors=True)
+# Grid cells are learned as in production too, without touching data/
+GRID_CELLS_DIR = tempfile.mkdtemp(prefix="bench_grid_cells_")
+os.environ.setdefault("GRID_CELLS_PATH", os.path.join(GRID_CELLS_DIR, "grid_cells.parquet"))
+atexit.register(shutil.rmtree, GRID_CELLS_DIR, ignore_errors=True)
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from config.config import settings
+from config.locations import LocationRegistry, sync_to_database
+from extract.open_meteo import OpenMeteoExtractor
+from run_etl import load_weather
+from utils.database import db
+from utils.rate_limiter import TokenBucket
+from tests.fake_open_meteo import FakeOpenMeteoServer
+
+SCHEMA_DIR = project_root / "SQL Tables"
+# Applied in dependency order; CHECK.sql only inspects the result
+SCHEMA_FILES = ["Dimension Tables.sql", "Fact Table.sql", "DT.sql", "DA.sql", "Daily Summary.sql",
+                "Rollups.sql", "Load Watermark.sql", "Location Watermark.sql"]
+
+
+def synthetic_registry(count):
+    """count locations spread over the globe, with ids assigned by the database."""
+    rng = np.random.default_rng(count)
+    return LocationRegistry(pd.DataFrame({
+        "city_name": [f"Bench City {i}" for i in range(count)],
+        "country": [f"Bench Country {i % 50}" for i in range(count)],
+        "latitude": rng.uniform(-60, 70, count).round(4),
+        "longitude": rng.uniform(-180, 180, count).round(4),
+        "timezone": "UTC",
+    }), source="benchmark")
+
+
+@contextmanager
+def throwaway_database(partitioned=False):
+    """Create a scratch database with the warehouse schema and point db at it."""
+    name = f"weather_bench_{os.getpid()}"
+    admin = create_engine(settings.database_url.rsplit("/", 1)[0] + "/postgres",
+                          isolation_level="AUTOCOMMIT")
+    original = settings.db_name
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS {name}"))
+        conn.execute(text(f"CREATE DATABASE {name}"))
+    try:
+        settings.db_name = name
+        db.initialize()
+        files = [("Fact Table Partitioned.sql" if partitioned and f == "Fact Table.sql" else f)
+                 for f in SCHEMA_FILES]
+        with db.engine.begin() as conn:
+            for schema_file in files:
+                conn.exec_driver_sql((SCHEMA_DIR / schema_file).read_text())
+        yield name
+    finally:
+        if db.engine is not None:
+            db.engine.dispose()
+        settings.db_name = original
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)"))
+        admin.dispose()
+
+
+def timed(name, scale, operations, func, repeat=1):
+    """Time func, keeping the fastest of repeat runs to damp noise."""
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = min(seconds, time.perf_counter() - start)
+    return {"name": name, "scale": scale, "operations": operations, "seconds": round(seconds, 6),
+            "ops_per_second": round(operations / seconds, 2) if seconds else None}
+
+
+def bench_scale(server, scale, workers, single_calls, repeat):
+    registry = synthetic_registry(scale)
+    sync_to_database(registry)
+    extractor = OpenMeteoExtractor(base_url=server.url, archive_url=server.archive_url,
+                                   rate_limiter=TokenBucket(100_000, 100_000),
+                                   max_workers=workers, registry=registry)
+    results = []
+
+    calls = min(scale, single_calls)
+    results.append(timed("get_current_weather", scale, calls, lambda: [
+        extractor.get_current_weather(registry.city(i), registry.country(i)) for i in range(calls)
+    ], repeat))
+
+    response = server.build_response(47.61, -122.2)
+    parses = max(scale * 100, 20_000)
+    # One reading per call pays the fixed cost of the vectorized transform
+    singles = parses // 20
+    results.append(timed("parse_response", scale, singles, lambda: [
+        extractor.parse_response("Bench City 0", response, "Bench Country 0") for _ in range(singles)
+    ], repeat))
+
+    batches = parses // 100
+    results.append(timed("parse_responses", scale, batches * 100, lambda: [
+        extractor.parse_responses(["Bench City 0"] * 100, [response] * 100, ["Bench Country 0"] * 100)
+        for _ in range(batches)
+    ], repeat))
+
+    extracted = {}
+    results.append(timed("extract_all_cities", scale, scale,
+                         lambda: extracted.update(batch=extractor.extract_all_cities()), repeat))
+    extractor.close()
+
+    batch = extracted["batch"]
+    results.append(timed("run_etl_load", scale, len(batch), lambda: load_weather(batch)))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def find_regressions(results, baseline, threshold):
+    """Cases whose throughput dropped more than threshold below the baseline."""
+    previous = {(r["name"], r["scale"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        base = previous.get((result["name"], result["scale"]))
+        if not base or not base.get("ops_per_second") or result["ops_per_second"] is None:
+            continue
+        change = result["ops_per_second"] / base["ops_per_second"] - 1
+        if change < -threshold:
+            regressions.append({**result, "baseline_ops_per_second": base["ops_per_second"],
+                                "change": round(change, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--workers", type=int, default=settings.extract_max_workers)
+    parser.add_argument("--single-calls", type=int, default=50,
+                        help="Sequential get_current_weather calls per scale")
+    parser.add_argument("--latency", type=float, default=0.005, help="Fake server latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 500")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per extract case (fastest is kept)")
+    parser.add_argument("--partitioned", action="store_true", help="Use the partitioned fact table")
+    parser.add_argument("--output", type=Path, default=project_root / "benchmarks" / "results" / "etl.json")
+    parser.add_argument("--baseline", type=Path, default=project_root / "benchmarks" / "results" / "baseline.json")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed fractional throughput drop before failing")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args()
+
+    results = []
+    with FakeOpenMeteoServer(latency=args.latency, error_rate=args.error_rate,
+                             throttle_every=args.throttle_every) as server:
+        with throwaway_database(args.partitioned):
+            for scale in args.scales:
+                results.extend(bench_scale(server, scale, args.workers, args.single_calls, args.repeat))
+        faults = {"errors": server.error_count, "throttled": server.throttled_count,
+                  "requests": server.request_count}
+
+    print(f"{'case':<22} {'scale':>7} {'ops':>9} {'seconds':>10} {'ops/sec':>12}")
+    for r in results:
+        print(f"{r['name']:<22} {r['scale']:>7} {r['operations']:>9} {r['seconds']:>10.3f} "
+              f"{r['ops_per_second'] or 0:>12,.1f}")
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "faults": faults,
+        "results": results,
+    }
+    report["config"]["update_baseline"] = args.update_baseline
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline updated at {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print("No baseline to compare against")
+        return
+    regressions = find_regressions(results, json.loads(args.baseline.read_text()), args.threshold)
+    for r in regressions:
+        print(f"REGRESSION {r['name']} at scale {r['scale']}: {r['ops_per_second']:,.1f} ops/sec "
+              f"vs baseline {r['baseline_ops_per_second']:,.1f} ({r['change']:+.1%})")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark WeatherLoader throughput (rows/sec) against the configured warehouse."""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from load.loader import WeatherLoader
+from load.seen_keys import seen_keys
+from load.summary import recompute_groups
+from utils.database import db
+
+CITIES = [
+    ("Bellevue", "USA"), ("Ames", "USA"), ("Hyderabad", "India"), ("Berlin", "Germany"),
+    ("Sydney", "Australia"), ("Delhi", "India"), ("Cape Town", "South Africa"),
+    ("Rio de Janeiro", "Brazil"), ("London", "UK"), ("Jakarta", "Indonesia"),
+]
+
+
+def synthetic_readings(count, start=datetime(2025, 1, 1)):
+    """Hourly readings cycling through the seeded cities."""
+    for i in range(count):
+        city, country = CITIES[i % len(CITIES)]
+        temp = round(10 + (i % 300) / 10, 2)
+        yield {
+            "city": city,
+            "country": country,
+            "latitude": None,
+            "longitude": None,
+            "temperature_celsius": temp,
+            "temperature_fahrenheit": round(temp * 9 / 5 + 32, 2),
+            "recorded_at": start + timedelta(hours=i // len(CITIES)),
+            "api_source": "benchmark",
+        }
+
+
+def bench(rows, chunk_size):
+    loader = WeatherLoader()
+    readings = synthetic_readings(rows)
+    loaded = 0
+    elapsed = 0.0
+    while loaded < rows:
+        chunk = [next(readings) for _ in range(min(chunk_size, rows - loaded))]
+        start = time.perf_counter()
+        result = loader.load(chunk)
+        elapsed += time.perf_counter() - start
+        loaded += len(chunk)
+        assert result.loaded == len(chunk), result.rejects[:5]
+    return elapsed
+
+
+def cleanup():
+    groups = db.execute_query("DELETE FROM fact_weather_measurements WHERE api_source = 'benchmark' "
+                              "RETURNING location_id, date_id")
+    recompute_groups(list(set(groups)))
+    db.execute_query("DELETE FROM etl_location_watermark WHERE api_source = 'benchmark'")
+    seen_keys.invalidate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 10_000, 1_000_000])
+    parser.add_argument("--chunk-size", type=int, default=100_000,
+                        help="Readings passed to a single load() call")
+    args = parser.parse_args()
+
+    db.initialize()
+    print(f"{'rows':>10} {'seconds':>10} {'rows/sec':>12}")
+    try:
+        for rows in args.rows:
+            elapsed = bench(rows, args.chunk_size)
+            print(f"{rows:>10} {elapsed:>10.3f} {rows / elapsed:>12,.0f}")
+            cleanup()
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare insert and range-scan latency for a plain and a monthly-partitioned fact table."""
+import argparse
+import statistics
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from load.partitions import add_months
+from utils.database import db
+
+COLUMNS = """
+    measurement_id BIGSERIAL,
+    location_id INT NOT NULL,
+    date_id INT NOT NULL,
+    time_id INT NOT NULL,
+    temperature_celsius DECIMAL(5,2),
+    recorded_at TIMESTAMP NOT NULL
+"""
+
+START = date(2023, 1, 1)
+
+
+def create_tables(months):
+    db.execute_query("DROP SCHEMA IF EXISTS bench_partitions CASCADE")
+    db.execute_query("CREATE SCHEMA bench_partitions")
+    db.execute_query(f"CREATE TABLE bench_partitions.plain ({COLUMNS}, PRIMARY KEY (measurement_id))")
+    db.execute_query("CREATE INDEX ON bench_partitions.plain (location_id, date_id)")
+    db.execute_query("CREATE INDEX ON bench_partitions.plain (recorded_at)")
+    db.execute_query("CREATE INDEX ON bench_partitions.plain (date_id, time_id)")
+
+    db.execute_query(f"""
+        CREATE TABLE bench_partitions.partitioned ({COLUMNS}, PRIMARY KEY (measurement_id, recorded_at))
+        PARTITION BY RANGE (recorded_at)
+    """)
+    db.execute_query("CREATE INDEX ON bench_partitions.partitioned (location_id, date_id)")
+    db.execute_query("CREATE INDEX ON bench_partitions.partitioned (date_id, time_id)")
+    for i in range(months):
+        month = add_months(START, i)
+        name = f"bench_partitions.p{i}"
+        db.execute_query(f"""
+            CREATE TABLE {name} PARTITION OF bench_partitions.partitioned
+            FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')
+        """)
+        # Older months get BRIN, the last three keep a B-tree
+        method = "BRIN" if i < months - 3 else "BTREE"
+        db.execute_query(f"CREATE INDEX ON {name} USING {method} (recorded_at)")
+
+
+def insert(table, locations, months):
+    """Insert hourly rows for every location, one month per statement."""
+    timings = []
+    for i in range(months):
+        month = add_months(START, i)
+        start = time.perf_counter()
+        db.execute_query(f"""
+            INSERT INTO bench_partitions.{table} (location_id, date_id, time_id, temperature_celsius, recorded_at)
+            SELECT loc, 1, 1, 20, ts
+            FROM generate_series(1, {locations}) loc,
+                 generate_series(TIMESTAMP '{month}', TIMESTAMP '{add_months(month, 1)}' - INTERVAL '1 hour',
+                                 INTERVAL '1 hour') ts
+        """)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def range_scan(table, months, samples=20):
+    timings = []
+    for i in range(samples):
+        month = add_months(START, (i * 7) % months)
+        start = time.perf_counter()
+        db.execute_query(f"""
+            SELECT location_id, AVG(temperature_celsius)
+            FROM bench_partitions.{table}
+            WHERE recorded_at >= '{month}' AND recorded_at < '{month}'::date + 7
+            GROUP BY location_id
+        """)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--locations", type=int, default=100)
+    parser.add_argument("--months", type=int, default=24)
+    args = parser.parse_args()
+
+    db.initialize()
+    create_tables(args.months)
+    rows_per_month = args.locations * 24 * 30
+    print(f"{'table':<12} {'last-month insert (s)':>22} {'rows/sec':>10} {'7-day scan median (ms)':>24}")
+    try:
+        for table in ("plain", "partitioned"):
+            inserts = insert(table, args.locations, args.months)
+            db.execute_query(f"ANALYZE bench_partitions.{table}")
+            scans = range_scan(table, args.months)
+            print(f"{table:<12} {inserts[-1]:>22.3f} {rows_per_month / inserts[-1]:>10,.0f} "
+                  f"{statistics.median(scans) * 1000:>24.1f}")
+    finally:
+        db.execute_query("DROP SCHEMA IF EXISTS bench_partitions CASCADE")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,12 @@ from airflow.utils.dates import days_ago
 import sys
 import os
 
-# Add src to path
+# Add src to path; modules under src/ import each other as top-level packages,
+# so tasks import them the same way to share one db, resolver and metrics instance
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config.config import settings
 
 # Default arguments for the DAG
 default_args = {
@@ -29,146 +33,168 @@ dag = DAG(
     tags=['weather', 'etl'],
 )
 
-def extract_weather_data(**context):
-    """Extract weather data from Open-Meteo API."""
-    from src.extract.open_meteo import OpenMeteoExtractor
-    from src.utils.logger import logger
-    
-    logger.info("Starting weather data extraction")
-    extractor = OpenMeteoExtractor()
-    weather_data = extractor.extract_all_cities()
-    extractor.close()
+def publish_metrics(stage, **context):
+    """Write this task's metrics as Prometheus/JSON files and push the summary to XCom."""
+    from utils.metrics import metrics
     
-    # Store in XCom for the next task
-    context['task_instance'].xcom_push(key='weather_data', value=weather_data)
-    logger.info(f"Extracted data for {len(weather_data)} cities")
-    return len(weather_data)
+    if not metrics.enabled:
+        return
+    ti = context['task_instance']
+    map_index = getattr(ti, 'map_index', -1)
+    # Replaced by the next run's task, so the textfile collector sees each stage and shard once
+    job = f"weather_etl_{stage}" + (f"_shard{map_index:03d}" if map_index >= 0 else "")
+    metrics.write(job)
+    ti.xcom_push(key='metrics', value=metrics.summary())
 
-def load_weather_data(**context):
-    """Load weather data to PostgreSQL."""
-    from src.utils.database import db
-    from src.utils.logger import logger
-    from datetime import datetime
+def maintain_partitions(**context):
+    """Create upcoming fact partitions ahead of the loader and retire old ones."""
+    from load.partitions import partitions
+    from utils.database import db
     
-    # Get data from previous task
-    weather_data = context['task_instance'].xcom_pull(key='weather_data')
+    with db.unit_of_work():
+        return partitions.maintain()
+
+def extract_weather_data(shard, shard_count, **context):
+    """Extract one shard of the locations from Open-Meteo API into a Parquet staging file."""
+    import time
+    from config.locations import get_registry
+    from extract.open_meteo import OpenMeteoExtractor
+    from load.freshness import freshness
+    from load.staging import StagingWriter, staging_path
+    from utils.logger import logger
+    from utils.metrics import metrics
     
-    if not weather_data:
-        logger.error("No data to load")
-        return 0
+    metrics.reset()
+    start = time.perf_counter()
+    locations = get_registry().shard(shard, shard_count)
+    logger.info(f"Starting weather data extraction for shard {shard}/{shard_count} "
+                f"({len(locations)} locations)")
+    with metrics.span('stage', stage='extract'):
+        extractor = OpenMeteoExtractor(freshness=freshness)
+        path = staging_path(f"{context['ts_nodash']}_shard{shard:03d}")
+        try:
+            with StagingWriter(path) as writer:
+                for batch in extractor.iter_city_batches(locations=locations):
+                    writer.write(batch)
+        finally:
+            extractor.close()
+    metrics.throughput('extract', writer.row_count, time.perf_counter() - start)
+    publish_metrics('extract', **context)
     
-    logger.info(f"Loading {len(weather_data)} records to database")
+    # Only the file location goes through XCom, not the readings themselves;
+    # the returned dict becomes the op_kwargs of this shard's load task
+    logger.info(f"Extracted data for {writer.row_count} cities in shard {shard}")
+    return {
+        'shard': shard,
+        'locations': len(locations),
+        'staging_path': str(path),
+        'row_count': writer.row_count,
+        'extract_seconds': round(time.perf_counter() - start, 3),
+    }
+
+def load_weather_data(shard, locations, staging_path, row_count, extract_seconds, **context):
+    """Load one shard's staging file to PostgreSQL."""
+    import time
+    from pathlib import Path
+    from load.loader import WeatherLoader
+    from load.staging import read_staging_batches
+    from utils.database import db
+    from utils.logger import logger
+    from utils.metrics import metrics
     
-    # Initialize database
-    db.initialize()
+    metrics.reset()
+    stats = {'shard': shard, 'locations': locations, 'extracted': row_count,
+             'loaded': 0, 'rejected': 0, 'extract_seconds': extract_seconds, 'load_seconds': 0.0}
+    if not row_count:
+        # Normal when every location of the shard was skipped as already fresh
+        logger.info(f"No new readings to load for shard {shard}")
+        return stats
+    if not Path(staging_path).exists():
+        logger.error(f"Staging file {staging_path} with {row_count} readings for shard {shard} is missing")
+        return stats
     
-    loaded_count = 0
+    logger.info(f"Loading {row_count} records to database for shard {shard}")
     
-    # Helper functions
-    def get_location_id(city, country):
-        query = """
-            SELECT location_id 
-            FROM dim_location 
-            WHERE city_name = :city AND country = :country
-        """
-        result = db.execute_query(query, {"city": city, "country": country})
-        row = result.fetchone()
-        return row[0] if row else None
+    start = time.perf_counter()
+    loader = WeatherLoader()
+    with metrics.span('stage', stage='load'), db.unit_of_work():
+        for batch in read_staging_batches(staging_path):
+            result = loader.load_batch(batch)
+            stats['loaded'] += result.loaded
+            stats['rejected'] += result.rejected
+    stats['load_seconds'] = round(time.perf_counter() - start, 3)
     
-    def get_or_create_date_id(date):
-        query = "SELECT date_id FROM dim_date WHERE full_date = :date"
-        result = db.execute_query(query, {"date": date.date()})
-        row = result.fetchone()
-        
-        if row:
-            return row[0]
-        
-        # Insert if not exists
-        insert_query = """
-            INSERT INTO dim_date (full_date, year, quarter, month, month_name,
-                                week_of_year, day_of_month, day_of_week, day_name, is_weekend)
-            VALUES (:full_date, :year, :quarter, :month, :month_name,
-                    :week_of_year, :day_of_month, :day_of_week, :day_name, :is_weekend)
-            RETURNING date_id
-        """
-        
-        params = {
-            "full_date": date.date(),
-            "year": date.year,
-            "quarter": (date.month - 1) // 3 + 1,
-            "month": date.month,
-            "month_name": date.strftime("%B"),
-            "week_of_year": date.isocalendar()[1],
-            "day_of_month": date.day,
-            "day_of_week": date.weekday(),
-            "day_name": date.strftime("%A"),
-            "is_weekend": date.weekday() >= 5
-        }
-        
-        result = db.execute_query(insert_query, params)
-        return result.fetchone()[0]
+    # Removed only after the commit, so a retried load finds its input again
+    Path(staging_path).unlink(missing_ok=True)
+    publish_metrics('load', **context)
     
-    def get_time_id(date):
-        query = "SELECT time_id FROM dim_time WHERE hour = :hour AND minute = :minute"
-        result = db.execute_query(query, {"hour": date.hour, "minute": 0})
-        row = result.fetchone()
-        return row[0] if row else None
+    logger.success(f"Loaded {stats['loaded']} records for shard {shard}")
+    return stats
+
+def merge_shard_stats(**context):
+    """
+    Combine the per-shard load statistics into totals for the run.
     
-    # Load each record
-    for data in weather_data:
-        try:
-            location_id = get_location_id(data["city"], data["country"])
-            if not location_id:
-                logger.warning(f"Location not found: {data['city']}")
-                continue
-            
-            date_id = get_or_create_date_id(data["recorded_at"])
-            time_id = get_time_id(data["recorded_at"])
-            
-            if not time_id:
-                logger.warning(f"Time not found for hour: {data['recorded_at'].hour}")
-                continue
-            
-            # Insert into fact table
-            insert_query = """
-                INSERT INTO fact_weather_measurements 
-                (location_id, date_id, time_id, temperature_celsius, temperature_fahrenheit,
-                 api_source, recorded_at)
-                VALUES (:location_id, :date_id, :time_id, :temp_c, :temp_f,
-                        :api_source, :recorded_at)
-            """
-            
-            params = {
-                "location_id": location_id,
-                "date_id": date_id,
-                "time_id": time_id,
-                "temp_c": data["temperature_celsius"],
-                "temp_f": data["temperature_fahrenheit"],
-                "api_source": data["api_source"],
-                "recorded_at": data["recorded_at"]
-            }
-            
-            db.execute_query(insert_query, params)
-            loaded_count += 1
-            
-        except Exception as e:
-            logger.error(f"Error loading data for {data['city']}: {e}")
+    Runs once every shard has finished, successfully or not; shards that
+    failed pushed no statistics and are counted as failed_shards.
+    """
+    from utils.logger import logger
     
-    logger.success(f"Loaded {loaded_count} records")
-    return loaded_count
+    ti = context['task_instance']
+    shard_stats = [stats for stats in ti.xcom_pull(task_ids='load_weather_data') or [] if stats]
+    failed = SHARD_COUNT - len(shard_stats)
+    if failed:
+        logger.warning(f"{failed} of {SHARD_COUNT} shards reported no load statistics")
+    totals = {
+        'shards': len(shard_stats),
+        'failed_shards': failed,
+        'locations': sum(s['locations'] for s in shard_stats),
+        'extracted': sum(s['extracted'] for s in shard_stats),
+        'loaded': sum(s['loaded'] for s in shard_stats),
+        'rejected': sum(s['rejected'] for s in shard_stats),
+        # Shards run side by side, so the slowest one bounds the run
+        'slowest_shard_seconds': max((s['extract_seconds'] + s['load_seconds'] for s in shard_stats),
+                                     default=0.0),
+        'counters': {},
+    }
+    # Counters pushed by every mapped extract and load task, summed over shards
+    for task_id in ('extract_weather_data', 'load_weather_data'):
+        for summary in ti.xcom_pull(task_ids=task_id, key='metrics') or []:
+            for name, value in (summary or {}).get('counters', {}).items():
+                totals['counters'][name] = totals['counters'].get(name, 0) + value
+    logger.success(f"Sharded run complete: {totals}")
+    return totals
 
 # Define tasks
-extract_task = PythonOperator(
+partition_task = PythonOperator(
+    task_id='maintain_partitions',
+    python_callable=maintain_partitions,
+    dag=dag,
+)
+
+# One mapped extract/load pair per shard; each mapped task instance retries on its own
+SHARD_COUNT = settings.etl_shard_count
+
+extract_task = PythonOperator.partial(
     task_id='extract_weather_data',
     python_callable=extract_weather_data,
     dag=dag,
-)
+).expand(op_kwargs=[{'shard': shard, 'shard_count': SHARD_COUNT} for shard in range(SHARD_COUNT)])
 
-load_task = PythonOperator(
+load_task = PythonOperator.partial(
     task_id='load_weather_data',
     python_callable=load_weather_data,
     dag=dag,
+).expand(op_kwargs=extract_task.output)
+
+# Merged whatever the shards' outcome, so one failed shard does not hide the others' stats
+merge_task = PythonOperator(
+    task_id='merge_shard_stats',
+    python_callable=merge_shard_stats,
+    trigger_rule='all_done',
+    dag=dag,
 )
 
 # Set task dependencies
-extract_task >> load_task
\ No newline at end of file
+partition_task >> load_task
+load_task >> merge_task
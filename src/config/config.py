@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Union
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 from pydantic import PostgresDsn
@@ -8,6 +8,15 @@ from pydantic import PostgresDsn
 # Load environment variables
 load_dotenv()
 
+# Repository root, which relative data paths in the settings are resolved against
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def project_path(path: Union[str, Path]) -> Path:
+    """Resolve a settings path: absolute ones as given, relative ones under PROJECT_ROOT."""
+    path = Path(path)
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
 class Settings(BaseSettings):
     """Application settings."""
     
@@ -17,6 +26,11 @@ class Settings(BaseSettings):
     db_name: str = os.getenv("DB_NAME", "weather")
     db_user: str = os.getenv("DB_USER", "postgres")
     db_password: str = os.getenv("DB_PASSWORD", "")
+    db_pool_enabled: bool = os.getenv("DB_POOL_ENABLED", "true").lower() == "true"
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", 5))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", 5))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
     
     # API Keys
     openweather_api_key: str = os.getenv("OPENWEATHER_API_KEY", "")
@@ -26,20 +40,99 @@ class Settings(BaseSettings):
     # Application
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     batch_size: int = int(os.getenv("BATCH_SIZE", 1000))
+    dim_cache_max_locations: int = int(os.getenv("DIM_CACHE_MAX_LOCATIONS", 200000))
+    dim_cache_max_dates: int = int(os.getenv("DIM_CACHE_MAX_DATES", 20000))
+    staging_dir: str = os.getenv("STAGING_DIR", "data/staging")
+    
+    # Fact table partitioning
+    partition_months_ahead: int = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+    partition_brin_after_months: int = int(os.getenv("PARTITION_BRIN_AFTER_MONTHS", 3))
+    partition_retention_months: int = int(os.getenv("PARTITION_RETENTION_MONTHS", 0))
+    partition_drop_expired: bool = os.getenv("PARTITION_DROP_EXPIRED", "false").lower() == "true"
+
+    # Cold tier: facts older than this many months move to Parquet under COLD_TIER_DIR (0 keeps all hot)
+    cold_tier_after_months: int = int(os.getenv("COLD_TIER_AFTER_MONTHS", 0))
+    cold_tier_dir: str = os.getenv("COLD_TIER_DIR", "data/cold")
+    cold_tier_row_group_rows: int = int(os.getenv("COLD_TIER_ROW_GROUP_ROWS", 2048))
+
+    # Extraction
+    extract_max_workers: int = int(os.getenv("EXTRACT_MAX_WORKERS", 8))
+    api_rate_limit_per_second: float = float(os.getenv("API_RATE_LIMIT_PER_SECOND", 10))
+    api_rate_limit_burst: int = int(os.getenv("API_RATE_LIMIT_BURST", 10))
+    api_timeout_seconds: float = float(os.getenv("API_TIMEOUT_SECONDS", 10))
+    api_batch_size: int = int(os.getenv("API_BATCH_SIZE", 100))
+    api_max_url_length: int = int(os.getenv("API_MAX_URL_LENGTH", 4000))
+    api_retry_max_attempts: int = int(os.getenv("API_RETRY_MAX_ATTEMPTS", 4))
+    api_retry_base_delay_seconds: float = float(os.getenv("API_RETRY_BASE_DELAY_SECONDS", 0.5))
+    api_retry_max_delay_seconds: float = float(os.getenv("API_RETRY_MAX_DELAY_SECONDS", 30))
+    api_circuit_failure_threshold: int = int(os.getenv("API_CIRCUIT_FAILURE_THRESHOLD", 5))
+    api_circuit_reset_seconds: float = float(os.getenv("API_CIRCUIT_RESET_SECONDS", 30))
+    # Budget of one extraction run; must leave room for the load inside the hourly slot
+    extract_deadline_seconds: float = float(os.getenv("EXTRACT_DEADLINE_SECONDS", 2400))
+
+    # Weather providers queried by run_etl ("open_meteo", "openweather", "weatherapi"),
+    # combined in "hedged" (first good answer per location) or "merge" (every provider) mode
+    extract_providers: str = os.getenv("EXTRACT_PROVIDERS", "open_meteo")
+    extract_provider_mode: str = os.getenv("EXTRACT_PROVIDER_MODE", "hedged")
+    # Hedged mode asks the next provider after this long without an answer (at most)
+    provider_hedge_delay_seconds: float = float(os.getenv("PROVIDER_HEDGE_DELAY_SECONDS", 2.0))
+    openweather_rate_limit_per_second: float = float(os.getenv("OPENWEATHER_RATE_LIMIT_PER_SECOND", 1))
+    weatherapi_rate_limit_per_second: float = float(os.getenv("WEATHERAPI_RATE_LIMIT_PER_SECOND", 1))
+    # Open-Meteo grid cells learned from responses: each cell is requested once per run
+    # and its reading shared by every location in it (src/extract/grid_cells.py)
+    grid_cells_enabled: bool = os.getenv("GRID_CELLS_ENABLED", "true").lower() == "true"
+    grid_cells_path: str = os.getenv("GRID_CELLS_PATH", "data/grid_cells.parquet")
+    grid_cells_snap_km: float = float(os.getenv("GRID_CELLS_SNAP_KM", 0))
+    # A location sharing a cell is requested on its own again once its cell is this old
+    grid_cells_recheck_hours: float = float(os.getenv("GRID_CELLS_RECHECK_HOURS", 24))
+    
+    # Response cache
+    cache_enabled: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    cache_path: str = os.getenv("CACHE_PATH", "data/cache/responses.sqlite3")
+    cache_max_entries: int = int(os.getenv("CACHE_MAX_ENTRIES", 100000))
+    cache_update_interval_seconds: int = int(os.getenv("CACHE_UPDATE_INTERVAL_SECONDS", 900))
+    cache_archive_ttl_seconds: int = int(os.getenv("CACHE_ARCHIVE_TTL_SECONDS", 7 * 24 * 3600))
+    
+    # Raw response lake: every fetched current-weather payload, for replays
+    raw_lake_enabled: bool = os.getenv("RAW_LAKE_ENABLED", "true").lower() == "true"
+    raw_lake_dir: str = os.getenv("RAW_LAKE_DIR", "data/raw")
+    raw_lake_block_records: int = int(os.getenv("RAW_LAKE_BLOCK_RECORDS", 1000))
+    raw_lake_zstd_level: int = int(os.getenv("RAW_LAKE_ZSTD_LEVEL", 3))
+    replay_workers: int = int(os.getenv("REPLAY_WORKERS", 4))
+    
+    # Metrics
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    metrics_dir: str = os.getenv("METRICS_DIR", "data/metrics")
+    
+    # Query API result cache
+    query_cache_max_entries: int = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", 1024))
+    query_watermark_poll_seconds: float = float(os.getenv("QUERY_WATERMARK_POLL_SECONDS", 1.0))
+    
+    # Per-location freshness watermarks (etl_location_watermark)
+    freshness_cache_seconds: float = float(os.getenv("FRESHNESS_CACHE_SECONDS", 300))
+    freshness_stale_after_minutes: float = float(os.getenv("FRESHNESS_STALE_AFTER_MINUTES", 90))
+
+    # Natural-key conflicts: recently loaded keys are dropped in memory before staging
+    seen_keys_window_hours: float = float(os.getenv("SEEN_KEYS_WINDOW_HOURS", 6))
+
+    # Number of extract/load shards the hourly DAG fans out to
+    etl_shard_count: int = int(os.getenv("ETL_SHARD_COUNT", 4))
+    
+    # Streaming daemon (src/run_daemon.py): polls on the provider's 15-minute update slots
+    daemon_poll_interval_seconds: float = float(os.getenv("DAEMON_POLL_INTERVAL_SECONDS", 900))
+    daemon_slot_offset_seconds: float = float(os.getenv("DAEMON_SLOT_OFFSET_SECONDS", 60))
+    daemon_producers: int = int(os.getenv("DAEMON_PRODUCERS", 1))
+    daemon_queue_size: int = int(os.getenv("DAEMON_QUEUE_SIZE", 64))
+    daemon_flush_rows: int = int(os.getenv("DAEMON_FLUSH_ROWS", 5000))
+    daemon_flush_seconds: float = float(os.getenv("DAEMON_FLUSH_SECONDS", 30))
+    
+    # Backfill
+    backfill_window_days: int = int(os.getenv("BACKFILL_WINDOW_DAYS", 31))
+    backfill_checkpoint_path: str = os.getenv("BACKFILL_CHECKPOINT_PATH", "data/backfill_checkpoint.txt")
     
-    # Cities to monitor
-    cities: List[Dict[str, Any]] = [
-        {"name": "Bellevue", "country": "USA", "state": "WA"},
-        {"name": "Ames", "country": "USA", "state": "IA"},
-        {"name": "Hyderabad", "country": "India", "state": "TG"},
-        {"name": "Berlin", "country": "Germany", "state": ""},
-        {"name": "Sydney", "country": "Australia", "state": "NSW"},
-        {"name": "Delhi", "country": "India", "state": "DL"},
-        {"name": "Cape Town", "country": "South Africa", "state": ""},
-        {"name": "Rio de Janeiro", "country": "Brazil", "state": "RJ"},
-        {"name": "London", "country": "UK", "state": ""},
-        {"name": "Jakarta", "country": "Indonesia", "state": ""}
-    ]
+    # Monitored locations: "csv", "parquet" or "database" (dim_location)
+    location_source: str = os.getenv("LOCATION_SOURCE", "csv")
+    locations_path: str = os.getenv("LOCATIONS_PATH", "data/locations.csv")
     
     @property
     def database_url(self) -> str:
@@ -49,5 +142,6 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
         case_sensitive = False
+        extra = "ignore"  # .env also carries Airflow settings
 
 settings = Settings()
\ No newline at end of file
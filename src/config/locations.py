@@ -0,0 +1,262 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from config.config import project_path, settings
+from config.spatial import SpatialIndex
+
+
+class StringColumn:
+    """Immutable strings packed into one UTF-8 buffer with an offsets array."""
+
+    def __init__(self, values: Sequence[str]):
+        encoded = [str(value).encode("utf-8") for value in values]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=self.offsets[1:])
+        self.buffer = b"".join(encoded)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes
+
+
+def _hash_keys(cities: pd.Series, countries: Optional[pd.Series] = None) -> np.ndarray:
+    """64-bit hashes of city names, or of (city, country) pairs."""
+    keys = cities.astype(str) if countries is None else cities.astype(str) + "\x1f" + countries.astype(str)
+    return pd.util.hash_array(keys.to_numpy(dtype=object))
+
+
+def shard_of(location_ids: np.ndarray, shard_count: int) -> np.ndarray:
+    """
+    Shard number of each location id.
+
+    Ids are spread with Fibonacci hashing, so consecutive SERIAL ids land
+    on different shards and every process computes the same assignment.
+    """
+    mixed = (np.asarray(location_ids).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)
+    return (mixed % np.uint64(max(1, shard_count))).astype(np.int64)
+
+
+class LocationRegistry:
+    """
+    The set of monitored locations, held in compact column arrays.
+
+    City names live in one packed string buffer; countries, states and
+    timezones are dictionary-encoded; coordinates and ids are NumPy arrays.
+    Lookups by name, (name, country) or id use sorted 64-bit hash/id arrays
+    and binary search, so there is no per-location Python object and
+    loading 100k+ locations takes well under a second. Lookups by
+    coordinates use a SpatialIndex, built on first use.
+
+    Locations are addressed by their position (index) in the registry.
+    """
+
+    COLUMNS = ["location_id", "city_name", "country", "state", "latitude", "longitude", "timezone"]
+
+    def __init__(self, frame: pd.DataFrame, source: str = "frame"):
+        frame = frame.reset_index(drop=True)
+        self.source = source
+        count = len(frame)
+
+        if "location_id" in frame and frame["location_id"].notna().all():
+            self.location_ids = frame["location_id"].to_numpy(dtype=np.int64)
+        else:
+            self.location_ids = np.arange(1, count + 1, dtype=np.int64)
+        self.latitudes = frame["latitude"].to_numpy(dtype=np.float64)
+        self.longitudes = frame["longitude"].to_numpy(dtype=np.float64)
+
+        self._cities = StringColumn(frame["city_name"].astype(str))
+        self._countries = pd.Categorical(frame["country"].astype(str))
+        self._states = pd.Categorical(frame.get("state", pd.Series([""] * count)).fillna("").astype(str))
+        self._timezones = pd.Categorical(frame.get("timezone", pd.Series(["UTC"] * count)).fillna("UTC").astype(str))
+
+        key_hashes = _hash_keys(frame["city_name"], frame["country"])
+        self._key_order = np.argsort(key_hashes, kind="stable")
+        self._key_hashes = key_hashes[self._key_order]
+
+        name_hashes = _hash_keys(frame["city_name"])
+        self._name_order = np.argsort(name_hashes, kind="stable")
+        self._name_hashes = name_hashes[self._name_order]
+
+        self._id_order = np.argsort(self.location_ids, kind="stable")
+        self._sorted_ids = self.location_ids[self._id_order]
+        self._spatial: Optional[SpatialIndex] = None
+
+    # Loading
+
+    @classmethod
+    def from_csv(cls, path: Union[str, Path]) -> "LocationRegistry":
+        return cls(pd.read_csv(path, keep_default_na=False, na_values={"location_id": [""]}),
+                   source=str(path))
+
+    @classmethod
+    def from_parquet(cls, path: Union[str, Path]) -> "LocationRegistry":
+        return cls(pd.read_parquet(path), source=str(path))
+
+    @classmethod
+    def from_database(cls, database=None) -> "LocationRegistry":
+        """Load the registry from dim_location, including its surrogate keys."""
+        from utils.database import db
+
+        rows = (database or db).execute_query(
+            "SELECT location_id, city_name, country, '' AS state, latitude, longitude, timezone "
+            "FROM dim_location ORDER BY location_id"
+        )
+        frame = pd.DataFrame(rows, columns=cls.COLUMNS)
+        frame["latitude"] = frame["latitude"].astype(float)
+        frame["longitude"] = frame["longitude"].astype(float)
+        return cls(frame, source="dim_location")
+
+    # Lookup
+
+    def __len__(self) -> int:
+        return len(self._cities)
+
+    def _matches(self, hashes: np.ndarray, order: np.ndarray, target: int) -> np.ndarray:
+        start = np.searchsorted(hashes, target, side="left")
+        stop = np.searchsorted(hashes, target, side="right")
+        return order[start:stop]
+
+    def find(self, city: str, country: Optional[str] = None) -> Optional[int]:
+        """
+        Index of a location by city name and, optionally, country.
+
+        Without a country the first location with that name is returned.
+        """
+        if country is None:
+            target = _hash_keys(pd.Series([city]))[0]
+            candidates = self._matches(self._name_hashes, self._name_order, target)
+        else:
+            target = _hash_keys(pd.Series([city]), pd.Series([country]))[0]
+            candidates = self._matches(self._key_hashes, self._key_order, target)
+        for index in sorted(candidates):
+            if self._cities[index] == city and (country is None or self.country(index) == country):
+                return int(index)
+        return None
+
+    def find_id(self, location_id: int) -> Optional[int]:
+        """Index of a location by its location_id."""
+        position = np.searchsorted(self._sorted_ids, location_id)
+        if position < len(self._sorted_ids) and self._sorted_ids[position] == location_id:
+            return int(self._id_order[position])
+        return None
+
+    def nearest(self, latitude: float, longitude: float,
+                max_distance_km: Optional[float] = None) -> Optional[int]:
+        """
+        Index of the location closest to a coordinate.
+
+        Returns:
+            The index, or None if the registry is empty or the closest
+            location is farther than max_distance_km
+        """
+        if self._spatial is None:
+            self._spatial = SpatialIndex(self.latitudes, self.longitudes)
+        index, distance = self._spatial.nearest(latitude, longitude)
+        if index < 0 or (max_distance_km is not None and distance > max_distance_km):
+            return None
+        return index
+
+    def city(self, index: int) -> str:
+        return self._cities[index]
+
+    def country(self, index: int) -> str:
+        return self._countries.categories[self._countries.codes[index]]
+
+    def timezone(self, index: int) -> str:
+        return self._timezones.categories[self._timezones.codes[index]]
+
+    def get(self, index: int) -> Dict[str, Any]:
+        """All attributes of one location."""
+        return {
+            "location_id": int(self.location_ids[index]),
+            "city_name": self.city(index),
+            "country": self.country(index),
+            "state": self._states.categories[self._states.codes[index]],
+            "latitude": float(self.latitudes[index]),
+            "longitude": float(self.longitudes[index]),
+            "timezone": self.timezone(index),
+        }
+
+    def cities(self) -> List[str]:
+        return [self._cities[index] for index in range(len(self))]
+
+    def shard(self, shard_id: int, shard_count: int) -> np.ndarray:
+        """Indexes of the locations belonging to one of shard_count shards."""
+        return np.flatnonzero(shard_of(self.location_ids, shard_count) == shard_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "location_id": self.location_ids,
+            "city_name": self.cities(),
+            "country": np.asarray(self._countries),
+            "state": np.asarray(self._states),
+            "latitude": self.latitudes,
+            "longitude": self.longitudes,
+            "timezone": np.asarray(self._timezones),
+        }, columns=self.COLUMNS)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the registry's arrays."""
+        arrays = [self.location_ids, self.latitudes, self.longitudes, self._key_order, self._key_hashes,
+                  self._name_order, self._name_hashes, self._id_order, self._sorted_ids,
+                  self._countries.codes, self._states.codes, self._timezones.codes]
+        return self._cities.nbytes + sum(array.nbytes for array in arrays)
+
+
+def sync_to_database(registry: LocationRegistry, database=None) -> int:
+    """
+    Upsert the registry into dim_location, keyed on (city_name, country).
+
+    Coordinates and timezones of existing rows are updated in place, so
+    their location_id (and every fact referencing it) is preserved.
+
+    Returns:
+        Number of rows inserted or changed
+    """
+    from utils.database import db
+
+    frame = registry.to_frame()
+    rows = (database or db).execute_query("""
+        INSERT INTO dim_location (city_name, country, latitude, longitude, timezone)
+        SELECT * FROM UNNEST(CAST(:cities AS TEXT[]), CAST(:countries AS TEXT[]),
+                             CAST(:latitudes AS NUMERIC[]), CAST(:longitudes AS NUMERIC[]),
+                             CAST(:timezones AS TEXT[]))
+        ON CONFLICT (city_name, country) DO UPDATE
+        SET latitude = EXCLUDED.latitude, longitude = EXCLUDED.longitude,
+            timezone = EXCLUDED.timezone, updated_at = CURRENT_TIMESTAMP
+        WHERE (dim_location.latitude, dim_location.longitude, dim_location.timezone)
+              IS DISTINCT FROM (EXCLUDED.latitude, EXCLUDED.longitude, EXCLUDED.timezone)
+        RETURNING location_id
+    """, {"cities": frame["city_name"].tolist(), "countries": frame["country"].tolist(),
+          "latitudes": frame["latitude"].tolist(), "longitudes": frame["longitude"].tolist(),
+          "timezones": frame["timezone"].tolist()})
+    return len(rows or [])
+
+
+def load_registry(source: Optional[str] = None, path: Optional[Union[str, Path]] = None) -> LocationRegistry:
+    """Load the registry from LOCATION_SOURCE ("csv", "parquet" or "database")."""
+    source = source or settings.location_source
+    path = project_path(path or settings.locations_path)
+    if source == "database":
+        return LocationRegistry.from_database()
+    if source == "parquet":
+        return LocationRegistry.from_parquet(path)
+    return LocationRegistry.from_csv(path)
+
+
+@lru_cache(maxsize=1)
+def get_registry() -> LocationRegistry:
+    """The process-wide registry, loaded on first use."""
+    return load_registry()
@@ -0,0 +1,89 @@
+from typing import Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Ranges this small are scanned directly instead of split further
+_LEAF_SIZE = 16
+
+
+def to_unit_vectors(latitudes, longitudes) -> np.ndarray:
+    """Points on the unit sphere, one (x, y, z) row per coordinate pair in degrees."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km of straight-line distances between unit vectors."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0.0, 1.0))
+
+
+class SpatialIndex:
+    """
+    Nearest-point lookup over fixed coordinates, as a KD-tree on the unit sphere.
+
+    Points are stored as 3-D unit vectors, so straight-line distance orders
+    them exactly as great-circle distance does, across the antimeridian and
+    near the poles alike. The tree is implicit: points are permuted so
+    every range [lo, hi) holds its split point at the middle, with the
+    smaller coordinates on its split axis to the left. Building takes
+    O(n log n) NumPy work and a handful of arrays; a lookup visits
+    O(log n) ranges.
+    """
+
+    def __init__(self, latitudes, longitudes):
+        points = to_unit_vectors(latitudes, longitudes)
+        count = len(points)
+        self.order = np.arange(count)
+        self._axes = np.zeros(count, dtype=np.int8)
+        stack = [(0, count)]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= _LEAF_SIZE:
+                continue
+            ids = self.order[lo:hi]
+            axis = int(np.argmax(np.ptp(points[ids], axis=0)))
+            middle = (hi - lo) // 2
+            self.order[lo:hi] = ids[np.argpartition(points[ids, axis], middle)]
+            self._axes[lo + middle] = axis
+            stack += [(lo, lo + middle), (lo + middle + 1, hi)]
+        self.points = points[self.order]
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def nearest(self, latitude: float, longitude: float) -> Tuple[int, float]:
+        """
+        Closest indexed point to a coordinate.
+
+        Returns:
+            Position of the point in the coordinates the index was built
+            from and its great-circle distance in km; (-1, inf) when empty
+        """
+        if not len(self):
+            return -1, float("inf")
+        target = to_unit_vectors([latitude], [longitude])[0]
+        best, best_distance = -1, np.inf
+        stack = [(0, len(self), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if bound >= best_distance:
+                continue
+            if hi - lo <= _LEAF_SIZE:
+                distances = np.sum((self.points[lo:hi] - target) ** 2, axis=1)
+                closest = int(np.argmin(distances))
+                if distances[closest] < best_distance:
+                    best, best_distance = lo + closest, distances[closest]
+                continue
+            middle = lo + (hi - lo) // 2
+            distance = float(np.sum((self.points[middle] - target) ** 2))
+            if distance < best_distance:
+                best, best_distance = middle, distance
+            offset = target[self._axes[middle]] - self.points[middle, self._axes[middle]]
+            near, far = ((lo, middle), (middle + 1, hi)) if offset < 0 else ((middle + 1, hi), (lo, middle))
+            # Visit the far side last, and only while it can hold a closer point
+            stack.append((*far, offset * offset))
+            stack.append((*near, bound))
+        return int(self.order[best]), float(chord_to_km(np.sqrt(best_distance)))
@@ -1,19 +1,467 @@
+import threading
+import time
+import numpy as np
+import requests
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Type, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from requests.adapters import HTTPAdapter
+from utils.logger import logger
+from utils.metrics import metrics
+from utils.rate_limiter import TokenBucket
+from extract.cache import ResponseCache
+from extract.raw_lake import RawResponseLake
+from extract.retry import (CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded, RetryPolicy,
+                           RetryStats, parse_retry_after)
+from config.config import settings
+from config.locations import LocationRegistry, get_registry
+from load.freshness import LocationFreshness
+from transform.batch import NAT, WeatherBatch
 
 class WeatherAPIBase(ABC):
-    """Base class for weather API extractors."""
-    
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        
+    """
+    Base class for weather API extractors.
+
+    Holds what every HTTP provider shares: a pooled session, the provider's
+    own token bucket, the response cache, retries with circuit breakers and
+    the run deadline. Subclasses name the provider, describe the request
+    for one location's current weather and parse the responses into a
+    WeatherBatch tagged with their name as api_source.
+    """
+
+    # api_source tag of the provider's readings and its key in PROVIDERS
+    name = ""
+    BASE_URL = ""
+    # Settings attribute holding the API key, for providers that need one
+    API_KEY_SETTING: Optional[str] = None
+
+    def __init__(self, api_key: Optional[str] = None,
+                 base_url: Optional[str] = None,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 max_workers: Optional[int] = None,
+                 cache: Optional[ResponseCache] = None,
+                 registry: Optional[LocationRegistry] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breakers: Optional[Dict[str, CircuitBreaker]] = None,
+                 deadline_seconds: Optional[float] = None,
+                 freshness: Optional[LocationFreshness] = None,
+                 raw_lake: Optional[RawResponseLake] = None):
+        """
+        Args:
+            api_key: Provider API key, read from API_KEY_SETTING if omitted
+            base_url: Override for the current-weather endpoint (used by tests)
+            rate_limiter: Token bucket for this provider, see default_rate_limiter
+            max_workers: Concurrent requests in extract_all_cities
+            cache: Response cache, built from settings if omitted and enabled
+            registry: Monitored locations, loaded from settings if omitted
+            retry_policy: Backoff between attempts, built from settings if omitted
+            circuit_breakers: Breakers by endpoint name; missing ones are built
+                from settings
+            deadline_seconds: Time budget of one extraction run, None for settings
+            freshness: Per-location watermarks; locations whose current update
+                slot is already loaded are not requested. None fetches everything
+            raw_lake: Archive of raw current-weather responses, built from
+                settings if omitted and enabled
+        """
+        if api_key is None and self.API_KEY_SETTING:
+            api_key = getattr(settings, self.API_KEY_SETTING)
+        self.api_key = api_key or ""
+        self.base_url = base_url or self.BASE_URL
+        self.max_workers = max(1, max_workers or settings.extract_max_workers)
+        self.rate_limiter = rate_limiter or self.default_rate_limiter()
+
+        self.cache = cache or (ResponseCache() if settings.cache_enabled else None)
+        self.raw_lake = raw_lake or (RawResponseLake() if settings.raw_lake_enabled else None)
+        self.registry = registry or get_registry()
+
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breakers = dict(circuit_breakers or {})
+        self._breakers_lock = threading.Lock()
+        self.deadline_seconds = settings.extract_deadline_seconds if deadline_seconds is None else deadline_seconds
+        # Requests outside a run are unbounded; run_stats keeps the last run's counts
+        self.deadline = Deadline()
+        self.run_stats = RetryStats()
+        self.freshness = freshness
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Weather-ETL-Project/1.0'
+        })
+        # Size the connection pool so concurrent workers reuse connections
+        adapter = HTTPAdapter(pool_connections=self.max_workers,
+                              pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def default_rate_limiter(cls) -> TokenBucket:
+        """Token bucket used when none is passed in; providers with their own quota override it."""
+        return TokenBucket(settings.api_rate_limit_per_second, settings.api_rate_limit_burst)
+
+    @classmethod
+    def configured(cls) -> bool:
+        """
+        Whether the provider can be used: it needs no API key or one is set.
+
+        The your_* placeholders of the example .env do not count as keys.
+        """
+        if not cls.API_KEY_SETTING:
+            return True
+        key = getattr(settings, cls.API_KEY_SETTING).strip()
+        return bool(key) and not key.lower().startswith("your_")
+
     @abstractmethod
-    def get_current_weather(self, city: str, country: str) -> Dict[str, Any]:
-        """Get current weather for a city."""
+    def _current_request(self, index: int) -> Tuple[str, Dict[str, Any]]:
+        """URL and query parameters of the current-weather request for a registry location."""
         pass
-    
+
     @abstractmethod
-    def parse_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
-        """Parse API response to standard format."""
-        pass
\ No newline at end of file
+    def parse_responses(self, cities: List[str], responses: List[Dict[str, Any]],
+                        countries: Optional[List[Optional[str]]] = None) -> WeatherBatch:
+        """Parse several current-weather responses, one reading per response."""
+        pass
+
+    def _endpoint(self, url: str) -> str:
+        """Name of the endpoint behind url, for metrics labels and circuit breakers."""
+        return self.name
+
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.circuit_breakers.get(endpoint)
+        if breaker is None:
+            with self._breakers_lock:
+                breaker = self.circuit_breakers.setdefault(endpoint, CircuitBreaker(endpoint))
+        return breaker
+
+    def available(self) -> bool:
+        """Whether requests can be sent now, i.e. no endpoint's breaker is open."""
+        return all(breaker.state != CircuitBreaker.OPEN for breaker in self.circuit_breakers.values())
+
+    def _fetch_json(self, url: str, params: Dict[str, Any], ttl: Optional[float] = None,
+                    locations: Optional[Sequence[Union[int, Sequence[int]]]] = None) -> Any:
+        """
+        GET a JSON payload, serving it from the response cache when possible.
+
+        Args:
+            url: Endpoint URL
+            params: Query parameters
+            ttl: Cache lifetime in seconds; defaults to the provider's update slot
+            locations: Registry indexes the response covers, one per payload
+                element or a list of indexes sharing it; given for current
+                weather, whose fresh responses are archived in the raw lake
+        """
+        endpoint = self._endpoint(url)
+        if self.cache:
+            cached = self.cache.get(url, params)
+            metrics.inc("cache_lookups_total", endpoint=endpoint, result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+
+        data = self._get(url, params, endpoint)
+
+        if self.raw_lake is not None and locations is not None:
+            self._archive(locations, data)
+        if self.cache:
+            self.cache.put(url, params, data, ttl)
+        return data
+
+    def _archive(self, locations: Sequence[Union[int, Sequence[int]]], data: Any):
+        """Append a current-weather payload to the raw lake, one line per location."""
+        responses = data if isinstance(data, list) else [data]
+        if len(responses) != len(locations):
+            return
+        self.raw_lake.append(self.name, [(self.registry.city(index), self.registry.country(index), response)
+                                         for indexes, response in zip(locations, responses)
+                                         for index in (indexes if isinstance(indexes, (list, tuple)) else [indexes])])
+
+    def _get(self, url: str, params: Dict[str, Any], endpoint: str) -> Any:
+        """
+        GET a JSON payload from the network, retrying transient failures.
+
+        Timeouts, connection errors, 5xx and 429 responses are retried up to
+        the retry policy's attempt limit with jittered backoff, waiting at
+        least Retry-After on 429s. Each attempt's timeout is cut to the time
+        left in the run's deadline, and no retry is scheduled past it.
+        Failures other than throttling count towards the endpoint's circuit
+        breaker; while it is open requests fail at once.
+
+        Raises:
+            CircuitOpenError: The endpoint's breaker is open
+            DeadlineExceeded: The run's deadline leaves no time for the request
+            requests.exceptions.RequestException: The last attempt failed
+        """
+        stats, deadline = self.run_stats, self.deadline
+        breaker = self._breaker(endpoint)
+        stats.record("requests", endpoint)
+        for attempt in range(1, self.retry_policy.max_attempts + 1):
+            if deadline.expired():
+                stats.record("deadline_exceeded", endpoint)
+                raise DeadlineExceeded(f"Extraction deadline reached before requesting {endpoint}")
+            if not breaker.allow():
+                stats.record("circuit_open", endpoint)
+                raise CircuitOpenError(f"Circuit breaker for {endpoint} is open")
+
+            metrics.observe("rate_limit_wait_seconds", self.rate_limiter.acquire(), endpoint=endpoint)
+            stats.record("attempts", endpoint)
+            retry_after = None
+            try:
+                with metrics.span("http_request", endpoint=endpoint):
+                    response = self.session.get(url, params=params,
+                                                timeout=min(settings.api_timeout_seconds, deadline.remaining()))
+            except requests.exceptions.Timeout as e:
+                error, event = e, "timeouts"
+            except requests.exceptions.ConnectionError as e:
+                error, event = e, "connection_errors"
+            else:
+                metrics.inc("http_responses_total", endpoint=endpoint, status=response.status_code)
+                if response.status_code != 429 and response.status_code < 500:
+                    # Any other answer shows the endpoint is up; 4xx are not retried
+                    breaker.record_success()
+                    response.raise_for_status()
+                    return response.json()
+                error = requests.exceptions.HTTPError(
+                    f"{response.status_code} response from {endpoint}", response=response)
+                if response.status_code == 429:
+                    event = "throttled"
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                else:
+                    event = "server_errors"
+
+            # Throttling says the endpoint is up, just busy
+            if event == "throttled":
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+            stats.record(event, endpoint)
+            if attempt == self.retry_policy.max_attempts:
+                break
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            if delay >= deadline.remaining():
+                stats.record("deadline_exceeded", endpoint)
+                raise DeadlineExceeded(f"No time left in the extraction deadline to retry {endpoint}") from error
+            stats.record("retries", endpoint)
+            stats.waited(delay, endpoint)
+            logger.warning(f"Retrying {endpoint} request in {delay:.2f}s after attempt {attempt}: {error}")
+            time.sleep(delay)
+
+        stats.record("gave_up", endpoint)
+        raise error
+
+    @contextmanager
+    def _run(self):
+        """Bound the requests made inside the block by one deadline and count their outcomes."""
+        self.deadline = Deadline(self.deadline_seconds)
+        self.run_stats = RetryStats()
+        try:
+            yield self.run_stats
+        finally:
+            self.deadline = Deadline()
+            if self.raw_lake is not None:
+                self.raw_lake.flush()
+            logger.info(f"Extraction run request stats for {self.name}: {self.run_stats.as_dict()}")
+
+    def _slot_start(self, tz: str, now: datetime) -> Optional[datetime]:
+        """Start of the provider update slot containing now, in the local time of tz (None if unknown)."""
+        try:
+            local = now.astimezone(ZoneInfo(tz)).replace(tzinfo=None)
+        except (ZoneInfoNotFoundError, ValueError):
+            return None
+        elapsed = local - local.replace(hour=0, minute=0, second=0, microsecond=0)
+        return local - elapsed % timedelta(seconds=settings.cache_update_interval_seconds)
+
+    def is_fresh(self, index: int, now: Optional[datetime] = None,
+                 slots: Optional[Dict[str, Optional[datetime]]] = None) -> bool:
+        """
+        Whether a reading from the location's current update slot is already loaded.
+
+        Readings are stamped in the location's local time, so the slot is
+        computed there.
+
+        Args:
+            now: Current time, timezone-aware (default: now)
+            slots: Slot starts by timezone, shared across calls to compute each once
+        """
+        if self.freshness is None:
+            return False
+        latest = self.freshness.latest(self.registry.city(index), self.registry.country(index), self.name)
+        if latest is None:
+            return False
+        tz = self.registry.timezone(index)
+        slots = {} if slots is None else slots
+        if tz not in slots:
+            slots[tz] = self._slot_start(tz, now or datetime.now(timezone.utc))
+        return slots[tz] is not None and latest >= slots[tz]
+
+    def _due(self, indexes: List[int]) -> List[int]:
+        """The locations that may have a newer observation than the one already loaded."""
+        if self.freshness is None or not indexes:
+            return indexes
+        now = datetime.now(timezone.utc)
+        slots: Dict[str, Optional[datetime]] = {}
+        due = [index for index in indexes if not self.is_fresh(index, now, slots)]
+        skipped = len(indexes) - len(due)
+        if skipped:
+            metrics.inc("extract_skipped_fresh_total", skipped, provider=self.name)
+            logger.info(f"Skipping {skipped} of {len(indexes)} locations already loaded for this "
+                        f"{self.name} update slot")
+        return due
+
+    def _locate(self, city: str, country: Optional[str] = None) -> Optional[int]:
+        """Registry index of a city, logging an error when it is unknown."""
+        index = self.registry.find(city, country)
+        if index is None:
+            logger.error(f"City {city} not found in location registry")
+        return index
+
+    def _get_country(self, city: str) -> str:
+        """Get country for a city."""
+        index = self.registry.find(city)
+        return self.registry.country(index) if index is not None else "Unknown"
+
+    def get_current_weather(self, city: str, country: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get current weather data for a city.
+
+        Args:
+            city: City name
+            country: Country, to disambiguate cities sharing a name
+
+        Returns:
+            Weather data dictionary or None if error
+        """
+        index = self._locate(city, country)
+        if index is None:
+            return None
+
+        data = self._fetch_current(index)
+        if data is None:
+            return None
+        try:
+            return self.parse_response(city, data, self.registry.country(index))
+        except Exception as e:
+            logger.error(f"Unexpected error for {city}: {e}")
+            return None
+
+    def _fetch_current(self, index: int) -> Optional[Dict[str, Any]]:
+        """Fetch the raw current-weather response for one registry location, or None if error."""
+        city = self.registry.city(index)
+        url, params = self._current_request(index)
+
+        try:
+            logger.info(f"Fetching weather data for {city} from {self.name}")
+            return self._fetch_json(url, params, locations=[index])
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching data for {city} from {self.name}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error for {city} from {self.name}: {e}")
+            return None
+
+    def parse_response(self, city: str, response: Dict[str, Any],
+                       country: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse one API response to the standard format.
+
+        Args:
+            city: City name
+            response: API response
+            country: Country of the city, looked up in the registry if omitted
+
+        Returns:
+            Standardized weather data
+        """
+        return self.parse_responses([city], [response], [country]).row(0)
+
+    def _build_batch(self, cities: List[str], countries: Optional[List[Optional[str]]],
+                     latitudes, longitudes, measurements: Dict[str, np.ndarray], recorded_at) -> WeatherBatch:
+        """
+        Assemble parsed responses into a batch tagged with the provider's name.
+
+        Missing countries are looked up in the registry, and readings without
+        a usable timestamp are stamped with the fetch time.
+        """
+        countries = countries or [None] * len(cities)
+        batch = WeatherBatch.build(
+            cities,
+            [country or self._get_country(city) for city, country in zip(cities, countries)],
+            latitudes, longitudes, measurements, recorded_at, api_source=self.name,
+        )
+        missing = batch.recorded_at == NAT
+        if missing.any():
+            batch.recorded_at[missing] = np.datetime64(datetime.utcnow(), "s").view(np.int64)
+        return batch
+
+    def parse_fetched(self, fetched: Sequence[Tuple[int, Dict[str, Any]]]) -> WeatherBatch:
+        """Parse (registry index, raw response) pairs into one batch."""
+        return self.parse_responses([self.registry.city(index) for index, _ in fetched],
+                                    [data for _, data in fetched],
+                                    [self.registry.country(index) for index, _ in fetched])
+
+    def extract_all_cities(self, max_workers: Optional[int] = None,
+                           locations: Optional[Sequence[int]] = None) -> WeatherBatch:
+        """
+        Extract weather data for all cities.
+
+        Requests run on a bounded thread pool over the shared session; the
+        token bucket keeps the overall request rate within the provider's
+        limits regardless of the number of workers. The responses are parsed
+        together into one batch. All requests share the run's deadline, so
+        cities still unfetched when it runs out are skipped rather than
+        holding the batch past its slot; run_stats holds the retry counts.
+        Locations already loaded for the current update slot (see
+        is_fresh) are not requested.
+
+        Args:
+            max_workers: Override for the number of concurrent requests
+            locations: Registry indexes to extract (default: all locations)
+
+        Returns:
+            Readings in city order, for the cities that returned data
+        """
+        indexes = self._due(list(self.registry) if locations is None else [int(i) for i in locations])
+        workers = min(max(1, max_workers or self.max_workers), len(indexes) or 1)
+
+        with self._run():
+            if workers == 1:
+                results = [self._fetch_current(index) for index in indexes]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(self._fetch_current, indexes))
+
+        weather_data = self.parse_fetched([(index, data) for index, data in zip(indexes, results) if data])
+
+        logger.info(f"Successfully extracted data for {len(weather_data)} cities from {self.name}")
+        return weather_data
+
+    def close(self):
+        """Close the session."""
+        self.session.close()
+        if self.raw_lake is not None:
+            self.raw_lake.flush()
+        if self.cache:
+            logger.info(f"Response cache stats: {self.cache.stats()}")
+            self.cache.close()
+
+
+# Provider classes by name, filled in by register_provider
+PROVIDERS: Dict[str, Type[WeatherAPIBase]] = {}
+
+
+def register_provider(cls: Type[WeatherAPIBase]) -> Type[WeatherAPIBase]:
+    """Class decorator adding a provider to PROVIDERS under its name."""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} has no provider name")
+    PROVIDERS[cls.name] = cls
+    return cls
+
+
+def create_provider(name: str, **kwargs) -> WeatherAPIBase:
+    """Instantiate a registered provider by name."""
+    try:
+        cls = PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown weather provider {name!r}; registered: {sorted(PROVIDERS)}") from None
+    return cls(**kwargs)
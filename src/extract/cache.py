@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+from urllib.parse import urlencode
+from config.config import settings
+
+# Puts between exact entry counts, which catch up with other processes' writes
+_RECOUNT_EVERY = 1000
+
+
+class ResponseCache:
+    """
+    On-disk cache of API responses shared by threads and worker processes.
+
+    Entries live in a SQLite database in WAL mode, keyed by the request URL
+    and its normalized parameters. By default an entry expires at the end of
+    the provider's update slot it was fetched in (Open-Meteo refreshes
+    "current" data every 15 minutes), so reruns inside the same slot are
+    served from disk. The least recently used entries are evicted once the
+    cache holds more than max_entries responses. Each process keeps a
+    running estimate of the entry count and only counts the table when
+    the estimate passes the bound or every _RECOUNT_EVERY puts.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None,
+                 max_entries: Optional[int] = None,
+                 update_interval: Optional[int] = None,
+                 clock: Callable[[], float] = time.time):
+        self.path = Path(path or settings.cache_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries or settings.cache_max_entries
+        self.update_interval = update_interval or settings.cache_update_interval_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        # Every connection opened, so close() reaches other threads' as well
+        self._connections = []
+        self._generation = 0
+        self._entries: Optional[int] = None
+        self._puts = 0
+
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    body TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread and process; SQLite handles locking between them."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid() or self._local.generation != self._generation:
+            # Closed by close() from whichever thread calls it
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._stats_lock:
+                self._connections.append((os.getpid(), conn))
+                self._local.generation = self._generation
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, counter: str):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Stable key for a request, independent of parameter order."""
+        normalized = urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+        return hashlib.sha256(f"{url}?{normalized}".encode()).hexdigest()
+
+    def slot_expiry(self) -> float:
+        """End of the provider update slot containing the current time."""
+        now = self.clock()
+        return (now // self.update_interval + 1) * self.update_interval
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """Return the cached payload for a request, or None if absent or expired."""
+        key = self.key(url, params)
+        now = self.clock()
+        conn = self._connection()
+        row = conn.execute("SELECT body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            self._count("misses")
+            return None
+        conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return json.loads(row[0])
+
+    def put(self, url: str, params: Optional[Dict[str, Any]], payload: Any,
+            ttl: Optional[float] = None):
+        """
+        Store a payload.
+
+        Args:
+            ttl: Seconds to keep the entry; defaults to the end of the current update slot
+        """
+        now = self.clock()
+        expires_at = now + ttl if ttl is not None else self.slot_expiry()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (self.key(url, params), json.dumps(payload), expires_at, now)
+            )
+            # Expired entries go first, then the least recently used beyond the bound
+            evicted = conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+            with self._stats_lock:
+                self._puts += 1
+                # A replaced key is counted as new; the estimate errs high, towards a recount
+                estimate = None if self._entries is None else self._entries + 1 - evicted
+                recount = estimate is None or estimate > self.max_entries or self._puts % _RECOUNT_EVERY == 0
+            if recount:
+                entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                excess = entries - self.max_entries
+                if excess > 0:
+                    evicted += conn.execute("""
+                        DELETE FROM responses WHERE key IN (
+                            SELECT key FROM responses ORDER BY last_access LIMIT ?
+                        )
+                    """, (excess,)).rowcount
+                    entries -= excess
+                estimate = entries
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._stats_lock:
+            self._entries = estimate
+            self.evictions += evicted
+
+    def clear(self):
+        self._connection().execute("DELETE FROM responses")
+        with self._stats_lock:
+            self._entries = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters for this process and the current entry count."""
+        entries = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "entries": entries}
+
+    def close(self):
+        """Close the connections every thread of this process opened."""
+        with self._stats_lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for pid, conn in connections:
+            # A forked child leaves its parent's connections alone
+            if pid == os.getpid():
+                conn.close()
+        self._local.conn = None
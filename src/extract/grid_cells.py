@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from config.config import settings
+from config.spatial import SpatialIndex
+
+# Grid point coordinates are compared at this many decimals (about 10 m)
+PRECISION = 4
+
+Cell = Tuple[float, float]
+# (city_name, country), which names a location the same way in every registry ordering
+Key = Tuple[str, str]
+
+
+class GridCells:
+    """
+    The model grid point each location's current weather is answered from.
+
+    Open-Meteo snaps a requested coordinate to its weather model's grid and
+    returns the grid point's coordinates, so locations that came back with
+    the same coordinates share a cell and get identical readings. The grid
+    differs by model and region, from a few km over North America to
+    0.125 degrees elsewhere, so cells are learned from responses rather than
+    computed. Extractors request one location per known cell and fan its
+    reading out to the others.
+
+    Locations never seen are requested on their own. With snap_km set,
+    one whose nearest known grid point is within snap_km joins that cell
+    instead: on any grid coarser than 2 * snap_km that point is the one
+    it snaps to. The provider prefers land cells near coasts, which can
+    break that rule, so snapping is off by default.
+
+    A location only follows another's reading while its own cell was
+    confirmed within recheck_hours; after that it is requested on its own
+    again, so a cell that changed under a location that is never requested
+    itself is noticed.
+
+    Cells are kept by (city_name, country) in a Parquet file, with the
+    time each was last confirmed. save() merges them into the file's
+    current contents, so shards that extract side by side do not drop each
+    other's cells.
+    """
+
+    COLUMNS = ["city_name", "country", "grid_latitude", "grid_longitude", "checked_at"]
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, snap_km: Optional[float] = None,
+                 recheck_hours: Optional[float] = None):
+        self.path = Path(path or settings.grid_cells_path)
+        self.snap_km = settings.grid_cells_snap_km if snap_km is None else snap_km
+        self.recheck_hours = settings.grid_cells_recheck_hours if recheck_hours is None else recheck_hours
+        self._cells: Optional[Dict[Key, Cell]] = None
+        self._checked: Dict[Key, float] = {}
+        self._grid: Optional[Tuple[SpatialIndex, List[Cell]]] = None
+        self._changed: Dict[Key, Optional[Tuple[Cell, float]]] = {}
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[Key, Tuple[Cell, float]]:
+        if not self.path.exists():
+            return {}
+        frame = pd.read_parquet(self.path)
+        if not set(self.COLUMNS) <= set(frame.columns):
+            # Written before cells were keyed by name; relearned as locations are requested
+            return {}
+        return {(city, country): ((float(lat), float(lon)), float(checked_at))
+                for city, country, lat, lon, checked_at in frame[self.COLUMNS].itertuples(index=False)}
+
+    def _snapshot(self) -> Dict[Key, Cell]:
+        with self._lock:
+            if self._cells is None:
+                stored = self._read()
+                self._cells = {key: cell for key, (cell, _) in stored.items()}
+                self._checked = {key: checked_at for key, (_, checked_at) in stored.items()}
+            return self._cells
+
+    def cell(self, key: Key) -> Optional[Cell]:
+        return self._snapshot().get(tuple(key))
+
+    def _grid_points(self) -> Tuple[SpatialIndex, List[Cell]]:
+        """Spatial index over the distinct known grid points."""
+        cells = self._snapshot()
+        with self._lock:
+            if self._grid is None:
+                points = sorted(set(cells.values()))
+                self._grid = (SpatialIndex([lat for lat, _ in points], [lon for _, lon in points]), points)
+            return self._grid
+
+    def group(self, keys: Sequence[Key], latitudes=None,
+              longitudes=None) -> Tuple[List[int], Dict[int, List[int]]]:
+        """
+        Split locations into the ones to request and the ones sharing their cell.
+
+        Args:
+            keys: (city_name, country) per location, in request order
+            latitudes: Requested latitude per location, to place unknown
+                ones by the nearest grid point when snap_km is set
+            longitudes: Requested longitude per location
+
+        Returns:
+            Positions to request, in order, and for each of them the
+            positions of later locations in the same cell
+        """
+        cells = self._snapshot()
+        requested: List[int] = []
+        shared: Dict[int, List[int]] = {}
+        first_in: Dict[Cell, int] = {}
+        snap = self.snap_km > 0 and latitudes is not None and bool(cells)
+        grid, points = self._grid_points() if snap else (None, [])
+        stale_before = time.time() - self.recheck_hours * 3600
+        for position, key in enumerate(keys):
+            key = tuple(key)
+            cell = cells.get(key)
+            if cell is not None and self._checked.get(key, 0.0) < stale_before:
+                # Requested on its own, which confirms or moves its cell
+                requested.append(position)
+                continue
+            if cell is None and snap:
+                nearest, distance = grid.nearest(latitudes[position], longitudes[position])
+                if distance <= self.snap_km:
+                    cell = points[nearest]
+            if cell is not None and cell in first_in:
+                shared.setdefault(first_in[cell], []).append(position)
+                continue
+            if cell is not None:
+                first_in[cell] = position
+            requested.append(position)
+        return requested, shared
+
+    def learn(self, keys: Sequence[Key], latitudes, longitudes) -> List[Key]:
+        """
+        Record the grid points responses came from.
+
+        Returns:
+            Keys whose known cell changed, e.g. after the provider
+            switched models
+        """
+        cells = self._snapshot()
+        moved = []
+        now = time.time()
+        latitudes = np.round(np.asarray(latitudes, dtype=np.float64), PRECISION)
+        longitudes = np.round(np.asarray(longitudes, dtype=np.float64), PRECISION)
+        with self._lock:
+            for key, lat, lon in zip(keys, latitudes, longitudes):
+                if np.isnan(lat) or np.isnan(lon):
+                    continue
+                key, cell = tuple(key), (float(lat), float(lon))
+                known = cells.get(key)
+                if known != cell:
+                    if known is not None:
+                        moved.append(key)
+                    cells[key] = cell
+                    self._grid = None
+                self._checked[key] = now
+                self._changed[key] = (cell, now)
+        return moved
+
+    def forget(self, keys: Sequence[Key]):
+        """Drop the cells of locations, so they are requested on their own again."""
+        cells = self._snapshot()
+        with self._lock:
+            for key in keys:
+                key = tuple(key)
+                if cells.pop(key, None) is not None:
+                    self._checked.pop(key, None)
+                    self._changed[key] = None
+                    self._grid = None
+
+    def save(self):
+        """Write the cells learned or forgotten since the last save."""
+        with self._lock:
+            changed, self._changed = self._changed, {}
+        if not changed:
+            return
+        cells = self._read()
+        for key, cell in changed.items():
+            if cell is None:
+                cells.pop(key, None)
+            else:
+                cells[key] = cell
+        frame = pd.DataFrame([(city, country, lat, lon, checked_at)
+                              for (city, country), ((lat, lon), checked_at) in sorted(cells.items())],
+                             columns=self.COLUMNS)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Replaced in one step, so a concurrent reader never sees a partial file
+        temporary = self.path.with_name(f".{self.path.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        frame.to_parquet(temporary, index=False)
+        os.replace(temporary, self.path)
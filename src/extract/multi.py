@@ -0,0 +1,223 @@
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+from utils.logger import logger
+from utils.metrics import metrics
+from extract.base import PROVIDERS, WeatherAPIBase, create_provider
+# Imported for their register_provider side effect
+from extract import open_meteo, openweather, weatherapi  # noqa: F401
+from config.config import settings
+from transform.batch import WeatherBatch
+
+HEDGED = "hedged"
+MERGE = "merge"
+
+# Hedge after this many times the primary's typical latency (capped by the hedge delay setting)
+HEDGE_LATENCY_FACTOR = 3
+
+
+class ProviderHealth:
+    """
+    Exponentially weighted success rate and latency of one provider.
+
+    score() ranks providers for hedged requests: the success rate over the
+    typical latency, so slow and failing providers both sink. A provider
+    without history is assumed to answer in a second.
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.success_rate = 1.0
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool, seconds: float):
+        with self._lock:
+            self.requests += 1
+            self.failures += not ok
+            self.success_rate += self.alpha * (ok - self.success_rate)
+            if ok:
+                self.latency = seconds if self.latency is None else self.latency + self.alpha * (seconds - self.latency)
+
+    def score(self) -> float:
+        return self.success_rate / max(1.0 if self.latency is None else self.latency, 1e-3)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "failures": self.failures,
+                "success_rate": round(self.success_rate, 3),
+                "latency_seconds": None if self.latency is None else round(self.latency, 4),
+                "score": round(self.score(), 3)}
+
+
+class MultiProviderExtractor:
+    """
+    Current weather from several providers queried concurrently.
+
+    In hedged mode each location is asked of the healthiest provider first;
+    if no good answer arrives within the hedge delay (or it fails) the next
+    provider is asked as well, and the first good answer wins. Answers that
+    lose the race still update their provider's health. In merge mode every
+    available provider is asked for every location and all readings are
+    kept, each tagged with its provider as api_source.
+
+    Every provider keeps its own token bucket, retries, circuit breakers and
+    run deadline; providers whose breaker is open are asked last (hedged) or
+    skipped (merge). With freshness watermarks, a location whose current
+    update slot is already loaded is skipped: from every provider in hedged
+    mode, from the providers that loaded it in merge mode.
+    """
+
+    def __init__(self, providers: Sequence[WeatherAPIBase], mode: Optional[str] = None,
+                 hedge_delay: Optional[float] = None, max_workers: Optional[int] = None):
+        """
+        Args:
+            providers: Provider instances, in order of preference before any health is known
+            mode: "hedged" or "merge", from settings if omitted
+            hedge_delay: Longest wait before hedging, from settings if omitted
+            max_workers: Locations extracted concurrently
+        """
+        self.providers = list(providers)
+        if not self.providers:
+            raise ValueError("At least one weather provider is required")
+        self.mode = mode or settings.extract_provider_mode
+        if self.mode not in (HEDGED, MERGE):
+            raise ValueError(f"Unknown provider mode {self.mode!r}; expected {HEDGED!r} or {MERGE!r}")
+        self.hedge_delay = settings.provider_hedge_delay_seconds if hedge_delay is None else hedge_delay
+        self.max_workers = max(1, max_workers or settings.extract_max_workers)
+        self.registry = self.providers[0].registry
+        self.health = {provider.name: ProviderHealth() for provider in self.providers}
+
+    @classmethod
+    def from_settings(cls, names: Optional[Sequence[str]] = None, mode: Optional[str] = None,
+                      **kwargs) -> "MultiProviderExtractor":
+        """
+        Build the providers named in settings.extract_providers (or names).
+
+        Providers that need an API key which is not configured are skipped
+        with a warning. Remaining keyword arguments go to every provider.
+        """
+        names = names or [name.strip() for name in settings.extract_providers.split(",") if name.strip()]
+        providers = []
+        for name in names:
+            if name in PROVIDERS and not PROVIDERS[name].configured():
+                logger.warning(f"Skipping weather provider {name}: no API key configured")
+                continue
+            providers.append(create_provider(name, **kwargs))
+        return cls(providers, mode)
+
+    def ranked(self) -> List[WeatherAPIBase]:
+        """Providers in the order hedged requests try them: available first, then by health score."""
+        return sorted(self.providers,
+                      key=lambda provider: (not provider.available(), -self.health[provider.name].score()))
+
+    def _fetch(self, provider: WeatherAPIBase, index: int) -> Optional[Dict[str, Any]]:
+        start = time.perf_counter()
+        data = provider._fetch_current(index)
+        self.health[provider.name].record(bool(data), time.perf_counter() - start)
+        return data
+
+    def _hedge_after(self, provider: WeatherAPIBase) -> float:
+        latency = self.health[provider.name].latency
+        return self.hedge_delay if latency is None else min(self.hedge_delay, HEDGE_LATENCY_FACTOR * latency)
+
+    def _hedged(self, pool: ThreadPoolExecutor,
+                index: int) -> Optional[Tuple[WeatherAPIBase, Dict[str, Any]]]:
+        """First good (provider, response) for a location, or None when every provider failed."""
+        candidates = deque(self.ranked())
+        waiting = {}
+        while candidates or waiting:
+            timeout = None
+            if candidates:
+                provider = candidates.popleft()
+                if waiting:
+                    metrics.inc("provider_hedges_total", provider=provider.name)
+                waiting[pool.submit(self._fetch, provider, index)] = provider
+                timeout = self._hedge_after(provider) if candidates else None
+            done, _ = wait(waiting, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = waiting.pop(future)
+                data = future.result()
+                if data:
+                    return provider, data
+        return None
+
+    def extract_all_cities(self, max_workers: Optional[int] = None,
+                           locations: Optional[Sequence[int]] = None) -> WeatherBatch:
+        """
+        Extract current weather for all cities from the providers.
+
+        Args:
+            max_workers: Override for the number of locations extracted concurrently
+            locations: Registry indexes to extract (default: all locations)
+
+        Returns:
+            Readings in city order; in merge mode one per provider that
+            answered, in provider order
+        """
+        if len(self.providers) == 1:
+            return self.providers[0].extract_all_cities(max_workers, locations)
+
+        indexes = list(self.registry) if locations is None else [int(i) for i in locations]
+        due = {provider.name: set(provider._due(indexes)) for provider in self.providers}
+        if self.mode == HEDGED:
+            # One reading per location and slot is enough, whichever provider gave it
+            indexes = [index for index in indexes if all(index in due[name] for name in due)]
+        workers = min(max(1, max_workers or self.max_workers), len(indexes) or 1)
+        fetched: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {provider.name: [] for provider in self.providers}
+        # Position of each fetched response in the result: city order, then provider order
+        positions: Dict[str, List[int]] = {provider.name: [] for provider in self.providers}
+
+        with ExitStack() as stack:
+            for provider in self.providers:
+                stack.enter_context(provider._run())
+            requests_pool = ThreadPoolExecutor(max_workers=workers * len(self.providers))
+            # Requests that lost a hedge may still be in flight; the run does not wait for them
+            stack.callback(requests_pool.shutdown, wait=False, cancel_futures=True)
+            if self.mode == HEDGED:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    winners = list(pool.map(lambda index: self._hedged(requests_pool, index), indexes))
+                for position, (index, winner) in enumerate(zip(indexes, winners)):
+                    if winner:
+                        fetched[winner[0].name].append((index, winner[1]))
+                        positions[winner[0].name].append(position)
+            else:
+                providers = [provider for provider in self.providers if provider.available()]
+                futures = [(position * len(self.providers) + order, provider, index,
+                            requests_pool.submit(self._fetch, provider, index))
+                           for position, index in enumerate(indexes)
+                           for order, provider in enumerate(providers)
+                           if index in due[provider.name]]
+                for position, provider, index, future in futures:
+                    data = future.result()
+                    if data:
+                        fetched[provider.name].append((index, data))
+                        positions[provider.name].append(position)
+
+        batches, order = [], []
+        for provider in self.providers:
+            if fetched[provider.name]:
+                batches.append(provider.parse_fetched(fetched[provider.name]))
+                order.extend(positions[provider.name])
+                metrics.inc("provider_readings_total", len(fetched[provider.name]), provider=provider.name)
+        weather_data = WeatherBatch.concat(batches)[np.argsort(order, kind="stable")] if batches \
+            else WeatherBatch.empty()
+
+        logger.info(f"Successfully extracted data for {len(weather_data)} readings in {self.mode} mode; "
+                    f"provider stats: {self.stats()}")
+        return weather_data
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Health and last run's request counts per provider."""
+        return {provider.name: {**self.health[provider.name].as_dict(),
+                                "run": provider.run_stats.as_dict()}
+                for provider in self.providers}
+
+    def close(self):
+        for provider in self.providers:
+            provider.close()
@@ -1,150 +1,359 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Tuple
+from urllib.parse import urlencode
 import requests
-from datetime import datetime
-from typing import Dict, List, Any, Optional
-import time
 from utils.logger import logger
+from extract.base import WeatherAPIBase, register_provider
+from extract.grid_cells import GridCells
 from config.config import settings
+from utils.metrics import metrics
+from transform.batch import WeatherBatch
+from transform.measurements import OPEN_METEO_VARIABLES, transform
 
-class OpenMeteoExtractor:
-    """Extract weather data from Open-Meteo API."""
+@register_provider
+class OpenMeteoExtractor(WeatherAPIBase):
+    """
+    Extract weather data from Open-Meteo API.
+
+    Locations known to share a model grid cell (see GridCells) are
+    requested once per run, and the cell's reading is fanned out to all
+    of them.
+    """
     
+    name = "open_meteo"
     BASE_URL = "https://api.open-meteo.com/v1/forecast"
+    ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+    
+    def __init__(self, base_url: Optional[str] = None,
+                 archive_url: Optional[str] = None,
+                 grid_cells: Optional[GridCells] = None,
+                 **kwargs):
+        """
+        Initialize the Open-Meteo extractor.
+        
+        Args:
+            base_url: Override for the forecast endpoint (used by tests)
+            archive_url: Override for the historical archive endpoint
+            grid_cells: Learned grid cells, built from settings if omitted and enabled
+            **kwargs: rate_limiter, max_workers, cache, registry, retry_policy,
+                circuit_breakers and deadline_seconds, see WeatherAPIBase
+        """
+        super().__init__(base_url=base_url, **kwargs)
+        self.archive_url = archive_url or self.ARCHIVE_URL
+        self.grid_cells = grid_cells or (GridCells() if settings.grid_cells_enabled else None)
+    
+    def _endpoint(self, url: str) -> str:
+        return "archive" if url == self.archive_url else "forecast"
+    
+    def _current_request(self, index: int) -> Tuple[str, Dict[str, Any]]:
+        return self.base_url, {
+            "latitude": self.registry.latitudes[index],
+            "longitude": self.registry.longitudes[index],
+            "current": ",".join(OPEN_METEO_VARIABLES),
+            "temperature_unit": "celsius",
+            "timezone": self.registry.timezone(index)
+        }
     
-    # City coordinates (since Open-Meteo uses lat/lon)
-    CITY_COORDINATES = {
-        "Bellevue": {"lat": 47.6101, "lon": -122.2015, "timezone": "America/Los_Angeles"},
-        "Ames": {"lat": 42.0308, "lon": -93.6319, "timezone": "America/Chicago"},
-        "Hyderabad": {"lat": 17.3850, "lon": 78.4867, "timezone": "Asia/Kolkata"},
-        "Berlin": {"lat": 52.5200, "lon": 13.4050, "timezone": "Europe/Berlin"},
-        "Sydney": {"lat": -33.8688, "lon": 151.2093, "timezone": "Australia/Sydney"},
-        "Delhi": {"lat": 28.7041, "lon": 77.1025, "timezone": "Asia/Kolkata"},
-        "Cape Town": {"lat": -33.9249, "lon": 18.4241, "timezone": "Africa/Johannesburg"},
-        "Rio de Janeiro": {"lat": -22.9068, "lon": -43.1729, "timezone": "America/Sao_Paulo"},
-        "London": {"lat": 51.5074, "lon": -0.1278, "timezone": "Europe/London"},
-        "Jakarta": {"lat": -6.2088, "lon": 106.8456, "timezone": "Asia/Jakarta"}
-    }
+    def _batch_params(self, indexes: List[int]) -> Dict[str, Any]:
+        """Build request parameters packing several registry locations into one call."""
+        return {
+            "latitude": ",".join(str(self.registry.latitudes[i]) for i in indexes),
+            "longitude": ",".join(str(self.registry.longitudes[i]) for i in indexes),
+            "current": ",".join(OPEN_METEO_VARIABLES),
+            "temperature_unit": "celsius",
+            "timezone": ",".join(self.registry.timezone(i) for i in indexes)
+        }
+    
+    def chunk_cities(self, cities: List[str], batch_size: Optional[int] = None,
+                     max_url_length: Optional[int] = None) -> List[List[str]]:
+        """
+        Split cities into request batches.
+        
+        A batch is closed when it reaches batch_size locations or when adding
+        the next location would push the request URL past max_url_length.
+        
+        Args:
+            cities: City names
+            batch_size: Maximum locations per request
+            max_url_length: Maximum length of the encoded request URL
+            
+        Returns:
+            List of city batches
+        """
+        batch_size = max(1, batch_size or settings.api_batch_size)
+        max_url_length = max_url_length or settings.api_max_url_length
+        
+        indexes = [index for index in (self.registry.find(city) for city in cities) if index is not None]
+        return [[self.registry.city(i) for i in batch]
+                for batch in self._chunk_indexes(indexes, batch_size, max_url_length)]
+    
+    def _chunk_indexes(self, indexes: List[int], batch_size: int,
+                       max_url_length: int) -> List[List[int]]:
+        """Split registry indexes into request batches (see chunk_cities)."""
+        # URL length grows by each location's own values plus an encoded comma
+        # ("%2C") in each of the three list parameters, so it is tracked
+        # incrementally instead of re-encoding the whole candidate batch
+        empty_length = len(urlencode(self._batch_params([])))
+        base_length = len(self.base_url) + 1 + empty_length
+        batches = []
+        current = []
+        url_length = base_length
+        for index in indexes:
+            added = len(urlencode(self._batch_params([index]))) - empty_length
+            separators = 9 if current else 0
+            if current and (len(current) >= batch_size or
+                            url_length + separators + added > max_url_length):
+                batches.append(current)
+                current = []
+                url_length = base_length
+                separators = 0
+            current.append(index)
+            url_length += separators + added
+        if current:
+            batches.append(current)
+        return batches
+    
+    def get_current_weather_batch(self, cities: List[str]) -> WeatherBatch:
+        """
+        Get current weather for several cities in a single request.
+        
+        Args:
+            cities: City names
+            
+        Returns:
+            Readings for the cities, empty if the request failed
+        """
+        indexes = [index for index in (self._locate(city) for city in cities) if index is not None]
+        return self._fetch_batch(indexes)
+    
+    def _cell_keys(self, indexes: List[int]) -> List[Tuple[str, str]]:
+        """(city_name, country) of registry locations, which grid cells are kept by."""
+        return [(self.registry.city(index), self.registry.country(index)) for index in indexes]
+
+    def _share_cells(self, indexes: List[int]) -> Tuple[List[int], Dict[int, List[int]]]:
+        """
+        Drop locations whose grid cell is requested for another one.
+
+        Returns:
+            Indexes to request, and the indexes sharing each one's cell
+        """
+        if self.grid_cells is None or not indexes:
+            return indexes, {}
+        requested, shared = self.grid_cells.group(self._cell_keys(indexes),
+                                                  self.registry.latitudes[indexes],
+                                                  self.registry.longitudes[indexes])
+        sharing = sum(len(members) for members in shared.values())
+        if sharing:
+            metrics.inc("extract_shared_cell_total", sharing, provider=self.name)
+            logger.info(f"Requesting {len(requested)} grid cells for {len(indexes)} locations")
+        return ([indexes[position] for position in requested],
+                {indexes[position]: [indexes[member] for member in members]
+                 for position, members in shared.items()})
+
+    def _learn_cells(self, indexes: List[int], results: List[Dict[str, Any]],
+                     shared: Dict[int, List[int]]):
+        """Record the grid points of requested locations; cells that moved are no longer shared."""
+        keys = self._cell_keys(indexes)
+        moved = set(self.grid_cells.learn(keys,
+                                          [result.get("latitude") for result in results],
+                                          [result.get("longitude") for result in results]))
+        for index, key in zip(indexes, keys):
+            if key in moved and shared.get(index):
+                self.grid_cells.forget(self._cell_keys(shared[index]))
+
+    def _fetch_batch(self, indexes: List[int],
+                     shared: Optional[Dict[int, List[int]]] = None) -> WeatherBatch:
+        """
+        Fetch and parse current weather for a batch of registry locations.
+
+        Args:
+            indexes: Registry indexes to request
+            shared: Indexes sharing the grid cell of a requested one, which
+                get a copy of its reading
+        """
+        if not indexes:
+            return WeatherBatch.empty()
+        shared = shared or {}
+        groups = [[index] + shared.get(index, []) for index in indexes]
+        
+        try:
+            logger.info(f"Fetching weather data for {len(indexes)} cities in one request")
+            data = self._fetch_json(self.base_url, self._batch_params(indexes), locations=groups)
+            # A single location comes back as an object, several as an array
+            results = data if isinstance(data, list) else [data]
+            if len(results) != len(indexes):
+                logger.error(f"Expected {len(indexes)} results, got {len(results)}")
+                return WeatherBatch.empty()
+            if self.grid_cells is not None:
+                self._learn_cells(indexes, results, shared)
+            
+            fanned = [(index, result) for group, result in zip(groups, results) for index in group]
+            return self.parse_fetched(fanned)
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching batch of {len(indexes)} cities: {e}")
+            return WeatherBatch.empty()
+        except Exception as e:
+            logger.error(f"Unexpected error for batch of {len(indexes)} cities: {e}")
+            return WeatherBatch.empty()
     
-    def __init__(self):
-        """Initialize the Open-Meteo extractor."""
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Weather-ETL-Project/1.0'
-        })
+    def parse_responses(self, cities: List[str], responses: List[Dict[str, Any]],
+                        countries: Optional[List[Optional[str]]] = None) -> WeatherBatch:
+        """
+        Parse several Open-Meteo "current" responses in one vectorized pass.
+        
+        The measurement variables of all responses are gathered into arrays
+        and converted together by transform.measurements.
+        
+        Args:
+            cities: City name of each response
+            responses: API responses
+            countries: Country of each city, looked up in the registry if omitted
+            
+        Returns:
+            One reading per response
+        """
+        currents = [response.get("current") or {} for response in responses]
+        raw = {name: [current.get(name) for current in currents] for name in OPEN_METEO_VARIABLES}
+        units = responses[0].get("current_units") if responses else None
+        return self._build_batch(
+            cities, countries,
+            [response.get("latitude") for response in responses],
+            [response.get("longitude") for response in responses],
+            transform(raw, units, length=len(responses)),
+            [current.get("time") for current in currents],
+        )
     
-    def get_current_weather(self, city: str) -> Optional[Dict[str, Any]]:
+    def get_hourly_history(self, city: str, start_date: date,
+                           end_date: date) -> Optional[WeatherBatch]:
         """
-        Get current weather data for a city.
+        Get hourly historical weather for a city and date range.
         
         Args:
             city: City name
+            start_date: First day (inclusive)
+            end_date: Last day (inclusive)
             
         Returns:
-            Weather data dictionary or None if error
+            Batch from parse_hourly_response, or None if error
         """
-        if city not in self.CITY_COORDINATES:
-            logger.error(f"City {city} not found in coordinates mapping")
+        index = self._locate(city)
+        if index is None:
             return None
         
-        coords = self.CITY_COORDINATES[city]
-        
         params = {
-            "latitude": coords["lat"],
-            "longitude": coords["lon"],
-            "current": "temperature_2m",  # Only temperature as requested
+            "latitude": self.registry.latitudes[index],
+            "longitude": self.registry.longitudes[index],
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "hourly": ",".join(OPEN_METEO_VARIABLES),
             "temperature_unit": "celsius",
-            "timezone": coords["timezone"]
+            "timezone": self.registry.timezone(index)
         }
         
         try:
-            logger.info(f"Fetching weather data for {city}")
-            response = self.session.get(self.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
+            logger.info(f"Fetching hourly history for {city} {start_date} to {end_date}")
+            # Archived days do not change, so they can stay cached much longer
+            data = self._fetch_json(self.archive_url, params, ttl=settings.cache_archive_ttl_seconds)
             
-            data = response.json()
-            
-            # Parse the response
-            return self.parse_response(city, data)
+            return self.parse_hourly_response(city, data, self.registry.country(index))
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching data for {city}: {e}")
+            logger.error(f"Error fetching history for {city}: {e}")
             return None
         except Exception as e:
-            logger.error(f"Unexpected error for {city}: {e}")
+            logger.error(f"Unexpected error for {city} history: {e}")
             return None
     
-    def parse_response(self, city: str, response: Dict[str, Any]) -> Dict[str, Any]:
+    def parse_hourly_response(self, city: str, response: Dict[str, Any],
+                              country: Optional[str] = None) -> WeatherBatch:
         """
-        Parse Open-Meteo API response.
+        Parse an hourly Open-Meteo response into a columnar batch.
+        
+        The time and value arrays are converted as whole NumPy arrays rather
+        than one dict per hour.
         
         Args:
             city: City name
-            response: API response
+            response: API response with an "hourly" block
+            country: Country of the city, looked up in the registry if omitted
             
         Returns:
-            Standardized weather data
+            WeatherBatch with one row per hour
         """
-        current = response.get("current", {})
-        
-        # Extract timestamp and convert to datetime
-        timestamp_str = current.get("time", "")
-        try:
-            recorded_at = datetime.fromisoformat(timestamp_str)
-        except:
-            recorded_at = datetime.utcnow()
+        hourly = response.get("hourly", {})
+        times = hourly.get("time", [])
+        return WeatherBatch.build(
+            city,
+            country or self._get_country(city),
+            response.get("latitude"),
+            response.get("longitude"),
+            transform(hourly, response.get("hourly_units"), length=len(times)),
+            times,
+            api_source=self.name,
+        )
+    
+    def iter_city_batches(self, batch_size: Optional[int] = None,
+                          max_url_length: Optional[int] = None,
+                          max_workers: Optional[int] = None,
+                          locations: Optional[Sequence[int]] = None) -> Iterator[WeatherBatch]:
+        """
+        Extract weather data for all cities, yielding one request batch at a time.
         
-        # Get temperature in Celsius
-        temp_celsius = current.get("temperature_2m", None)
+        Up to max_workers requests are in flight at once; batches are yielded
+        in city order as soon as they complete, so callers can stream them
+        onward without holding the whole run in memory. The batches share
+        one deadline, and already loaded locations are skipped, as in
+        extract_all_cities. Locations sharing a known grid cell are
+        requested once and their readings follow that request's.
         
-        # Calculate Fahrenheit
-        temp_fahrenheit = (temp_celsius * 9/5) + 32 if temp_celsius is not None else None
+        Args:
+            batch_size: Maximum locations per request
+            max_url_length: Maximum length of the encoded request URL
+            max_workers: Override for the number of concurrent requests
+            locations: Registry indexes to extract (default: all locations)
+            
+        Yields:
+            One WeatherBatch per request
+        """
+        indexes = self._due(list(self.registry) if locations is None else [int(i) for i in locations])
+        indexes, shared = self._share_cells(indexes)
+        batches = self._chunk_indexes(indexes,
+                                      max(1, batch_size or settings.api_batch_size),
+                                      max_url_length or settings.api_max_url_length)
+        workers = min(max(1, max_workers or self.max_workers), len(batches) or 1)
         
-        return {
-            "city": city,
-            "country": self._get_country(city),
-            "latitude": response.get("latitude"),
-            "longitude": response.get("longitude"),
-            "temperature_celsius": round(temp_celsius, 2) if temp_celsius else None,
-            "temperature_fahrenheit": round(temp_fahrenheit, 2) if temp_fahrenheit else None,
-            "recorded_at": recorded_at,
-            "api_source": "open_meteo"
-        }
+        with self._run(), ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for batch in batches:
+                pending.append(pool.submit(self._fetch_batch, batch, shared))
+                if len(pending) >= workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        if self.grid_cells is not None:
+            self.grid_cells.save()
     
-    def _get_country(self, city: str) -> str:
-        """Get country for a city."""
-        city_country_map = {
-            "Bellevue": "USA",
-            "Ames": "USA",
-            "Hyderabad": "India",
-            "Berlin": "Germany",
-            "Sydney": "Australia",
-            "Delhi": "India",
-            "Cape Town": "South Africa",
-            "Rio de Janeiro": "Brazil",
-            "London": "UK",
-            "Jakarta": "Indonesia"
-        }
-        return city_country_map.get(city, "Unknown")
-    
-    def extract_all_cities(self) -> List[Dict[str, Any]]:
+    def extract_all_cities_batched(self, batch_size: Optional[int] = None,
+                                   max_url_length: Optional[int] = None,
+                                   max_workers: Optional[int] = None) -> WeatherBatch:
         """
-        Extract weather data for all cities.
+        Extract weather data for all cities using multi-location requests.
         
+        Args:
+            batch_size: Maximum locations per request
+            max_url_length: Maximum length of the encoded request URL
+            max_workers: Override for the number of concurrent requests
+            
         Returns:
-            List of weather data dictionaries
+            Readings in city order
         """
-        weather_data = []
-        
-        for city in self.CITY_COORDINATES.keys():
-            data = self.get_current_weather(city)
-            if data:
-                weather_data.append(data)
-            
-            # Be nice to the API - add a small delay between requests
-            time.sleep(0.5)
+        batches = list(self.iter_city_batches(batch_size, max_url_length, max_workers))
+        weather_data = WeatherBatch.concat(batches)
+        requests_made = len(batches)
         
-        logger.info(f"Successfully extracted data for {len(weather_data)} cities")
+        logger.info(f"Successfully extracted data for {len(weather_data)} cities "
+                    f"in {requests_made} requests")
         return weather_data
-    
-    def close(self):
-        """Close the session."""
-        self.session.close()
\ No newline at end of file
@@ -0,0 +1,80 @@
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
+from utils.rate_limiter import TokenBucket
+from extract.base import WeatherAPIBase, register_provider
+from config.config import settings
+from transform.batch import NAT, WeatherBatch
+from transform.measurements import transform
+
+# OpenWeather condition ids -> nearest WMO weather code, by exact id then by group (id // 100)
+_OWM_CODES = {500: 61, 501: 63, 502: 65, 503: 65, 504: 65, 511: 66,
+              601: 73, 602: 75, 701: 45, 741: 45,
+              800: 0, 801: 1, 802: 2, 803: 3, 804: 3}
+_OWM_GROUPS = {2: 95, 3: 53, 5: 80, 6: 71}
+
+
+def owm_to_wmo(condition_id: Optional[int]) -> Optional[int]:
+    """WMO weather code closest to an OpenWeather condition id (None when there is none)."""
+    if condition_id is None:
+        return None
+    return _OWM_CODES.get(condition_id, _OWM_GROUPS.get(condition_id // 100))
+
+
+@register_provider
+class OpenWeatherExtractor(WeatherAPIBase):
+    """Extract current weather from the OpenWeather current weather API."""
+
+    name = "openweather"
+    BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
+    API_KEY_SETTING = "openweather_api_key"
+
+    @classmethod
+    def default_rate_limiter(cls) -> TokenBucket:
+        return TokenBucket(settings.openweather_rate_limit_per_second)
+
+    def _current_request(self, index: int) -> Tuple[str, Dict[str, Any]]:
+        return self.base_url, {
+            "lat": self.registry.latitudes[index],
+            "lon": self.registry.longitudes[index],
+            "units": "metric",
+            "appid": self.api_key,
+        }
+
+    def parse_responses(self, cities: List[str], responses: List[Dict[str, Any]],
+                        countries: Optional[List[Optional[str]]] = None) -> WeatherBatch:
+        """
+        Parse OpenWeather responses into Open-Meteo variables and transform them together.
+
+        Rain and snow are only reported when they fell, so missing amounts
+        count as zero; OpenWeather has no UV index. Timestamps are shifted by
+        the response's UTC offset to local time, like Open-Meteo's.
+        """
+        main = [response.get("main") or {} for response in responses]
+        wind = [response.get("wind") or {} for response in responses]
+        rain = [(response.get("rain") or {}).get("1h", 0.0) for response in responses]
+        snow = [(response.get("snow") or {}).get("1h", 0.0) for response in responses]
+        raw = {
+            "temperature_2m": [m.get("temp") for m in main],
+            "relative_humidity_2m": [m.get("humidity") for m in main],
+            "pressure_msl": [m.get("sea_level", m.get("pressure")) for m in main],
+            "wind_speed_10m": [w.get("speed") for w in wind],
+            "wind_direction_10m": [w.get("deg") for w in wind],
+            "wind_gusts_10m": [w.get("gust") for w in wind],
+            "visibility": [response.get("visibility") for response in responses],
+            "cloud_cover": [(response.get("clouds") or {}).get("all") for response in responses],
+            "precipitation": np.add(rain, snow),
+            "snowfall": snow,
+            "weather_code": [owm_to_wmo(((response.get("weather") or [{}])[0]).get("id"))
+                             for response in responses],
+        }
+        units = {"wind_speed_10m": "m/s", "wind_gusts_10m": "m/s", "precipitation": "mm", "snowfall": "mm"}
+        recorded_at = np.array([response["dt"] + response.get("timezone", 0) if response.get("dt") else NAT
+                                for response in responses], dtype=np.int64)
+        coords = [response.get("coord") or {} for response in responses]
+        return self._build_batch(
+            cities, countries,
+            [coord.get("lat") for coord in coords],
+            [coord.get("lon") for coord in coords],
+            transform(raw, units, length=len(responses)),
+            recorded_at,
+        )
@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import pyarrow as pa
+from config.config import settings
+
+SEGMENT_SUFFIX = ".ndjson.zst"
+INDEX_SUFFIX = ".idx"
+
+
+def _timestamp(moment: datetime) -> str:
+    """Fixed-width UTC timestamp, so stored values compare as strings."""
+    return moment.isoformat(timespec="microseconds")
+
+
+class RawResponseLake:
+    """
+    Append-only store of raw provider responses, for replays without the network.
+
+    Every response is one NDJSON line, {"fetched_at", "city", "country",
+    "response"}, in segments partitioned by provider, UTC fetch date and
+    hour:
+
+        {root}/{provider}/dt=2025-08-03/14-{writer}.ndjson.zst
+
+    Lines are buffered and written in blocks of block_records, each an
+    independent zstd frame. The sidecar {writer}.idx holds one JSON line
+    per frame with its offset, compressed and raw size, record count and
+    fetch-time range, so a replay decompresses only the frames inside its
+    window. Each writer (process) appends to its own segments, so shard
+    tasks and daemons archive side by side without locking.
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None, block_records: Optional[int] = None,
+                 level: Optional[int] = None):
+        self.root = Path(root or settings.raw_lake_dir)
+        self.block_records = block_records or settings.raw_lake_block_records
+        self.codec = pa.Codec("zstd", compression_level=level or settings.raw_lake_zstd_level)
+        self.writer = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._buffers: Dict[Path, List[Tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def segment_path(self, provider: str, fetched_at: datetime) -> Path:
+        return self.root / provider / f"dt={fetched_at:%Y-%m-%d}" / f"{fetched_at:%H}-{self.writer}{SEGMENT_SUFFIX}"
+
+    def append(self, provider: str, responses: Sequence[Tuple[str, Optional[str], Any]],
+               fetched_at: Optional[datetime] = None):
+        """
+        Buffer raw responses fetched together.
+
+        Args:
+            provider: Provider name (api_source)
+            responses: (city, country, response payload) per location
+            fetched_at: UTC fetch time (default: now)
+        """
+        fetched_at = fetched_at or datetime.utcnow()
+        stamp = _timestamp(fetched_at)
+        lines = [(stamp, json.dumps({"fetched_at": stamp, "city": city, "country": country,
+                                     "response": response}, separators=(",", ":")))
+                 for city, country, response in responses]
+        path = self.segment_path(provider, fetched_at)
+        with self._lock:
+            buffer = self._buffers.setdefault(path, [])
+            buffer.extend(lines)
+            if len(buffer) >= self.block_records:
+                self._write_block(path, self._buffers.pop(path))
+
+    def flush(self):
+        """Write every buffered response."""
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+            for path, lines in buffers.items():
+                self._write_block(path, lines)
+
+    def _write_block(self, path: Path, lines: List[Tuple[str, str]]):
+        if not lines:
+            return
+        raw = ("\n".join(line for _, line in lines) + "\n").encode()
+        frame = self.codec.compress(raw, asbytes=True)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("ab") as segment:
+            offset = segment.tell()
+            segment.write(frame)
+        stamps = [stamp for stamp, _ in lines]
+        entry = {"offset": offset, "length": len(frame), "raw_length": len(raw), "records": len(lines),
+                 "first": min(stamps), "last": max(stamps)}
+        # Written after the frame: a crash between the two leaves bytes no index entry points to
+        with path.with_name(path.name[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX).open("a") as index:
+            index.write(json.dumps(entry) + "\n")
+
+    def segments(self, start: datetime, end: datetime,
+                 providers: Optional[Sequence[str]] = None) -> List[Path]:
+        """Segments that may hold responses fetched in [start, end), oldest first."""
+        found = []
+        provider_dirs = [self.root / name for name in providers] if providers \
+            else sorted(path for path in self.root.glob("*") if path.is_dir())
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day < end:
+            for provider_dir in provider_dirs:
+                for path in sorted((provider_dir / f"dt={day:%Y-%m-%d}").glob(f"*{SEGMENT_SUFFIX}")):
+                    hour = day + timedelta(hours=int(path.name[:2]))
+                    if hour + timedelta(hours=1) > start and hour < end:
+                        found.append(path)
+            day += timedelta(days=1)
+        return found
+
+    def read(self, segment: Path, start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Responses of a segment fetched in [start, end), in write order.
+
+        Only the frames whose fetch-time range overlaps the window are read.
+        """
+        low = _timestamp(start) if start else None
+        high = _timestamp(end) if end else None
+        index = segment.with_name(segment.name[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX)
+        entries = [json.loads(line) for line in index.read_text().splitlines() if line]
+        with segment.open("rb") as source:
+            for entry in entries:
+                if (high and entry["first"] >= high) or (low and entry["last"] < low):
+                    continue
+                source.seek(entry["offset"])
+                raw = self.codec.decompress(source.read(entry["length"]),
+                                            decompressed_size=entry["raw_length"], asbytes=True)
+                for line in raw.splitlines():
+                    record = json.loads(line)
+                    if (low and record["fetched_at"] < low) or (high and record["fetched_at"] >= high):
+                        continue
+                    yield record
+
+    @staticmethod
+    def provider_of(segment: Path) -> str:
+        return segment.parent.parent.name
@@ -0,0 +1,169 @@
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+import requests
+from utils.metrics import metrics
+from config.config import settings
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Request refused because the endpoint's circuit breaker is open."""
+
+
+class DeadlineExceeded(requests.exceptions.RequestException):
+    """Request refused because the run's deadline budget is spent."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Attempt n waits a uniform random delay in [0, min(max_delay,
+    base_delay * 2**(n-1))], so workers retrying after the same failure
+    spread out instead of hitting the endpoint together. A Retry-After from
+    the server takes precedence, plus up to base_delay of jitter.
+    """
+
+    def __init__(self, max_attempts: Optional[int] = None,
+                 base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None,
+                 rng: Optional[random.Random] = None):
+        """
+        Args:
+            max_attempts: Attempts per request, including the first
+            base_delay: Backoff ceiling of the first retry in seconds
+            max_delay: Largest backoff ceiling in seconds
+            rng: Random source for the jitter
+        """
+        self.max_attempts = max(1, max_attempts or settings.api_retry_max_attempts)
+        self.base_delay = settings.api_retry_base_delay_seconds if base_delay is None else base_delay
+        self.max_delay = settings.api_retry_max_delay_seconds if max_delay is None else max_delay
+        self._random = rng or random.Random()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait after failed attempt number attempt (1-based)."""
+        if retry_after is not None:
+            return retry_after + self._random.uniform(0, self.base_delay)
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return self._random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    After failure_threshold consecutive failures the breaker opens and
+    requests are refused without touching the network. Once reset_seconds
+    have passed a single probe request is let through (half-open): success
+    closes the breaker, failure opens it again for another reset_seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 reset_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold or settings.api_circuit_failure_threshold)
+        self.reset_seconds = settings.api_circuit_reset_seconds if reset_seconds is None else reset_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        with self._lock:
+            if self.state == self.OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    metrics.inc("circuit_breaker_opened_total", endpoint=self.name)
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+                self._probing = False
+
+
+class Deadline:
+    """Time budget shared by every request of one extraction run (None for unbounded)."""
+
+    def __init__(self, seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.expires_at = math.inf if seconds is None else clock() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class RetryStats:
+    """Thread-safe counts of request outcomes for one extraction run."""
+
+    EVENTS = ("requests", "attempts", "retries", "throttled", "server_errors", "timeouts",
+              "connection_errors", "circuit_open", "deadline_exceeded", "gave_up")
+
+    def __init__(self):
+        self._counts = dict.fromkeys(self.EVENTS, 0)
+        self.retry_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, event: str, endpoint: str):
+        with self._lock:
+            self._counts[event] += 1
+        metrics.inc("http_request_events_total", endpoint=endpoint, event=event)
+
+    def waited(self, seconds: float, endpoint: str):
+        with self._lock:
+            self.retry_wait_seconds += seconds
+        metrics.observe("retry_wait_seconds", seconds, endpoint=endpoint)
+
+    def __getitem__(self, event: str) -> int:
+        return self._counts[event]
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {**self._counts, "retry_wait_seconds": round(self.retry_wait_seconds, 3)}
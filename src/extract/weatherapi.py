@@ -0,0 +1,68 @@
+from typing import Dict, List, Any, Optional, Tuple
+from utils.rate_limiter import TokenBucket
+from extract.base import WeatherAPIBase, register_provider
+from config.config import settings
+from transform.batch import WeatherBatch
+from transform.measurements import transform
+
+# WeatherAPI.com condition codes -> nearest WMO weather code
+_WEATHERAPI_CODES = {
+    1000: 0, 1003: 2, 1006: 3, 1009: 3, 1030: 45, 1135: 45, 1147: 48,
+    1063: 61, 1066: 71, 1069: 66, 1072: 56, 1087: 95, 1114: 75, 1117: 75,
+    1150: 51, 1153: 53, 1168: 56, 1171: 57,
+    1180: 61, 1183: 61, 1186: 63, 1189: 63, 1192: 65, 1195: 65, 1198: 66, 1201: 67,
+    1204: 66, 1207: 67, 1210: 71, 1213: 71, 1216: 73, 1219: 73, 1222: 75, 1225: 75, 1237: 77,
+    1240: 80, 1243: 81, 1246: 82, 1249: 66, 1252: 67, 1255: 85, 1258: 86, 1261: 77, 1264: 77,
+    1273: 95, 1276: 99, 1279: 95, 1282: 99,
+}
+
+
+@register_provider
+class WeatherAPIExtractor(WeatherAPIBase):
+    """Extract current weather from the WeatherAPI.com current endpoint."""
+
+    name = "weatherapi"
+    BASE_URL = "https://api.weatherapi.com/v1/current.json"
+    API_KEY_SETTING = "weatherapi_key"
+
+    @classmethod
+    def default_rate_limiter(cls) -> TokenBucket:
+        return TokenBucket(settings.weatherapi_rate_limit_per_second)
+
+    def _current_request(self, index: int) -> Tuple[str, Dict[str, Any]]:
+        return self.base_url, {
+            "key": self.api_key,
+            "q": f"{self.registry.latitudes[index]},{self.registry.longitudes[index]}",
+            "aqi": "no",
+        }
+
+    def parse_responses(self, cities: List[str], responses: List[Dict[str, Any]],
+                        countries: Optional[List[Optional[str]]] = None) -> WeatherBatch:
+        """
+        Parse WeatherAPI.com responses into Open-Meteo variables and transform them together.
+
+        The current endpoint reports no snowfall; last_updated is already
+        in the location's local time.
+        """
+        currents = [response.get("current") or {} for response in responses]
+        locations = [response.get("location") or {} for response in responses]
+        raw = {
+            "temperature_2m": [c.get("temp_c") for c in currents],
+            "relative_humidity_2m": [c.get("humidity") for c in currents],
+            "pressure_msl": [c.get("pressure_mb") for c in currents],
+            "wind_speed_10m": [c.get("wind_kph") for c in currents],
+            "wind_direction_10m": [c.get("wind_degree") for c in currents],
+            "wind_gusts_10m": [c.get("gust_kph") for c in currents],
+            "visibility": [None if c.get("vis_km") is None else c["vis_km"] * 1000 for c in currents],
+            "cloud_cover": [c.get("cloud") for c in currents],
+            "precipitation": [c.get("precip_mm") for c in currents],
+            "uv_index": [c.get("uv") for c in currents],
+            "weather_code": [_WEATHERAPI_CODES.get((c.get("condition") or {}).get("code")) for c in currents],
+        }
+        return self._build_batch(
+            cities, countries,
+            [location.get("lat") for location in locations],
+            [location.get("lon") for location in locations],
+            transform(raw, {"precipitation": "mm"}, length=len(responses)),
+            [c.get("last_updated") for c in currents],
+        )
@@ -0,0 +1,221 @@
+import io
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from utils.logger import logger
+from utils.database import db, DatabaseConnection
+from utils.metrics import metrics
+from config.config import settings
+from load.partitions import add_months, month_start
+from load.watermark import LoadWatermark, watermark
+from transform.measurements import DECIMAL_COLUMNS, INTEGER_COLUMNS
+
+# Columns of v_weather_data, which the cold tier answers alongside the fact table
+VIEW_COLUMNS = ["city_name", "country", "full_date", "time", "time_of_day", "weather_condition",
+                "temperature_celsius", "temperature_fahrenheit", "humidity_percent", "pressure_hpa",
+                "wind_speed_mps", "visibility_meters", "recorded_at"]
+
+# Every fact column, so archived rows can be reloaded as they were, then the view's dimension columns
+ARCHIVE_SCHEMA = pa.schema([
+    ("measurement_id", pa.int32()),
+    ("location_id", pa.int32()),
+    ("date_id", pa.int32()),
+    ("time_id", pa.int32()),
+    ("condition_id", pa.int32()),
+    *((name, pa.decimal128(precision, scale)) for name, (precision, scale) in DECIMAL_COLUMNS.items()),
+    *((name, pa.int32()) for name in INTEGER_COLUMNS),
+    ("api_source", pa.string()),
+    ("recorded_at", pa.timestamp("us")),
+    ("inserted_at", pa.timestamp("us")),
+    ("city_name", pa.string()),
+    ("country", pa.string()),
+    ("full_date", pa.date32()),
+    ("time", pa.string()),
+    ("time_of_day", pa.string()),
+    ("weather_condition", pa.string()),
+])
+
+_FACT_COLUMNS = ARCHIVE_SCHEMA.names[:ARCHIVE_SCHEMA.get_field_index("inserted_at") + 1]
+
+
+class ColdTier:
+    """
+    Fact rows past the retention horizon, moved to Parquet.
+
+    archive() exports each month older than the horizon with one
+    DELETE ... RETURNING fed through COPY, so the rows written out are
+    exactly the rows removed, and writes one file per location:
+
+        {root}/month=2025-08/location=17/{archive id}.parquet
+
+    Files are sorted by recorded_at and carry Parquet's per-row-group
+    min/max statistics. Each is recorded in etl_cold_archive with its
+    location and recorded_at range in the same transaction as the delete,
+    so a failed archive leaves its rows in the fact table and its files
+    unlisted; read() only opens listed files.
+
+    The rollup tables keep their groups for archived facts, so aggregate
+    queries over old months still come from Postgres.
+    """
+
+    TABLE = "etl_cold_archive"
+    FACT_TABLE = "fact_weather_measurements"
+
+    def __init__(self, database: Optional[DatabaseConnection] = None,
+                 root: Optional[Union[str, Path]] = None,
+                 load_watermark: Optional[LoadWatermark] = None,
+                 row_group_rows: Optional[int] = None):
+        self.db = database or db
+        self.root = Path(root or settings.cold_tier_dir)
+        self.watermark = load_watermark or (watermark if database is None else LoadWatermark(self.db))
+        self.row_group_rows = row_group_rows or settings.cold_tier_row_group_rows
+        self._enabled = None
+
+    def enabled(self) -> bool:
+        """Whether the archive manifest table exists in this warehouse."""
+        if self._enabled is None:
+            rows = self.db.execute_query("SELECT to_regclass(:table)", {"table": self.TABLE})
+            self._enabled = rows[0][0] is not None
+        return self._enabled
+
+    def archive(self, after_months: Optional[int] = None, today: Optional[date] = None) -> Dict[date, int]:
+        """
+        Move every month of facts older than after_months to the cold tier.
+
+        An after_months of 0 keeps everything hot.
+
+        Returns:
+            Rows archived per month
+        """
+        after_months = settings.cold_tier_after_months if after_months is None else after_months
+        if not after_months or not self.enabled():
+            return {}
+        cutoff = add_months(month_start(today or date.today()), -after_months)
+        first = self.db.execute_query(f"SELECT MIN(recorded_at) FROM {self.FACT_TABLE} WHERE recorded_at < :cutoff",
+                                      {"cutoff": cutoff})[0][0]
+        archived = {}
+        month = month_start(first) if first else cutoff
+        while month < cutoff:
+            archived[month] = self.archive_month(month)
+            month = add_months(month, 1)
+        return archived
+
+    def archive_month(self, month: date) -> int:
+        """Move the facts recorded in one month to Parquet, one file per location."""
+        month = month_start(month)
+        moved_columns = ", ".join(f"f.{name}" for name in _FACT_COLUMNS)
+        export = f"""
+            COPY (
+                WITH moved AS (
+                    DELETE FROM {self.FACT_TABLE}
+                    WHERE recorded_at >= '{month.isoformat()}' AND recorded_at < '{add_months(month, 1).isoformat()}'
+                    RETURNING *
+                )
+                SELECT {moved_columns}, l.city_name, l.country, d.full_date, t.hour_24, t.time_of_day,
+                       wc.main_condition
+                FROM moved f
+                JOIN dim_location l ON f.location_id = l.location_id
+                JOIN dim_date d ON f.date_id = d.date_id
+                JOIN dim_time t ON f.time_id = t.time_id
+                LEFT JOIN dim_weather_condition wc ON f.condition_id = wc.condition_id
+                ORDER BY f.location_id, f.recorded_at
+            ) TO STDOUT WITH (FORMAT csv)
+        """
+        written: List[Path] = []
+        with self.db.unit_of_work() as conn, metrics.span("cold_archive"):
+            self.db.on_rollback(lambda: [path.unlink(missing_ok=True) for path in written])
+            buffer = io.BytesIO()
+            cursor = conn.connection.cursor()
+            cursor.copy_expert(export, buffer)
+            cursor.close()
+            if not buffer.tell():
+                return 0
+            buffer.seek(0)
+            table = pacsv.read_csv(
+                buffer,
+                read_options=pacsv.ReadOptions(column_names=ARCHIVE_SCHEMA.names),
+                convert_options=pacsv.ConvertOptions(column_types=ARCHIVE_SCHEMA, strings_can_be_null=True,
+                                                     quoted_strings_can_be_null=False),
+            )
+
+            # Rows arrive grouped by location; cut the table where the location changes
+            locations = table.column("location_id").to_numpy()
+            bounds = np.concatenate(([0], np.flatnonzero(np.diff(locations)) + 1, [len(locations)]))
+            archive_id = uuid.uuid4().hex
+            manifest = {"paths": [], "locations": [], "counts": [], "firsts": [], "lasts": []}
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                rows = table.slice(start, stop - start)
+                location_id = int(locations[start])
+                relative = Path(f"month={month:%Y-%m}") / f"location={location_id}" / f"{archive_id}.parquet"
+                path = self.root / relative
+                path.parent.mkdir(parents=True, exist_ok=True)
+                written.append(path)
+                pq.write_table(rows, path, row_group_size=self.row_group_rows, compression="zstd")
+                recorded_at = rows.column("recorded_at")
+                manifest["paths"].append(relative.as_posix())
+                manifest["locations"].append(location_id)
+                manifest["counts"].append(len(rows))
+                manifest["firsts"].append(recorded_at[0].as_py())
+                manifest["lasts"].append(recorded_at[-1].as_py())
+
+            self.db.execute_query(f"""
+                INSERT INTO {self.TABLE} (path, month, location_id, row_count, first_recorded_at, last_recorded_at)
+                SELECT p, :month, l, c, f, t
+                FROM UNNEST(CAST(:paths AS TEXT[]), CAST(:locations AS INT[]), CAST(:counts AS INT[]),
+                            CAST(:firsts AS TIMESTAMP[]), CAST(:lasts AS TIMESTAMP[])) AS m (p, l, c, f, t)
+            """, {"month": month, **manifest})
+            # Fact-table answers cached for this month are no longer complete
+            self.watermark.advance(max(manifest["lasts"]))
+
+        metrics.inc("cold_tier_rows_total", len(table))
+        logger.info(f"Archived {len(table)} facts of {month:%Y-%m} to {len(written)} files under {self.root}")
+        return len(table)
+
+    def archived_through(self) -> Optional[date]:
+        """Start of the first month after the newest archived one, None if nothing is archived."""
+        if not self.enabled():
+            return None
+        newest = self.db.execute_query(f"SELECT MAX(month) FROM {self.TABLE}")[0][0]
+        return add_months(newest, 1) if newest else None
+
+    def files(self, start: datetime, end: datetime,
+              location_ids: Optional[Sequence[int]] = None) -> List[Path]:
+        """Archive files that may hold readings recorded in [start, end) at the given locations."""
+        if not self.enabled():
+            return []
+        rows = self.db.execute_query(f"""
+            SELECT path FROM {self.TABLE}
+            WHERE last_recorded_at >= :start AND first_recorded_at < :end
+              AND (CAST(:locations AS INT[]) IS NULL OR location_id = ANY(CAST(:locations AS INT[])))
+            ORDER BY month, location_id, path
+        """, {"start": start, "end": end,
+              "locations": None if location_ids is None else [int(i) for i in location_ids]})
+        return [self.root / row[0] for row in rows]
+
+    def read(self, start: datetime, end: datetime, location_ids: Optional[Sequence[int]] = None,
+             columns: Optional[Sequence[str]] = None) -> pa.Table:
+        """
+        Archived readings recorded in [start, end).
+
+        Files are pruned by the manifest, row groups by their recorded_at
+        statistics.
+        """
+        columns = list(columns or ARCHIVE_SCHEMA.names)
+        paths = self.files(start, end, location_ids)
+        if not paths:
+            return ARCHIVE_SCHEMA.empty_table().select(columns)
+        recorded_at = ds.field("recorded_at")
+        window = (recorded_at >= pa.scalar(start, pa.timestamp("us"))) & \
+            (recorded_at < pa.scalar(end, pa.timestamp("us")))
+        dataset = ds.dataset([str(path) for path in paths], schema=ARCHIVE_SCHEMA, format="parquet")
+        return dataset.to_table(columns=columns, filter=window)
+
+
+# Process-wide cold tier shared by maintenance and the federated reader
+cold_tier = ColdTier()
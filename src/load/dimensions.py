@@ -0,0 +1,232 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterable, Any, Optional, Tuple
+from utils.logger import logger
+from utils.database import db, DatabaseConnection
+from config.config import settings
+
+
+class BoundedCache(OrderedDict):
+    """Least-recently-used map with a maximum number of entries."""
+
+    def __init__(self, max_size: int):
+        super().__init__()
+        self.max_size = max(1, max_size)
+
+    def lookup(self, key):
+        """Return the cached value (marking it recently used) or None."""
+        if key not in self:
+            return None
+        self.move_to_end(key)
+        return self[key]
+
+    def store(self, key, value):
+        self[key] = value
+        self.move_to_end(key)
+        while len(self) > self.max_size:
+            self.popitem(last=False)
+
+
+class DimensionKeyResolver:
+    """
+    In-memory surrogate-key maps for dim_location, dim_date, dim_time and
+    dim_weather_condition.
+
+    The dimensions are preloaded once per process. Keys missing from the maps
+    are fetched (or, for dim_date, generated) for the whole batch at once, so
+    loading a batch never issues per-row dimension queries. A cheap
+    fingerprint of dim_location and dim_time is checked before each batch and
+    the maps are reloaded when either dimension has changed.
+
+    One resolver is shared by loaders on several threads. The maps are read
+    and written under a lock, which is never held across a query: a reload
+    builds new maps and swaps them in, so lookups see the old or the new
+    keys but never an empty map.
+    """
+
+    DIMENSIONS = ("location", "date", "time", "condition")
+
+    def __init__(self, database: Optional[DatabaseConnection] = None,
+                 max_locations: Optional[int] = None,
+                 max_dates: Optional[int] = None):
+        self.db = database or db
+        self.locations = BoundedCache(max_locations or settings.dim_cache_max_locations)
+        self.dates = BoundedCache(max_dates or settings.dim_cache_max_dates)
+        self.times: Dict[int, int] = {}
+        self.conditions: Dict[str, int] = {}
+        self.hits = dict.fromkeys(self.DIMENSIONS, 0)
+        self.misses = dict.fromkeys(self.DIMENSIONS, 0)
+        self._fingerprint = None
+        self._lock = threading.RLock()
+
+    def _read_fingerprint(self) -> Tuple:
+        rows = self.db.execute_query("""
+            SELECT (SELECT COUNT(*) FROM dim_location),
+                   (SELECT MAX(location_id) FROM dim_location),
+                   (SELECT MAX(updated_at) FROM dim_location),
+                   (SELECT COUNT(*) FROM dim_time),
+                   (SELECT MAX(time_id) FROM dim_time)
+        """)
+        return tuple(rows[0])
+
+    def preload(self):
+        """Load the dimensions into memory."""
+        fingerprint = self._read_fingerprint()
+
+        locations = BoundedCache(self.locations.max_size)
+        rows = self.db.execute_query(
+            "SELECT city_name, country, location_id FROM dim_location "
+            "ORDER BY location_id LIMIT :limit",
+            {"limit": locations.max_size}
+        )
+        for city, country, location_id in rows:
+            locations.store((city, country), location_id)
+
+        dates = BoundedCache(self.dates.max_size)
+        rows = self.db.execute_query(
+            "SELECT full_date, date_id FROM dim_date ORDER BY full_date DESC LIMIT :limit",
+            {"limit": dates.max_size}
+        )
+        for full_date, date_id in reversed(rows):
+            dates.store(full_date, date_id)
+
+        rows = self.db.execute_query("SELECT hour, time_id FROM dim_time WHERE minute = 0")
+        times = {hour: time_id for hour, time_id in rows}
+
+        rows = self.db.execute_query("SELECT main_condition, condition_id FROM dim_weather_condition")
+        conditions = {condition: condition_id for condition, condition_id in rows}
+
+        with self._lock:
+            self.locations, self.dates, self.times, self.conditions = locations, dates, times, conditions
+            self._fingerprint = fingerprint
+        logger.info(f"Preloaded {len(self.locations)} locations, {len(self.dates)} dates "
+                    f"and {len(self.times)} times")
+
+    def invalidate(self, dimension: Optional[str] = None):
+        """Drop cached keys for one dimension, or all of them."""
+        with self._lock:
+            if dimension in (None, "location"):
+                self.locations.clear()
+            if dimension in (None, "date"):
+                self.dates.clear()
+            if dimension in (None, "time"):
+                self.times = {}
+            if dimension in (None, "condition"):
+                self.conditions = {}
+            self._fingerprint = None
+
+    def refresh_if_changed(self):
+        """Preload on first use, or reload when dim_location or dim_time changed."""
+        fingerprint = self._fingerprint
+        if fingerprint is None or self._read_fingerprint() != fingerprint:
+            self.preload()
+
+    def resolve_locations(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """Map (city, country) pairs to location ids; unknown locations are omitted."""
+        resolved = {}
+        missing = []
+        with self._lock:
+            for key in set(keys):
+                location_id = self.locations.lookup(key)
+                if location_id is None:
+                    missing.append(key)
+                else:
+                    resolved[key] = location_id
+            self.hits["location"] += len(resolved)
+            self.misses["location"] += len(missing)
+
+        if missing:
+            rows = self.db.execute_query("""
+                SELECT l.city_name, l.country, l.location_id
+                FROM dim_location l
+                JOIN UNNEST(CAST(:cities AS TEXT[]), CAST(:countries AS TEXT[])) AS k(city, country)
+                  ON l.city_name = k.city AND l.country = k.country
+            """, {"cities": [city for city, _ in missing],
+                  "countries": [country for _, country in missing]})
+            with self._lock:
+                for city, country, location_id in rows:
+                    self.locations.store((city, country), location_id)
+                    resolved[(city, country)] = location_id
+        return resolved
+
+    def resolve_dates(self, dates: Iterable[date]) -> Dict[date, int]:
+        """Map calendar days to date ids, generating missing dim_date rows in bulk."""
+        resolved = {}
+        missing = []
+        with self._lock:
+            for day in set(dates):
+                date_id = self.dates.lookup(day)
+                if date_id is None:
+                    missing.append(day)
+                else:
+                    resolved[day] = date_id
+            self.hits["date"] += len(resolved)
+            self.misses["date"] += len(missing)
+
+        if missing:
+            params = {"dates": sorted(missing)}
+            self.db.execute_query("""
+                INSERT INTO dim_date (full_date, year, quarter, month, month_name,
+                                      week_of_year, day_of_month, day_of_week, day_name, is_weekend)
+                SELECT d,
+                       EXTRACT(YEAR FROM d), EXTRACT(QUARTER FROM d), EXTRACT(MONTH FROM d),
+                       TO_CHAR(d, 'Month'), EXTRACT(WEEK FROM d), EXTRACT(DAY FROM d),
+                       EXTRACT(DOW FROM d), TO_CHAR(d, 'Day'), EXTRACT(DOW FROM d) IN (0, 6)
+                FROM UNNEST(CAST(:dates AS DATE[])) AS d
+                ON CONFLICT (full_date) DO NOTHING
+            """, params)
+            rows = self.db.execute_query(
+                "SELECT full_date, date_id FROM dim_date WHERE full_date = ANY(CAST(:dates AS DATE[]))",
+                params
+            )
+            with self._lock:
+                for full_date, date_id in rows:
+                    self.dates.store(full_date, date_id)
+                    resolved[full_date] = date_id
+            # New date ids only exist if the surrounding transaction commits
+            self.db.on_rollback(lambda: self.invalidate("date"))
+        return resolved
+
+    def resolve_time(self, hour: int) -> Optional[int]:
+        """Map an hour of day to its time id."""
+        with self._lock:
+            time_id = self.times.get(hour)
+            if time_id is None:
+                self.misses["time"] += 1
+            else:
+                self.hits["time"] += 1
+        return time_id
+
+    def resolve_hours(self, hours: Iterable[int]) -> Dict[int, int]:
+        """Map several hours of day to time ids; unknown hours are omitted."""
+        return {int(hour): time_id for hour in hours
+                if (time_id := self.resolve_time(int(hour))) is not None}
+
+    def resolve_conditions(self, conditions: Iterable[str]) -> Dict[str, int]:
+        """Map main condition names to condition ids; unknown conditions are omitted."""
+        resolved = {}
+        with self._lock:
+            for condition in set(conditions):
+                condition_id = self.conditions.get(condition)
+                if condition_id is None:
+                    self.misses["condition"] += 1
+                else:
+                    self.hits["condition"] += 1
+                    resolved[condition] = condition_id
+        return resolved
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current sizes per dimension."""
+        with self._lock:
+            sizes = {"location": len(self.locations), "date": len(self.dates), "time": len(self.times),
+                     "condition": len(self.conditions)}
+            return {
+                dimension: {"hits": self.hits[dimension], "misses": self.misses[dimension],
+                            "size": sizes[dimension]}
+                for dimension in self.DIMENSIONS
+            }
+
+
+# Process-wide resolver shared by loaders
+resolver = DimensionKeyResolver()
@@ -0,0 +1,127 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from utils.database import db, DatabaseConnection
+from config.config import settings
+
+# (city, country, api_source)
+FreshnessKey = Tuple[str, str, str]
+
+
+class LocationFreshness:
+    """
+    Newest loaded reading per location and provider.
+
+    The warehouse table etl_location_watermark is the source of truth: the
+    loader skips staged readings that are not newer than it and advances it
+    in the same statement. Extractors read an in-process copy, loaded in one
+    query and reloaded after ttl seconds; loads committed in this process
+    update the copy at once.
+    """
+
+    TABLE = "etl_location_watermark"
+
+    def __init__(self, database: Optional[DatabaseConnection] = None, ttl: Optional[float] = None):
+        self.db = database or db
+        self.ttl = settings.freshness_cache_seconds if ttl is None else ttl
+        self._enabled = None
+        self._latest: Optional[Dict[FreshnessKey, datetime]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enabled(self) -> bool:
+        """Whether the watermark table exists in this warehouse."""
+        if self._enabled is None:
+            rows = self.db.execute_query("SELECT to_regclass(:table)", {"table": self.TABLE})
+            self._enabled = rows[0][0] is not None
+        return self._enabled
+
+    def _snapshot(self) -> Dict[FreshnessKey, datetime]:
+        with self._lock:
+            if self._latest is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._latest
+        rows = self.db.execute_query(f"""
+            SELECT l.city_name, l.country, w.api_source, w.last_recorded_at
+            FROM {self.TABLE} w
+            JOIN dim_location l ON w.location_id = l.location_id
+        """) if self.enabled() else []
+        latest = {(city, country, source): recorded_at for city, country, source, recorded_at in rows or []}
+        with self._lock:
+            self._latest = latest
+            self._loaded_at = time.monotonic()
+        return latest
+
+    def latest(self, city: str, country: str, api_source: str) -> Optional[datetime]:
+        """Local time of the newest loaded reading, None if the location was never loaded."""
+        return self._snapshot().get((city, country, api_source))
+
+    def observe(self, latest: Dict[FreshnessKey, datetime]):
+        """
+        Record the newest readings of a batch written in the current unit of work.
+
+        The in-process copy takes them once the unit of work commits.
+        """
+        if not self.db.in_unit_of_work:
+            return
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = {}
+        for key, recorded_at in latest.items():
+            if key not in pending or recorded_at > pending[key]:
+                pending[key] = recorded_at
+        self.db.after_commit(self, self._publish)
+        self.db.on_rollback(self._discard)
+
+    def _publish(self):
+        pending, self._local.pending = getattr(self._local, "pending", None) or {}, None
+        with self._lock:
+            if self._latest is None:
+                return
+            for key, recorded_at in pending.items():
+                if key not in self._latest or recorded_at > self._latest[key]:
+                    self._latest[key] = recorded_at
+
+    def _discard(self):
+        self._local.pending = None
+
+    def invalidate(self):
+        """Reload from the warehouse on the next lookup."""
+        with self._lock:
+            self._latest = None
+
+    def lag_report(self, stale_after_minutes: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        How far each location's newest reading lags behind its local time.
+
+        Every location is listed per provider it was loaded from, or once
+        with no provider if it never was; the most stale come first.
+
+        Args:
+            stale_after_minutes: Lag beyond which a location counts as stale
+
+        Returns:
+            Dicts with city, country, api_source, last_recorded_at,
+            lag_minutes (None if never loaded) and stale
+        """
+        stale_after = settings.freshness_stale_after_minutes if stale_after_minutes is None \
+            else stale_after_minutes
+        rows = self.db.execute_query(f"""
+            SELECT l.city_name, l.country, w.api_source, w.last_recorded_at,
+                   EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP AT TIME ZONE COALESCE(z.name, 'UTC'))
+                                      - w.last_recorded_at) / 60 AS lag_minutes
+            FROM dim_location l
+            LEFT JOIN {self.TABLE} w ON w.location_id = l.location_id
+            -- Unknown timezone names fall back to UTC instead of failing the report
+            LEFT JOIN pg_timezone_names z ON z.name = l.timezone
+            ORDER BY lag_minutes DESC NULLS FIRST, l.city_name, l.country, w.api_source
+        """)
+        return [{"city": city, "country": country, "api_source": source, "last_recorded_at": recorded_at,
+                 "lag_minutes": None if lag is None else round(float(lag), 1),
+                 "stale": lag is None or float(lag) > stale_after}
+                for city, country, source, recorded_at, lag in rows or []]
+
+
+# Process-wide store shared by the loader and extractors
+freshness = LocationFreshness()
@@ -0,0 +1,493 @@
+import calendar
+import csv
+import io
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from utils.logger import logger
+from utils.database import db, DatabaseConnection
+from utils.metrics import metrics
+from load.cold_tier import ColdTier, cold_tier
+from load.dimensions import DimensionKeyResolver, resolver
+from load.freshness import FreshnessKey, LocationFreshness, freshness
+from load.partitions import PartitionManager, partitions
+from load.seen_keys import SeenKeyIndex, seen_keys
+from load.summary import SummaryMaintainer, maintainers, rollups
+from load.watermark import LoadWatermark, watermark
+from transform.batch import NAT, WeatherBatch
+from transform.measurements import CONDITIONS, DECIMAL_COLUMNS, INTEGER_COLUMNS, MEASUREMENT_COLUMNS
+
+# What to do with a reading whose natural key (location, recorded_at, api_source) is already loaded
+SKIP = "skip"
+UPDATE = "update"
+NATURAL_KEY = ("location_id", "recorded_at", "api_source")
+
+
+@dataclass
+class LoadResult:
+    """Outcome of loading one batch of readings."""
+    loaded: int = 0
+    rejects: List[Dict[str, Any]] = field(default_factory=list)
+    # Readings not newer than their location's freshness watermark
+    skipped: int = 0
+    # Readings whose natural key was already loaded, including updated ones
+    conflicts: int = 0
+    # Conflicting readings that replaced different stored values (on_conflict="update")
+    updated: int = 0
+
+    @property
+    def rejected(self) -> int:
+        return len(self.rejects)
+
+
+class WeatherLoader:
+    """
+    Set-based bulk loader for fact_weather_measurements.
+
+    Surrogate keys for a batch are resolved in memory by the shared
+    DimensionKeyResolver. The resolved rows are copied into a temporary
+    staging table and written with a single INSERT ... SELECT, all inside
+    one transaction, which also folds the new rows into the hourly, daily
+    and monthly rollups and advances the load watermark. Readings no newer
+    than the last one loaded for their location and provider are skipped
+    unless skip_unchanged is off (backfills), and the per-location
+    freshness watermarks are advanced in the same statement.
+
+    Facts are unique on (location_id, recorded_at, api_source), so reruns
+    and retries are idempotent: a reading whose key is already loaded is
+    dropped, or with on_conflict="update" rewrites the stored row and its
+    rollup groups are recomputed. Keys loaded recently are dropped before
+    staging by the shared SeenKeyIndex; the rest are resolved by
+    INSERT ... ON CONFLICT. Inside db.unit_of_work() the batch joins the
+    surrounding run-scoped transaction instead.
+
+    Months moved to the cold tier are closed: their readings are rejected,
+    so a replay or backfill cannot load a second copy beside the archived
+    one or recompute the archived rollup groups from an empty fact table.
+    """
+
+    # Staging table columns, in COPY order
+    STAGING_COLUMNS = [
+        ("row_num", "INT"),
+        ("location_id", "INT"),
+        ("date_id", "INT"),
+        ("time_id", "INT"),
+        ("condition_id", "INT"),
+        ("recorded_at", "TIMESTAMP"),
+        *((name, f"DECIMAL({precision},{scale})") for name, (precision, scale) in DECIMAL_COLUMNS.items()),
+        *((name, "INT") for name in INTEGER_COLUMNS),
+        ("api_source", "VARCHAR(50)"),
+    ]
+
+    # Reading keys carried unchanged into the fact table
+    MEASURE_COLUMNS = MEASUREMENT_COLUMNS + ["api_source"]
+
+    REQUIRED_KEYS = ("city", "country", "recorded_at")
+
+    def __init__(self, database: Optional[DatabaseConnection] = None,
+                 key_resolver: Optional[DimensionKeyResolver] = None,
+                 partition_manager: Optional[PartitionManager] = None,
+                 summary_maintainers: Optional[List[SummaryMaintainer]] = None,
+                 load_watermark: Optional[LoadWatermark] = None,
+                 location_freshness: Optional[LocationFreshness] = None,
+                 seen_key_index: Optional[SeenKeyIndex] = None,
+                 archive: Optional[ColdTier] = None,
+                 skip_unchanged: bool = True,
+                 on_conflict: str = SKIP):
+        if on_conflict not in (SKIP, UPDATE):
+            raise ValueError(f"Unknown conflict handling {on_conflict!r}; expected {SKIP!r} or {UPDATE!r}")
+        self.db = database or db
+        self.resolver = key_resolver or (resolver if database is None
+                                         else DimensionKeyResolver(self.db))
+        self.partitions = partition_manager or (partitions if database is None
+                                                else PartitionManager(self.db))
+        self.summaries = summary_maintainers or (rollups if database is None
+                                                 else maintainers(self.db))
+        self.watermark = load_watermark or (watermark if database is None
+                                            else LoadWatermark(self.db))
+        self.freshness = location_freshness or (freshness if database is None
+                                                else LocationFreshness(self.db))
+        self.seen_keys = seen_key_index or (seen_keys if database is None
+                                            else SeenKeyIndex(self.db))
+        self.archive = archive or (cold_tier if database is None else ColdTier(self.db))
+        self.skip_unchanged = skip_unchanged
+        self.on_conflict = on_conflict
+
+    def _validate(self, records: List[Dict[str, Any]], result: LoadResult) -> List[tuple]:
+        """Return (row_num, recorded_at) for loadable readings, rejecting the rest."""
+        valid = []
+        for row_num, record in enumerate(records):
+            missing = [key for key in self.REQUIRED_KEYS if not record.get(key)]
+            if missing:
+                result.rejects.append({"row": row_num, "record": record,
+                                       "reason": f"missing {', '.join(missing)}"})
+                continue
+
+            recorded_at = record["recorded_at"]
+            if isinstance(recorded_at, str):
+                try:
+                    recorded_at = datetime.fromisoformat(recorded_at)
+                except ValueError:
+                    result.rejects.append({"row": row_num, "record": record,
+                                           "reason": f"invalid recorded_at {recorded_at!r}"})
+                    continue
+            valid.append((row_num, recorded_at))
+        return valid
+
+    def _archived_through(self) -> Optional[datetime]:
+        """First moment readings can still be loaded at, None when nothing is archived."""
+        through = self.archive.archived_through()
+        return None if through is None else datetime.combine(through, datetime.min.time())
+
+    def _resolve_keys(self, records: List[Dict[str, Any]], valid: List[tuple],
+                      result: LoadResult) -> List[tuple]:
+        """Attach surrogate keys to valid readings, producing staging rows."""
+        with metrics.span("dimension_lookup"):
+            self.resolver.refresh_if_changed()
+            location_ids = self.resolver.resolve_locations(
+                (records[row_num]["city"], records[row_num]["country"]) for row_num, _ in valid
+            )
+            date_ids = self.resolver.resolve_dates(recorded_at.date() for _, recorded_at in valid)
+            condition_ids = self.resolver.resolve_conditions(
+                records[row_num]["condition"] for row_num, _ in valid if records[row_num].get("condition")
+            )
+
+        archived_through = self._archived_through()
+        rows = []
+        for row_num, recorded_at in valid:
+            record = records[row_num]
+            location_id = location_ids.get((record["city"], record["country"]))
+            time_id = self.resolver.resolve_time(recorded_at.hour)
+            if location_id is None:
+                reason = "location not found"
+            elif time_id is None:
+                reason = "time not found"
+            elif archived_through is not None and recorded_at < archived_through:
+                reason = "month archived"
+            else:
+                rows.append((row_num, location_id, date_ids[recorded_at.date()], time_id,
+                             condition_ids.get(record.get("condition")), recorded_at,
+                             *(record.get(key) for key in self.MEASURE_COLUMNS)))
+                continue
+            result.rejects.append({"row": row_num, "record": record, "reason": reason})
+        return rows
+
+    def _drop_seen(self, keys: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                   result: LoadResult) -> Optional[np.ndarray]:
+        """
+        Mask of the readings to stage, without those whose key the seen-key index knows.
+
+        Args:
+            keys: Location ids, recorded_at epoch seconds and api_source per reading
+
+        Returns:
+            None when every reading is to be staged
+        """
+        if self.on_conflict != SKIP or not self.seen_keys.enabled():
+            return None
+        known = self.seen_keys.seen(*keys)
+        dropped = int(known.sum())
+        if not dropped:
+            return None
+        result.conflicts += dropped
+        metrics.inc("load_seen_key_hits_total", dropped)
+        return ~known
+
+    def _write_staged(self, buffer: io.StringIO, first: datetime, last: datetime,
+                      latest: Dict[FreshnessKey, datetime],
+                      keys: Tuple[np.ndarray, np.ndarray, np.ndarray], result: LoadResult):
+        """
+        COPY staged CSV rows spanning first..last into a temp table and insert them as facts.
+        
+        Adds the inserted, skipped, conflicting and updated counts to result.
+        
+        Args:
+            latest: Newest staged reading per (city, country, api_source)
+            keys: Location ids, recorded_at epoch seconds and api_source of the staged rows
+        """
+        staging_ddl = ", ".join(f"{name} {ddl}" for name, ddl in self.STAGING_COLUMNS)
+        columns = ", ".join(name for name, _ in self.STAGING_COLUMNS)
+        measures = ", ".join(self.MEASURE_COLUMNS)
+        natural_key = ", ".join(NATURAL_KEY)
+        update = self.on_conflict == UPDATE
+        fresh = self.freshness.enabled()
+        unchanged = f"""
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {self.freshness.TABLE} w
+                WHERE w.location_id = s.location_id AND w.api_source = s.api_source
+                  AND w.last_recorded_at >= s.recorded_at
+            )
+        """ if fresh and self.skip_unchanged else ""
+        if update:
+            rewritten = ["condition_id"] + [name for name in self.MEASURE_COLUMNS if name != "api_source"]
+            action = f"""DO UPDATE SET {", ".join(f"{name} = EXCLUDED.{name}" for name in rewritten)},
+                    inserted_at = CURRENT_TIMESTAMP
+                WHERE ({", ".join(f"f.{name}" for name in rewritten)})
+                      IS DISTINCT FROM ({", ".join(f"EXCLUDED.{name}" for name in rewritten)})"""
+        else:
+            action = "DO NOTHING"
+        buffer.seek(0)
+
+        with self.db.unit_of_work() as conn, metrics.span("fact_insert"):
+            self.partitions.ensure_range(first, last)
+            conn.execute(text(f"CREATE TEMP TABLE stage_weather ({staging_ddl}) ON COMMIT DROP"))
+            cursor = conn.connection.cursor()
+            cursor.copy_expert(f"COPY stage_weather ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.close()
+
+            # A key repeated within the batch is written once: the last reading
+            # when updating, the first otherwise
+            candidates = f"""
+                SELECT DISTINCT ON ({natural_key}) *
+                FROM stage_weather s
+                {unchanged}
+                ORDER BY {natural_key}, row_num {"DESC" if update else ""}
+            """
+            insert = f"""
+                INSERT INTO fact_weather_measurements AS f
+                    (location_id, date_id, time_id, condition_id, {measures}, recorded_at)
+                SELECT location_id, date_id, time_id, condition_id, {measures}, recorded_at
+                FROM candidates
+                ORDER BY row_num
+                ON CONFLICT ({natural_key}) {action}
+                RETURNING location_id, date_id, time_id, recorded_at, {measures}
+            """
+            ctes = [f"candidates AS ({candidates})", f"inserted AS ({insert})"]
+            if update:
+                # Rows already stored when the statement started were updated, not created
+                ctes += [f"""existing AS (
+                    SELECT {natural_key} FROM fact_weather_measurements f
+                    JOIN candidates c USING ({natural_key})
+                )""", f"""created_rows AS (
+                    SELECT * FROM inserted i
+                    WHERE NOT EXISTS (SELECT 1 FROM existing e WHERE {
+                        " AND ".join(f"e.{name} IS NOT DISTINCT FROM i.{name}" for name in NATURAL_KEY)})
+                )"""]
+            else:
+                ctes.append("created_rows AS (SELECT * FROM inserted)")
+            # Fold exactly the new rows into each rollup; updated groups are recomputed below
+            for index, maintainer in enumerate(m for m in self.summaries if m.enabled()):
+                ctes.append(f"summarized_{index} AS "
+                            f"({maintainer.upsert_sql('created_rows', self.MEASURE_COLUMNS)})")
+            if fresh:
+                ctes.append(f"""advanced AS (
+                    INSERT INTO {self.freshness.TABLE} (location_id, api_source, last_recorded_at)
+                    SELECT location_id, api_source, MAX(recorded_at)
+                    FROM inserted
+                    WHERE api_source IS NOT NULL
+                    GROUP BY location_id, api_source
+                    ON CONFLICT (location_id, api_source) DO UPDATE
+                    SET last_recorded_at = GREATEST({self.freshness.TABLE}.last_recorded_at,
+                                                    EXCLUDED.last_recorded_at),
+                        updated_at = CURRENT_TIMESTAMP
+                )""")
+            counts = conn.execute(text(f"WITH {', '.join(ctes)} "
+                                       f"SELECT (SELECT COUNT(*) FROM created_rows), "
+                                       f"(SELECT COUNT(*) FROM inserted) - (SELECT COUNT(*) FROM created_rows), "
+                                       f"(SELECT COUNT(*) FROM stage_weather s {unchanged}), "
+                                       f"(SELECT COUNT(*) FROM stage_weather)")).one()
+            loaded, updated, unskipped, staged = counts
+            if updated:
+                groups = [tuple(row) for row in conn.execute(text(
+                    "SELECT DISTINCT location_id, date_id FROM stage_weather")).all()]
+                for maintainer in self.summaries:
+                    maintainer.recompute_groups(groups)
+            if loaded or updated:
+                self.watermark.advance(last)
+                if fresh:
+                    self.freshness.observe(latest)
+            # Every staged key is now either in the table or behind its location's watermark
+            self.seen_keys.observe(*keys)
+            # Temp tables created inside a run-scoped transaction outlive the batch
+            conn.execute(text("DROP TABLE stage_weather"))
+
+        result.loaded += loaded
+        result.updated += updated
+        result.skipped += staged - unskipped
+        result.conflicts += unskipped - loaded
+
+    def _log_result(self, result: LoadResult, started: float):
+        metrics.throughput("load", result.loaded, time.perf_counter() - started)
+        metrics.inc("load_rejected_total", result.rejected)
+        metrics.inc("load_skipped_total", result.skipped)
+        metrics.inc("load_conflicts_total", result.conflicts)
+        metrics.inc("load_updated_total", result.updated)
+        result.rejects.sort(key=lambda reject: reject["row"])
+        for reject in result.rejects:
+            record = reject["record"]
+            logger.warning(f"Rejected {record.get('city')}, {record.get('country')}: {reject['reason']}")
+        logger.info(f"Loaded {result.loaded} records, rejected {result.rejected}, "
+                    f"skipped {result.skipped} unchanged, {result.conflicts} already loaded "
+                    f"({result.updated} updated)")
+
+    def load(self, records: List[Dict[str, Any]]) -> LoadResult:
+        """
+        Load a batch of weather readings in one transaction.
+
+        Args:
+            records: Readings as produced by OpenMeteoExtractor.parse_response
+
+        Returns:
+            LoadResult with the inserted row count and per-row rejects
+        """
+        started = time.perf_counter()
+        result = LoadResult()
+        valid = self._validate(records, result)
+
+        if valid:
+            if not self.db.engine:
+                self.db.initialize()
+            rows = self._resolve_keys(records, valid, result)
+        else:
+            rows = []
+
+        source = 6 + self.MEASURE_COLUMNS.index("api_source")
+        if rows:
+            keys = (np.array([row[1] for row in rows], dtype=np.int64),
+                    np.array([calendar.timegm(row[5].timetuple()) for row in rows], dtype=np.int64),
+                    np.array([row[source] for row in rows], dtype=object))
+            keep = self._drop_seen(keys, result)
+            if keep is not None:
+                rows = [row for row, kept in zip(rows, keep.tolist()) if kept]
+                keys = tuple(column[keep] for column in keys)
+
+        if rows:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow(["" if value is None else value for value in row])
+            latest = {}
+            for row in rows:
+                record = records[row[0]]
+                key = (record["city"], record["country"], row[source])
+                if key not in latest or row[5] > latest[key]:
+                    latest[key] = row[5]
+            self._write_staged(buffer, min(row[5] for row in rows), max(row[5] for row in rows),
+                               latest, keys, result)
+
+        self._log_result(result, started)
+        return result
+
+    def load_frame(self, frame: pd.DataFrame) -> LoadResult:
+        """
+        Load a DataFrame of readings in one transaction.
+
+        Args:
+            frame: Readings with the same columns as the load() dicts
+
+        Returns:
+            LoadResult with the inserted row count and per-row rejects
+        """
+        return self.load_batch(WeatherBatch.from_pandas(frame))
+
+    def load_batch(self, batch: WeatherBatch) -> LoadResult:
+        """
+        Load a columnar batch of readings in one transaction.
+
+        Keys are resolved once per distinct city/country code pair, day,
+        hour and condition and broadcast back with array lookups, so no
+        per-row Python objects are created for the loadable rows.
+
+        Args:
+            batch: Readings to load
+
+        Returns:
+            LoadResult with the inserted row count and per-row rejects
+        """
+        started = time.perf_counter()
+        result = LoadResult()
+        if not len(batch):
+            return result
+
+        recorded_at = batch.recorded_at
+        present = (batch.city.codes >= 0) & (batch.country.codes >= 0) & (recorded_at != NAT)
+
+        if not self.db.engine:
+            self.db.initialize()
+
+        with metrics.span("dimension_lookup"):
+            self.resolver.refresh_if_changed()
+            pairs = batch.city.codes.astype(np.int64) << 32 | batch.country.codes.astype(np.int64)
+            unique_pairs, pair_index = np.unique(pairs[present], return_inverse=True)
+            keys = [(batch.city.categories[pair >> 32], batch.country.categories[pair & 0xFFFFFFFF])
+                    for pair in unique_pairs.tolist()]
+            location_ids = self.resolver.resolve_locations(keys)
+            location_id = np.full(len(batch), -1, dtype=np.int64)
+            location_id[present] = np.array([location_ids.get(key, -1) for key in keys],
+                                            dtype=np.int64)[pair_index]
+
+            days = recorded_at[present] // 86400
+            unique_days, day_index = np.unique(days, return_inverse=True)
+            day_dates = unique_days.astype("datetime64[D]").astype(object).tolist()
+            date_ids = self.resolver.resolve_dates(day_dates)
+            date_id = np.full(len(batch), -1, dtype=np.int64)
+            date_id[present] = np.array([date_ids[day] for day in day_dates], dtype=np.int64)[day_index]
+
+            hours = recorded_at // 3600 % 24
+            time_ids = self.resolver.resolve_hours(np.unique(hours[present]).tolist())
+            hour_lookup = np.array([time_ids.get(hour, -1) for hour in range(24)], dtype=np.int64)
+            time_id = np.where(present, hour_lookup[np.where(present, hours, 0)], -1)
+
+            seen = np.unique(batch.condition[present & (batch.condition >= 0)])
+            condition_ids = self.resolver.resolve_conditions(CONDITIONS[code] for code in seen.tolist())
+            # The trailing -1 is the lookup for missing (-1) condition codes
+            condition_lookup = np.array([condition_ids.get(name, -1) for name in CONDITIONS] + [-1],
+                                        dtype=np.int64)
+            condition_id = condition_lookup[batch.condition]
+
+        archived = np.zeros(len(batch), dtype=bool)
+        archived_through = self._archived_through()
+        if archived_through is not None:
+            archived = present & (recorded_at < calendar.timegm(archived_through.timetuple()))
+
+        loadable = present & (location_id >= 0) & (time_id >= 0) & ~archived
+        rejected = ~loadable
+        sources = np.asarray(batch.api_source.decode(), dtype=object)
+        if loadable.any():
+            keep = self._drop_seen((location_id[loadable], recorded_at[loadable], sources[loadable]), result)
+            if keep is not None:
+                loadable[loadable] = keep
+        for row_num in np.flatnonzero(rejected).tolist():
+            if not present[row_num]:
+                reason = "missing city, country or recorded_at"
+            elif location_id[row_num] < 0:
+                reason = "location not found"
+            elif time_id[row_num] < 0:
+                reason = "time not found"
+            else:
+                reason = "month archived"
+            result.rejects.append({"row": row_num, "record": batch.row(row_num), "reason": reason})
+
+        if loadable.any():
+            rows = batch[loadable]
+            moments = rows.recorded_at_datetime64()
+            staged = pd.DataFrame({
+                "row_num": np.flatnonzero(loadable),
+                "location_id": location_id[loadable],
+                "date_id": date_id[loadable],
+                "time_id": time_id[loadable],
+                "condition_id": pd.array(np.where(condition_id[loadable] >= 0, condition_id[loadable], np.nan),
+                                         dtype="Int64"),
+                "recorded_at": moments,
+            })
+            for column in DECIMAL_COLUMNS:
+                staged[column] = rows.measurements[column]
+            for column in INTEGER_COLUMNS:
+                staged[column] = pd.array(rows.measurements[column], dtype="Int64")
+            staged["api_source"] = rows.api_source.to_pandas()
+
+            buffer = io.StringIO()
+            staged[[name for name, _ in self.STAGING_COLUMNS]].to_csv(buffer, index=False, header=False)
+            newest = pd.DataFrame({"city": rows.city.to_pandas(), "country": rows.country.to_pandas(),
+                                   "api_source": rows.api_source.to_pandas(), "recorded_at": moments})
+            newest = newest.groupby(["city", "country", "api_source"], observed=True)["recorded_at"].max()
+            latest = {key: moment.to_pydatetime() for key, moment in newest.items()}
+            self._write_staged(buffer, moments.min().astype(object), moments.max().astype(object), latest,
+                               (location_id[loadable], recorded_at[loadable], sources[loadable]), result)
+
+        self._log_result(result, started)
+        return result
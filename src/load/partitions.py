@@ -0,0 +1,245 @@
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from utils.logger import logger
+from utils.database import db, DatabaseConnection
+from config.config import settings
+
+SCHEMA_DIR = Path(__file__).parent.parent.parent / "SQL Tables"
+
+
+def month_start(value) -> date:
+    """First day of the month containing value."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    """Shift a month start by count months."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionManager:
+    """
+    Create, index and retire the monthly partitions of fact_weather_measurements.
+
+    Each partition covers one calendar month of recorded_at. Recent
+    partitions keep a B-tree index on recorded_at; partitions older than
+    the hot window switch to a much smaller BRIN index, which suits their
+    append-only, time-ordered contents.
+    """
+
+    TABLE = "fact_weather_measurements"
+
+    def __init__(self, database: Optional[DatabaseConnection] = None):
+        self.db = database or db
+        self._partitioned = None
+        self._known: Set[date] = set()
+
+    @classmethod
+    def partition_name(cls, month: date) -> str:
+        return f"{cls.TABLE}_y{month.year}m{month.month:02d}"
+
+    def is_partitioned(self) -> bool:
+        """Whether the fact table has been migrated to the partitioned layout."""
+        if self._partitioned is None:
+            rows = self.db.execute_query("""
+                SELECT 1 FROM pg_partitioned_table p
+                JOIN pg_class c ON c.oid = p.partrelid
+                WHERE c.relname = :table
+            """, {"table": self.TABLE})
+            self._partitioned = bool(rows)
+        return self._partitioned
+
+    def list_partitions(self) -> Dict[date, str]:
+        """Existing partitions keyed by the month they cover."""
+        rows = self.db.execute_query("""
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = :table
+        """, {"table": self.TABLE})
+        prefix = f"{self.TABLE}_y"
+        partitions = {}
+        for (name,) in rows:
+            if name.startswith(prefix):
+                year, month = name[len(prefix):].split("m")
+                partitions[date(int(year), int(month), 1)] = name
+        return partitions
+
+    def create_partition(self, month: date):
+        """Create the partition for one month (no-op if it exists)."""
+        name = self.partition_name(month)
+        self.db.execute_query(f"""
+            CREATE TABLE IF NOT EXISTS {name} PARTITION OF {self.TABLE}
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')
+        """)
+        self.db.execute_query(f"CREATE INDEX IF NOT EXISTS {name}_recorded_at ON {name} (recorded_at)")
+        self._known.add(month)
+        self.db.on_rollback(self._known.clear)
+
+    def ensure_range(self, first: datetime, last: datetime):
+        """
+        Make sure partitions exist for every month from first to last.
+
+        Called by the loader before each insert; months already seen by this
+        manager cost nothing, so only a batch reaching a new month pays for
+        a catalog lookup.
+        """
+        if not self.is_partitioned():
+            return
+        months = []
+        month = month_start(first)
+        while month <= month_start(last):
+            if month not in self._known:
+                months.append(month)
+            month = add_months(month, 1)
+        if not months:
+            return
+
+        existing = self.list_partitions()
+        self._known.update(existing)
+        months = [month for month in months if month not in existing]
+        if not months:
+            return
+
+        # Serialize creation across concurrent loaders, then re-check under the lock
+        self.db.execute_query("SELECT pg_advisory_xact_lock(hashtext(:table))", {"table": self.TABLE})
+        existing = self.list_partitions()
+        self._known.update(existing)
+        for month in months:
+            if month not in existing:
+                logger.info(f"Creating partition {self.partition_name(month)}")
+                self.create_partition(month)
+
+    def create_upcoming(self, months_ahead: Optional[int] = None, today: Optional[date] = None):
+        """Create partitions for the current month and the next months_ahead months."""
+        months_ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+        current = month_start(today or date.today())
+        self.ensure_range(current, add_months(current, months_ahead))
+
+    def convert_to_brin(self, after_months: Optional[int] = None,
+                        today: Optional[date] = None) -> List[str]:
+        """Swap the recorded_at B-tree for a BRIN index on partitions older than after_months."""
+        after_months = settings.partition_brin_after_months if after_months is None else after_months
+        cutoff = add_months(month_start(today or date.today()), -after_months)
+        converted = []
+        for month, name in sorted(self.list_partitions().items()):
+            if month >= cutoff:
+                continue
+            rows = self.db.execute_query(
+                "SELECT 1 FROM pg_indexes WHERE tablename = :table AND indexname = :index",
+                {"table": name, "index": f"{name}_recorded_at"}
+            )
+            if not rows:
+                continue
+            self.db.execute_query(
+                f"CREATE INDEX IF NOT EXISTS {name}_recorded_at_brin ON {name} USING BRIN (recorded_at)"
+            )
+            self.db.execute_query(f"DROP INDEX IF EXISTS {name}_recorded_at")
+            converted.append(name)
+            logger.info(f"Converted {name} to a BRIN recorded_at index")
+        return converted
+
+    def expire(self, retention_months: Optional[int] = None, drop: bool = False,
+               today: Optional[date] = None) -> List[str]:
+        """
+        Detach (and optionally drop) partitions older than retention_months.
+
+        A retention of 0 keeps everything.
+        """
+        retention_months = settings.partition_retention_months if retention_months is None else retention_months
+        if not retention_months:
+            return []
+        cutoff = add_months(month_start(today or date.today()), -retention_months)
+        expired = []
+        for month, name in sorted(self.list_partitions().items()):
+            if month >= cutoff:
+                continue
+            self.db.execute_query(f"ALTER TABLE {self.TABLE} DETACH PARTITION {name}")
+            if drop:
+                self.db.execute_query(f"DROP TABLE {name}")
+            self._known.discard(month)
+            expired.append(name)
+            logger.info(f"{'Dropped' if drop else 'Detached'} partition {name}")
+        return expired
+
+    def maintain(self, today: Optional[date] = None) -> Dict[str, List[str]]:
+        """Run the routine maintenance: upcoming partitions, BRIN conversion and expiry."""
+        self.create_upcoming(today=today)
+        return {
+            "brin": self.convert_to_brin(today=today),
+            "expired": self.expire(drop=settings.partition_drop_expired, today=today),
+        }
+
+    def migrate(self, keep_old: bool = True):
+        """
+        Move an unpartitioned fact table to the partitioned layout in one transaction.
+
+        Dependent views are captured, dropped and recreated on the new
+        table. The old table is kept as fact_weather_measurements_unpartitioned
+        unless keep_old is False.
+        """
+        if self.is_partitioned():
+            logger.info(f"{self.TABLE} is already partitioned")
+            return
+
+        old = f"{self.TABLE}_unpartitioned"
+        with self.db.unit_of_work() as conn:
+            views = self.db.execute_query("""
+                SELECT DISTINCT v.relname, v.relkind, pg_get_viewdef(v.oid)
+                FROM pg_depend d
+                JOIN pg_rewrite r ON r.oid = d.objid
+                JOIN pg_class v ON v.oid = r.ev_class
+                WHERE d.refobjid = CAST(:table AS regclass) AND v.oid <> d.refobjid
+            """, {"table": self.TABLE})
+            for name, kind, _ in views:
+                self.db.execute_query(f"DROP {'MATERIALIZED VIEW' if kind == 'm' else 'VIEW'} {name}")
+
+            self.db.execute_query(f"ALTER TABLE {self.TABLE} RENAME TO {old}")
+            self.db.execute_query(f"ALTER TABLE {old} RENAME CONSTRAINT {self.TABLE}_pkey TO {old}_pkey")
+            if self.db.execute_query("""
+                SELECT 1 FROM pg_constraint
+                WHERE conname = 'uq_weather_natural_key' AND conrelid = CAST(:table AS regclass)
+            """, {"table": old}):
+                self.db.execute_query(f"ALTER TABLE {old} RENAME CONSTRAINT uq_weather_natural_key "
+                                      f"TO uq_weather_natural_key_unpartitioned")
+            for index in ("idx_weather_location_date", "idx_weather_recorded_at", "idx_weather_date_time"):
+                self.db.execute_query(f"ALTER INDEX IF EXISTS {index} RENAME TO {index}_unpartitioned")
+
+            conn.exec_driver_sql((SCHEMA_DIR / "Fact Table Partitioned.sql").read_text())
+            self._partitioned = True
+            self.db.on_rollback(lambda: setattr(self, "_partitioned", None))
+
+            bounds = self.db.execute_query(f"SELECT MIN(recorded_at), MAX(recorded_at) FROM {old}")[0]
+            first = bounds[0] or date.today()
+            last = max(bounds[1] or first, datetime.combine(
+                add_months(month_start(date.today()), settings.partition_months_ahead), datetime.min.time()
+            ))
+            self.ensure_range(first, last)
+
+            # Columns added later by ALTER TABLE sit at the end of the old table
+            columns = ", ".join(row[0] for row in self.db.execute_query("""
+                SELECT attname FROM pg_attribute
+                WHERE attrelid = CAST(:table AS regclass) AND attnum > 0 AND NOT attisdropped
+                ORDER BY attnum
+            """, {"table": old}))
+            self.db.execute_query(f"INSERT INTO {self.TABLE} ({columns}) SELECT {columns} FROM {old}")
+            self.db.execute_query(f"""
+                SELECT setval(pg_get_serial_sequence('{self.TABLE}', 'measurement_id'),
+                              COALESCE((SELECT MAX(measurement_id) FROM {self.TABLE}), 0) + 1, false)
+            """)
+
+            for name, kind, definition in views:
+                conn.exec_driver_sql(
+                    f"CREATE {'MATERIALIZED VIEW' if kind == 'm' else 'VIEW'} {name} AS {definition}"
+                )
+            if not keep_old:
+                self.db.execute_query(f"DROP TABLE {old}")
+
+        logger.success(f"Migrated {self.TABLE} to monthly partitions")
+
+
+# Process-wide partition manager shared by loaders
+partitions = PartitionManager()
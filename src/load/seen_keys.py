@@ -0,0 +1,149 @@
+import threading
+from typing import Dict, Optional, Sequence
+import numpy as np
+from utils.database import db, DatabaseConnection
+from config.config import settings
+
+# Low 32 bits of a packed key: seconds since the epoch of the local recorded_at
+SECONDS_MASK = 0xFFFFFFFF
+
+# Local clocks run up to 26 hours apart (UTC-12 to UTC+14)
+_LOCAL_SPREAD_SECONDS = 26 * 3600
+
+
+def pack(location_ids: np.ndarray, recorded_at_seconds: np.ndarray) -> np.ndarray:
+    """Pack location ids and recorded_at epoch seconds into one int64 key per reading."""
+    return (np.asarray(location_ids, dtype=np.int64) << 32) | \
+        (np.asarray(recorded_at_seconds, dtype=np.int64) & SECONDS_MASK)
+
+
+def prune(keys: np.ndarray, window_seconds: float) -> np.ndarray:
+    """Sorted packed keys within window_seconds of the newest key of their location."""
+    if not len(keys):
+        return keys
+    seconds = keys & SECONDS_MASK
+    # Sorted keys run location by location, each run ending at its newest reading
+    ends = np.append(np.flatnonzero(np.diff(keys >> 32)), len(keys) - 1)
+    newest = np.repeat(seconds[ends], np.diff(ends, prepend=-1))
+    return keys[seconds >= newest - window_seconds]
+
+
+class SeenKeyIndex:
+    """
+    Natural keys (location_id, recorded_at, api_source) of recently loaded facts.
+
+    The loader drops readings whose key is already known before staging
+    them, so replayed batches and overlapping runs cost neither a COPY nor
+    a conflict check. Keys are held per provider as a sorted array of
+    packed location/recorded_at keys, seeded on first use from the fact
+    rows of the last window_hours and extended when loads commit; keys
+    that fall out of the window are pruned as new ones arrive. recorded_at
+    is local time, so each location's window ends at its own newest key.
+
+    The index is only a shortcut: the table's unique key stays the source
+    of truth, so readings outside the window, or loaded by another process,
+    are still caught by ON CONFLICT.
+    """
+
+    def __init__(self, database: Optional[DatabaseConnection] = None,
+                 window_hours: Optional[float] = None):
+        self.db = database or db
+        self.window_hours = settings.seen_keys_window_hours if window_hours is None else window_hours
+        self._keys: Optional[Dict[str, np.ndarray]] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enabled(self) -> bool:
+        return self.window_hours > 0
+
+    def _snapshot(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            if self._keys is not None:
+                return self._keys
+        rows = self.db.execute_query("""
+            SELECT api_source, location_id, CAST(EXTRACT(EPOCH FROM recorded_at) AS BIGINT)
+            FROM (
+                SELECT api_source, location_id, recorded_at,
+                       MAX(recorded_at) OVER (PARTITION BY api_source, location_id) AS newest
+                FROM fact_weather_measurements
+                WHERE recorded_at >= LOCALTIMESTAMP - make_interval(secs => :seconds + :spread)
+                  AND api_source IS NOT NULL
+            ) f
+            WHERE recorded_at >= newest - make_interval(secs => :seconds)
+        """, {"seconds": self.window_hours * 3600, "spread": _LOCAL_SPREAD_SECONDS}) or []
+        keys: Dict[str, np.ndarray] = {}
+        if rows:
+            sources = np.array([row[0] for row in rows], dtype=object)
+            packed = pack([row[1] for row in rows], [row[2] for row in rows])
+            for source in set(sources.tolist()):
+                keys[source] = np.unique(packed[sources == source])
+        with self._lock:
+            if self._keys is None:
+                self._keys = keys
+            return self._keys
+
+    def seen(self, location_ids: np.ndarray, recorded_at_seconds: np.ndarray,
+             sources: Sequence[Optional[str]]) -> np.ndarray:
+        """
+        Which readings have a key that is already loaded.
+
+        Args:
+            location_ids: Resolved location ids
+            recorded_at_seconds: Local recorded_at as seconds since the epoch
+            sources: api_source per reading; readings without one are never known
+
+        Returns:
+            Boolean mask over the readings
+        """
+        known = np.zeros(len(location_ids), dtype=bool)
+        if not self.enabled() or not len(known):
+            return known
+        keys = pack(location_ids, recorded_at_seconds)
+        sources = np.asarray(sources, dtype=object)
+        snapshot = self._snapshot()
+        for source in set(sources.tolist()) & set(snapshot):
+            loaded = snapshot[source]
+            rows = sources == source
+            candidates = keys[rows]
+            positions = np.minimum(np.searchsorted(loaded, candidates), len(loaded) - 1)
+            known[rows] = loaded[positions] == candidates
+        return known
+
+    def observe(self, location_ids: np.ndarray, recorded_at_seconds: np.ndarray,
+                sources: Sequence[Optional[str]]):
+        """
+        Remember the keys of readings written in the current unit of work.
+
+        They join the index once the unit of work commits.
+        """
+        if not self.enabled() or not self.db.in_unit_of_work or not len(location_ids):
+            return
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = []
+        pending.append((pack(location_ids, recorded_at_seconds), np.asarray(sources, dtype=object)))
+        self.db.after_commit(self, self._publish)
+        self.db.on_rollback(self._discard)
+
+    def _publish(self):
+        pending, self._local.pending = getattr(self._local, "pending", None) or [], None
+        with self._lock:
+            if self._keys is None:
+                return
+            for keys, sources in pending:
+                for source in set(sources.tolist()) - {None}:
+                    merged = np.union1d(self._keys.get(source, np.empty(0, dtype=np.int64)),
+                                        keys[sources == source])
+                    self._keys[source] = prune(merged, self.window_hours * 3600)
+
+    def _discard(self):
+        self._local.pending = None
+
+    def invalidate(self):
+        """Reseed from the warehouse on the next lookup, e.g. after facts were deleted."""
+        with self._lock:
+            self._keys = None
+
+
+# Process-wide index shared by loaders without their own database
+seen_keys = SeenKeyIndex()
@@ -0,0 +1,77 @@
+from pathlib import Path
+from typing import Dict, Iterator, List, Any, Optional, Union
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.logger import logger
+from config.config import settings
+from transform.batch import WeatherBatch
+from transform.measurements import DECIMAL_COLUMNS, INTEGER_COLUMNS
+
+
+# Column layout of staged readings; matches WeatherBatch.to_arrow
+STAGING_SCHEMA = pa.schema([
+    ("city", pa.dictionary(pa.int32(), pa.string())),
+    ("country", pa.dictionary(pa.int32(), pa.string())),
+    ("latitude", pa.float64()),
+    ("longitude", pa.float64()),
+    *((name, pa.float64()) for name in DECIMAL_COLUMNS),
+    *((name, pa.int32()) for name in INTEGER_COLUMNS),
+    ("condition", pa.dictionary(pa.int8(), pa.string())),
+    ("recorded_at", pa.timestamp("s")),
+    ("api_source", pa.dictionary(pa.int32(), pa.string())),
+])
+
+
+def staging_path(run_key: str, directory: Optional[Union[str, Path]] = None) -> Path:
+    """Location of the staging file for one pipeline run."""
+    safe_key = "".join(c if c.isalnum() or c in "-_" else "_" for c in run_key)
+    return Path(directory or settings.staging_dir) / f"weather_{safe_key}.parquet"
+
+
+class StagingWriter:
+    """
+    Append readings to a Parquet staging file, one row group per write.
+
+    Only the batch being written is held in memory, so the writer's
+    footprint does not grow with the number of locations in a run.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.row_count = 0
+        self._writer = pq.ParquetWriter(self.path, STAGING_SCHEMA)
+
+    def write(self, batch: Union[WeatherBatch, List[Dict[str, Any]], pd.DataFrame]):
+        """Write a batch of readings as one row group."""
+        if isinstance(batch, pd.DataFrame):
+            batch = WeatherBatch.from_pandas(batch)
+        elif not isinstance(batch, WeatherBatch):
+            batch = WeatherBatch.from_records(batch)
+        if not len(batch):
+            return
+        self._writer.write_table(batch.to_arrow().cast(STAGING_SCHEMA))
+        self.row_count += len(batch)
+
+    def close(self):
+        self._writer.close()
+        logger.info(f"Staged {self.row_count} readings to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_staging_batches(path: Union[str, Path],
+                         batch_size: Optional[int] = None) -> Iterator[WeatherBatch]:
+    """
+    Stream a staging file back as WeatherBatches of at most batch_size rows.
+
+    The file is memory-mapped and decoded one record batch at a time.
+    """
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=batch_size or settings.batch_size):
+        yield WeatherBatch.from_arrow(batch)
@@ -0,0 +1,214 @@
+from datetime import date
+from typing import Dict, List, Any, Optional
+from utils.logger import logger
+from utils.database import db, DatabaseConnection
+
+
+class SummaryMaintainer:
+    """
+    Keep one rollup table in step with fact_weather_measurements.
+
+    The loader folds the partial aggregates of each inserted batch into the
+    groups it touches, so maintenance cost follows batch size rather than
+    table size. verify() and rebuild() compare against or replace the table
+    with a full recompute from the fact table.
+
+    Subclasses name the table and its grain: KEYS maps each key column of
+    the rollup to the expression computing it from fact rows, and SCOPE
+    maps the key columns that identify the groups covering a (location,
+    date) pair to expressions over location_id, date_id and full_date.
+    PERIOD is the first day a summary row s covers.
+    """
+
+    TABLE = None
+    KEYS: Dict[str, str] = {}
+    SCOPE: Dict[str, str] = {}
+    PERIOD = "(SELECT d.full_date FROM dim_date d WHERE d.date_id = s.date_id)"
+
+    # Summary prefix -> fact column; each gets <prefix>_sum and <prefix>_count
+    AVERAGED = {
+        "temperature": "temperature_celsius",
+        "humidity": "humidity_percent",
+        "wind_speed": "wind_speed_mps",
+    }
+
+    AGGREGATE_COLUMNS = (
+        ["measurement_count"]
+        + [f"{prefix}_{part}" for prefix in AVERAGED for part in ("sum", "count")]
+        + ["temperature_min", "temperature_max"]
+    )
+
+    def __init__(self, database: Optional[DatabaseConnection] = None):
+        self.db = database or db
+        self._enabled = None
+
+    def enabled(self) -> bool:
+        """Whether the summary table exists in this warehouse."""
+        if self._enabled is None:
+            rows = self.db.execute_query("SELECT to_regclass(:table)", {"table": self.TABLE})
+            self._enabled = rows[0][0] is not None
+        return self._enabled
+
+    def _aggregates(self, source_columns: List[str]) -> List[str]:
+        """Aggregate expressions in AGGREGATE_COLUMNS order over rows with source_columns."""
+        expressions = ["COUNT(*)"]
+        for column in self.AVERAGED.values():
+            if column in source_columns:
+                expressions += [f"SUM({column})", f"COUNT({column})"]
+            else:
+                expressions += ["NULL", "0"]
+        expressions += ["MIN(temperature_celsius)", "MAX(temperature_celsius)"]
+        return expressions
+
+    def upsert_sql(self, source: str, source_columns: List[str]) -> str:
+        """
+        Statement folding the rows of source into the summary.
+
+        Args:
+            source: Table or CTE name with location_id, date_id, time_id,
+                recorded_at and measures
+            source_columns: Measure columns available in source
+        """
+        keys = ", ".join(self.KEYS)
+        key_expressions = ", ".join(self.KEYS.values())
+        columns = ", ".join(self.AGGREGATE_COLUMNS)
+        aggregates = ", ".join(self._aggregates(source_columns))
+        merges = ["measurement_count = s.measurement_count + EXCLUDED.measurement_count"]
+        for prefix in self.AVERAGED:
+            merges.append(f"{prefix}_sum = CASE WHEN s.{prefix}_sum IS NULL THEN EXCLUDED.{prefix}_sum "
+                          f"WHEN EXCLUDED.{prefix}_sum IS NULL THEN s.{prefix}_sum "
+                          f"ELSE s.{prefix}_sum + EXCLUDED.{prefix}_sum END")
+            merges.append(f"{prefix}_count = s.{prefix}_count + EXCLUDED.{prefix}_count")
+        merges += [
+            "temperature_min = LEAST(s.temperature_min, EXCLUDED.temperature_min)",
+            "temperature_max = GREATEST(s.temperature_max, EXCLUDED.temperature_max)",
+            "updated_at = CURRENT_TIMESTAMP",
+        ]
+        return f"""
+            INSERT INTO {self.TABLE} AS s ({keys}, {columns})
+            SELECT {key_expressions}, {aggregates}
+            FROM {source}
+            GROUP BY {key_expressions}
+            ON CONFLICT ({keys}) DO UPDATE SET {", ".join(merges)}
+        """
+
+    def _recompute_sql(self, where: str = "TRUE") -> str:
+        key_expressions = ", ".join(self.KEYS.values())
+        aggregates = ", ".join(self._aggregates(list(self.AVERAGED.values())))
+        return f"""
+            SELECT {key_expressions}, {aggregates}
+            FROM fact_weather_measurements
+            WHERE {where}
+            GROUP BY {key_expressions}
+        """
+
+    def recompute_groups(self, groups: List[tuple]):
+        """
+        Recompute the groups covering selected (location_id, date_id) pairs from the fact table.
+
+        Used after facts are deleted or rewritten outside the loader.
+        """
+        if not groups or not self.enabled():
+            return
+        keys = ", ".join(self.KEYS)
+        columns = ", ".join(self.AGGREGATE_COLUMNS)
+        params = {"locations": [int(g[0]) for g in groups], "dates": [int(g[1]) for g in groups]}
+        scope = f"""
+            SELECT DISTINCT {", ".join(self.SCOPE.values())}
+            FROM UNNEST(CAST(:locations AS INT[]), CAST(:dates AS INT[])) AS g (location_id, date_id)
+            JOIN dim_date USING (date_id)
+        """
+        in_scope = f"({', '.join(self.SCOPE)}) IN ({scope})"
+        in_fact_scope = f"({', '.join(self.KEYS[key] for key in self.SCOPE)}) IN ({scope})"
+        with self.db.unit_of_work():
+            self.db.execute_query(f"DELETE FROM {self.TABLE} WHERE {in_scope}", params)
+            self.db.execute_query(f"INSERT INTO {self.TABLE} ({keys}, {columns}) "
+                                  f"{self._recompute_sql(in_fact_scope)}", params)
+
+    def rebuild(self):
+        """Replace the summary with a full recompute from the fact table."""
+        keys = ", ".join(self.KEYS)
+        columns = ", ".join(self.AGGREGATE_COLUMNS)
+        with self.db.unit_of_work():
+            self.db.execute_query(f"DELETE FROM {self.TABLE}")
+            self.db.execute_query(f"INSERT INTO {self.TABLE} ({keys}, {columns}) "
+                                  f"{self._recompute_sql()}")
+        logger.success(f"Rebuilt {self.TABLE}")
+
+    def verify(self, limit: int = 20, since: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        Compare the summary with a full recompute from the fact table.
+
+        Args:
+            limit: Most mismatches to return
+            since: Only compare groups from this month start on, e.g. past
+                the facts moved to the cold tier
+
+        Returns:
+            Up to limit mismatching groups, keyed by KEYS; empty if consistent
+        """
+        keys = list(self.KEYS)
+        columns = ", ".join(self.AGGREGATE_COLUMNS)
+        differs = " OR ".join(f"s.{column} IS DISTINCT FROM f.{column}"
+                              for column in self.AGGREGATE_COLUMNS)
+        rows = self.db.execute_query(f"""
+            WITH f ({", ".join(keys)}, {columns}) AS (
+                     {self._recompute_sql("CAST(:since AS DATE) IS NULL OR recorded_at >= :since")}
+                 ),
+                 s AS (
+                     SELECT * FROM {self.TABLE} s
+                     WHERE CAST(:since AS DATE) IS NULL OR {self.PERIOD} >= :since
+                 )
+            SELECT {", ".join(f"COALESCE(s.{key}, f.{key})" for key in keys)},
+                   s.measurement_count, f.measurement_count
+            FROM s
+            FULL OUTER JOIN f ON {" AND ".join(f"s.{key} = f.{key}" for key in keys)}
+            WHERE s.location_id IS NULL OR f.location_id IS NULL OR {differs}
+            ORDER BY {", ".join(str(i + 1) for i in range(len(keys)))}
+            LIMIT :limit
+        """, {"limit": limit, "since": since})
+        return [{**dict(zip(keys, row)), "summary_count": row[-2], "fact_count": row[-1]}
+                for row in rows]
+
+
+class HourlySummaryMaintainer(SummaryMaintainer):
+    """agg_hourly_weather_summary: one group per location, day and hour."""
+
+    TABLE = "agg_hourly_weather_summary"
+    KEYS = {"location_id": "location_id", "date_id": "date_id", "time_id": "time_id"}
+    SCOPE = {"location_id": "location_id", "date_id": "date_id"}
+
+
+class DailySummaryMaintainer(SummaryMaintainer):
+    """agg_daily_weather_summary: one group per location and day."""
+
+    TABLE = "agg_daily_weather_summary"
+    KEYS = {"location_id": "location_id", "date_id": "date_id"}
+    SCOPE = {"location_id": "location_id", "date_id": "date_id"}
+
+
+class MonthlySummaryMaintainer(SummaryMaintainer):
+    """agg_monthly_weather_summary: one group per location and calendar month."""
+
+    TABLE = "agg_monthly_weather_summary"
+    KEYS = {"location_id": "location_id",
+            "month_start": "CAST(date_trunc('month', recorded_at) AS DATE)"}
+    SCOPE = {"location_id": "location_id",
+             "month_start": "CAST(date_trunc('month', full_date) AS DATE)"}
+    PERIOD = "s.month_start"
+
+
+def maintainers(database: Optional[DatabaseConnection] = None) -> List[SummaryMaintainer]:
+    """One maintainer per rollup grain, finest first."""
+    return [HourlySummaryMaintainer(database), DailySummaryMaintainer(database),
+            MonthlySummaryMaintainer(database)]
+
+
+def recompute_groups(groups: List[tuple], database: Optional[DatabaseConnection] = None):
+    """Recompute every rollup's groups covering (location_id, date_id) pairs."""
+    for maintainer in (rollups if database is None else maintainers(database)):
+        maintainer.recompute_groups(groups)
+
+
+# Process-wide summary maintainers shared by loaders
+hourly_summary, summary, monthly_summary = rollups = maintainers()
@@ -0,0 +1,84 @@
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+from utils.database import db, DatabaseConnection
+from config.config import settings
+
+
+class LoadWatermark:
+    """
+    Version counter advanced by every committed load.
+
+    The loader calls advance() for each batch it writes; the row in
+    etl_load_watermark is updated once per unit of work, just before it
+    commits, so concurrent shard loads only contend for it briefly.
+    version() lets readers such as the query cache notice new data: loads
+    in this process are seen at once, loads elsewhere within
+    poll_interval seconds.
+    """
+
+    TABLE = "etl_load_watermark"
+
+    def __init__(self, database: Optional[DatabaseConnection] = None,
+                 poll_interval: Optional[float] = None):
+        self.db = database or db
+        self.poll_interval = settings.query_watermark_poll_seconds if poll_interval is None else poll_interval
+        self._enabled = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._version = None
+        self._checked_at = 0.0
+
+    def enabled(self) -> bool:
+        """Whether the watermark table exists in this warehouse."""
+        if self._enabled is None:
+            rows = self.db.execute_query("SELECT to_regclass(:table)", {"table": self.TABLE})
+            self._enabled = rows[0][0] is not None
+        return self._enabled
+
+    def advance(self, loaded_through: datetime):
+        """Record that readings up to loaded_through are part of the current unit of work."""
+        if not self.db.in_unit_of_work or not self.enabled():
+            return
+        pending = getattr(self._local, "loaded_through", None)
+        self._local.loaded_through = loaded_through if pending is None else max(pending, loaded_through)
+        self.db.before_commit(self, self._write)
+        self.db.on_rollback(self._discard)
+
+    def _write(self):
+        loaded_through = self._local.loaded_through
+        self._local.loaded_through = None
+        rows = self.db.execute_query(f"""
+            UPDATE {self.TABLE}
+            SET version = version + 1,
+                loaded_through = GREATEST(loaded_through, :loaded_through),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = 1
+            RETURNING version
+        """, {"loaded_through": loaded_through})
+        if rows:
+            self.db.after_commit(self, lambda: self._seen(rows[0][0]))
+
+    def _discard(self):
+        self._local.loaded_through = None
+
+    def _seen(self, version: int):
+        with self._lock:
+            self._version = max(self._version or 0, version)
+            self._checked_at = time.monotonic()
+
+    def version(self) -> int:
+        """Latest committed load version (0 when the table is missing)."""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.poll_interval:
+            return self._version
+        if not self.enabled():
+            return 0
+        rows = self.db.execute_query(f"SELECT version FROM {self.TABLE} WHERE id = 1")
+        self._seen(rows[0][0] if rows else 0)
+        return self._version
+
+
+# Process-wide watermark shared by loaders and the query cache
+watermark = LoadWatermark()
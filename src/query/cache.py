@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from utils.metrics import metrics
+from load.watermark import LoadWatermark, watermark
+from config.config import settings
+
+
+class QueryCache:
+    """
+    In-process LRU cache of query results, keyed on the load watermark.
+
+    Every key is combined with the watermark version current at lookup
+    time. When a load commits the version moves on, the entries computed
+    against older data are dropped and the next call recomputes.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None,
+                 load_watermark: Optional[LoadWatermark] = None):
+        self.max_entries = max_entries or settings.query_cache_max_entries
+        self.watermark = load_watermark or watermark
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for key, computing and storing it on a miss."""
+        version = self.watermark.version()
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._version = version
+            versioned = (version, key)
+            if versioned in self._entries:
+                self._entries.move_to_end(versioned)
+                self.hits += 1
+                metrics.inc("query_cache_lookups_total", result="hit")
+                return self._entries[versioned]
+            self.misses += 1
+        metrics.inc("query_cache_lookups_total", result="miss")
+
+        result = compute()
+        with self._lock:
+            # A load that landed while computing makes the result stale already
+            if self._version == version:
+                self._entries[versioned] = result
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations,
+                "entries": len(self._entries), "version": self._version}
+
+
+# Process-wide cache shared by the query functions
+query_cache = QueryCache()
@@ -0,0 +1,60 @@
+"""
+Range reads over hot and cold facts.
+
+weather_data() answers the queries v_weather_data answers over recent
+facts for any range: rows still in fact_weather_measurements come from
+the view, rows moved to the cold tier from its Parquet files, pruned by
+location and recorded_at before they are opened. Ranges are half-open,
+[start, end).
+"""
+from typing import Optional
+import pandas as pd
+from utils.metrics import metrics
+from load.cold_tier import VIEW_COLUMNS, ColdTier, cold_tier
+from query.weather import Moment, _as_datetime
+from transform.measurements import INTEGER_COLUMNS
+
+# Nullable integers, so a missing reading is NA whichever tier it came from
+_INTEGER_TYPES = {name: "Int64" for name in VIEW_COLUMNS if name in INTEGER_COLUMNS}
+
+
+def weather_data(start: Moment, end: Moment, city: Optional[str] = None, country: Optional[str] = None,
+                 archive: Optional[ColdTier] = None) -> pd.DataFrame:
+    """
+    Readings recorded in [start, end), with the columns of v_weather_data.
+
+    Args:
+        start: First moment included
+        end: First moment excluded
+        city: Only this city
+        country: Only this country (or, with city, the city in this country)
+        archive: Cold tier to read (default: the process-wide one)
+
+    Returns:
+        One row per reading, ordered by recorded_at, city and country
+    """
+    archive = archive or cold_tier
+    params = {"start": _as_datetime(start), "end": _as_datetime(end), "city": city, "country": country}
+    places = "(CAST(:city AS TEXT) IS NULL OR city_name = :city) " \
+             "AND (CAST(:country AS TEXT) IS NULL OR country = :country)"
+    with metrics.span("query", query="weather_data", source="fact"):
+        hot = pd.DataFrame(archive.db.execute_query(
+            f"SELECT {', '.join(VIEW_COLUMNS)} FROM v_weather_data "
+            f"WHERE recorded_at >= :start AND recorded_at < :end AND {places}", params
+        ) or [], columns=VIEW_COLUMNS)
+
+    location_ids = None
+    if city is not None or country is not None:
+        location_ids = [row[0] for row in archive.db.execute_query(
+            f"SELECT location_id FROM dim_location WHERE {places}", params
+        )]
+    with metrics.span("query", query="weather_data", source="cold"):
+        cold = pd.DataFrame(columns=VIEW_COLUMNS) if location_ids == [] else \
+            archive.read(params["start"], params["end"], location_ids, VIEW_COLUMNS) \
+            .to_pandas(coerce_temporal_nanoseconds=True)
+
+    frames = [frame for frame in (hot, cold) if len(frame)]
+    if not frames:
+        return hot.astype(_INTEGER_TYPES)
+    return pd.concat(frames, ignore_index=True).astype(_INTEGER_TYPES) \
+        .sort_values(["recorded_at", "city_name", "country"], kind="stable", ignore_index=True)
@@ -0,0 +1,261 @@
+"""
+Typed analytical queries over the warehouse.
+
+Each query is answered from the coarsest rollup that holds its answer
+exactly: agg_monthly_weather_summary, agg_daily_weather_summary or
+agg_hourly_weather_summary when the requested granularity is no finer than
+the rollup's and the range falls on its boundaries, and the fact table
+otherwise. The rollups keep the groups of months moved to the cold tier;
+fact-table queries reaching into those months read their readings from
+the archive. Ranges are half-open, [start, end). Results are cached in
+process until the next load commits.
+"""
+import functools
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional, Union
+from utils.database import db
+from utils.metrics import metrics
+from load.cold_tier import cold_tier
+from load.summary import SummaryMaintainer, rollups
+from query.cache import query_cache
+
+Moment = Union[date, datetime]
+
+# Finest first; a rollup can answer queries at its own grain or coarser
+GRAINS = ["hour", "day", "month"]
+
+# Every source yields these columns per row, so queries aggregate them the same way
+_SOURCE_COLUMNS = ("location_id, period_start, measurement_count, temperature_sum, temperature_count, "
+                   "temperature_min, temperature_max, humidity_sum, humidity_count")
+
+_ROLLUP_MEASURES = ("s.measurement_count, s.temperature_sum, s.temperature_count, s.temperature_min, "
+                    "s.temperature_max, s.humidity_sum, s.humidity_count")
+
+_FACT_MEASURES = """s.location_id, date_trunc('hour', s.recorded_at) AS period_start, 1 AS measurement_count,
+               s.temperature_celsius AS temperature_sum,
+               CAST(s.temperature_celsius IS NOT NULL AS INT) AS temperature_count,
+               s.temperature_celsius AS temperature_min, s.temperature_celsius AS temperature_max,
+               s.humidity_percent AS humidity_sum, CAST(s.humidity_percent IS NOT NULL AS INT) AS humidity_count"""
+
+_SOURCES = {
+    "month": f"""
+        SELECT s.location_id, CAST(s.month_start AS TIMESTAMP) AS period_start, {_ROLLUP_MEASURES}
+        FROM agg_monthly_weather_summary s
+        WHERE s.month_start >= :start AND s.month_start < :end {{locations}}
+    """,
+    "day": f"""
+        SELECT s.location_id, CAST(d.full_date AS TIMESTAMP) AS period_start, {_ROLLUP_MEASURES}
+        FROM agg_daily_weather_summary s
+        JOIN dim_date d ON s.date_id = d.date_id
+        WHERE d.full_date >= :start AND d.full_date < :end {{locations}}
+    """,
+    "hour": f"""
+        SELECT s.location_id, d.full_date + t.hour * INTERVAL '1 hour' AS period_start, {_ROLLUP_MEASURES}
+        FROM agg_hourly_weather_summary s
+        JOIN dim_date d ON s.date_id = d.date_id
+        JOIN dim_time t ON s.time_id = t.time_id
+        WHERE d.full_date >= CAST(:start AS DATE) AND d.full_date <= CAST(:end AS DATE)
+          AND d.full_date + t.hour * INTERVAL '1 hour' >= :start
+          AND d.full_date + t.hour * INTERVAL '1 hour' < :end {{locations}}
+    """,
+    "fact": f"""
+        SELECT {_FACT_MEASURES}
+        FROM fact_weather_measurements s
+        WHERE s.recorded_at >= :start AND s.recorded_at < :end {{locations}}
+        UNION ALL
+        SELECT {_FACT_MEASURES}
+        FROM UNNEST(CAST(:archived_locations AS INT[]), CAST(:archived_recorded_at AS TIMESTAMP[]),
+                    CAST(:archived_temperatures AS NUMERIC[]), CAST(:archived_humidities AS INT[]))
+             AS s (location_id, recorded_at, temperature_celsius, humidity_percent)
+        WHERE TRUE {{locations}}
+    """,
+}
+
+# Query parameter -> cold-tier column of the archived readings the "fact" source reads
+_ARCHIVED_COLUMNS = {
+    "archived_locations": "location_id",
+    "archived_recorded_at": "recorded_at",
+    "archived_temperatures": "temperature_celsius",
+    "archived_humidities": "humidity_percent",
+}
+
+_CITY_FILTER = ("AND s.location_id IN (SELECT location_id FROM dim_location "
+                "WHERE city_name = :city AND (CAST(:country AS TEXT) IS NULL OR country = :country))")
+_COUNTRY_FILTER = ("AND s.location_id IN (SELECT location_id FROM dim_location "
+                   "WHERE CAST(:country AS TEXT) IS NULL OR country = :country)")
+
+
+@dataclass(frozen=True)
+class TemperaturePoint:
+    """Temperature aggregates of one city over one period."""
+    period: datetime
+    avg_celsius: Optional[float]
+    min_celsius: Optional[float]
+    max_celsius: Optional[float]
+    readings: int
+
+
+@dataclass(frozen=True)
+class CityTemperature:
+    """Hottest reading of one city over a range."""
+    city: str
+    country: str
+    max_celsius: float
+    avg_celsius: Optional[float]
+
+
+@dataclass(frozen=True)
+class CountryMonth:
+    """Averages over every location of one country in one month."""
+    country: str
+    month: date
+    avg_celsius: Optional[float]
+    min_celsius: Optional[float]
+    max_celsius: Optional[float]
+    avg_humidity: Optional[float]
+    readings: int
+
+
+def _as_datetime(moment: Moment) -> datetime:
+    return moment if isinstance(moment, datetime) else datetime.combine(moment, datetime.min.time())
+
+
+def _aligned(moment: datetime, grain: str) -> bool:
+    """Whether moment falls on a boundary of grain."""
+    if moment.minute or moment.second or moment.microsecond:
+        return False
+    if grain == "hour":
+        return True
+    if moment.hour:
+        return False
+    return grain == "day" or moment.day == 1
+
+
+def _maintainers() -> Dict[str, SummaryMaintainer]:
+    return dict(zip(GRAINS, rollups))
+
+
+def route(start: Moment, end: Moment, granularity: Optional[str] = None) -> str:
+    """
+    Name of the source that answers a query over [start, end).
+
+    Args:
+        granularity: Grain of the result ("hour", "day" or "month"); None
+            when the query aggregates the whole range
+
+    Returns:
+        "month", "day" or "hour" for a rollup, "fact" for the fact table
+        and, in archived months, the cold tier
+    """
+    if granularity is not None and granularity not in GRAINS:
+        raise ValueError(f"granularity must be one of {GRAINS}, not {granularity!r}")
+    start, end = _as_datetime(start), _as_datetime(end)
+    finest = GRAINS.index(granularity) if granularity else len(GRAINS) - 1
+    maintainers = _maintainers()
+    for grain in reversed(GRAINS[:finest + 1]):
+        if _aligned(start, grain) and _aligned(end, grain) and maintainers[grain].enabled():
+            return grain
+    return "fact"
+
+
+def _archived(name: str, source: str, start: datetime, end: datetime) -> Dict[str, list]:
+    """
+    Parameters carrying the readings of [start, end) moved to the cold tier.
+
+    Only the "fact" source reads them; the rollups still hold archived months.
+    """
+    params = {param: [] for param in _ARCHIVED_COLUMNS}
+    through = cold_tier.archived_through() if source == "fact" else None
+    if through is None or start >= _as_datetime(through):
+        return params
+    with metrics.span("query", query=name, source="cold"):
+        table = cold_tier.read(start, min(end, _as_datetime(through)), columns=list(_ARCHIVED_COLUMNS.values()))
+    return {param: table.column(column).to_pylist() for param, column in _ARCHIVED_COLUMNS.items()}
+
+
+def _run(name: str, source: str, sql: str, params: Dict[str, Any]) -> List[tuple]:
+    params = {**params, **_archived(name, source, params["start"], params["end"])}
+    with metrics.span("query", query=name, source=source):
+        return db.execute_query(sql, params) or []
+
+
+def _float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def cached(func):
+    """Serve repeated calls with the same arguments from query_cache until the next load."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        return list(query_cache.get_or_compute(key, lambda: tuple(func(*args, **kwargs))))
+    return wrapper
+
+
+@cached
+def temperature_series(city: str, start: Moment, end: Moment, granularity: str = "day",
+                       country: Optional[str] = None) -> List[TemperaturePoint]:
+    """
+    Temperature of a city per hour, day or month over [start, end).
+
+    Args:
+        city: City name
+        start: First moment included
+        end: First moment excluded
+        granularity: "hour", "day" or "month"
+        country: Country, to disambiguate cities sharing a name
+    """
+    source = route(start, end, granularity)
+    rows = _run("temperature_series", source, f"""
+        SELECT date_trunc(:granularity, period_start) AS period,
+               SUM(temperature_sum) / NULLIF(SUM(temperature_count), 0),
+               MIN(temperature_min), MAX(temperature_max), SUM(measurement_count)
+        FROM ({_SOURCES[source].format(locations=_CITY_FILTER)}) AS src ({_SOURCE_COLUMNS})
+        GROUP BY 1
+        ORDER BY 1
+    """, {"city": city, "country": country, "granularity": granularity,
+          "start": _as_datetime(start), "end": _as_datetime(end)})
+    return [TemperaturePoint(row[0], _float(row[1]), _float(row[2]), _float(row[3]), int(row[4]))
+            for row in rows]
+
+
+@cached
+def hottest_cities(start: Moment, end: Moment, limit: int = 10) -> List[CityTemperature]:
+    """The limit cities with the highest temperature reading over [start, end)."""
+    source = route(start, end)
+    rows = _run("hottest_cities", source, f"""
+        SELECT l.city_name, l.country, MAX(src.temperature_max),
+               SUM(src.temperature_sum) / NULLIF(SUM(src.temperature_count), 0)
+        FROM ({_SOURCES[source].format(locations="")}) AS src ({_SOURCE_COLUMNS})
+        JOIN dim_location l ON src.location_id = l.location_id
+        GROUP BY l.location_id, l.city_name, l.country
+        HAVING MAX(src.temperature_max) IS NOT NULL
+        ORDER BY 3 DESC, 1
+        LIMIT :limit
+    """, {"start": _as_datetime(start), "end": _as_datetime(end), "limit": limit})
+    return [CityTemperature(row[0], row[1], float(row[2]), _float(row[3])) for row in rows]
+
+
+@cached
+def country_monthly_averages(start: Moment, end: Moment,
+                             country: Optional[str] = None) -> List[CountryMonth]:
+    """
+    Per-country monthly averages over [start, end), optionally for one country.
+
+    Months cut by the range boundaries only cover the part inside it.
+    """
+    source = route(start, end, "month")
+    rows = _run("country_monthly_averages", source, f"""
+        SELECT l.country, CAST(date_trunc('month', src.period_start) AS DATE),
+               SUM(src.temperature_sum) / NULLIF(SUM(src.temperature_count), 0),
+               MIN(src.temperature_min), MAX(src.temperature_max),
+               SUM(src.humidity_sum) / NULLIF(SUM(src.humidity_count), 0),
+               SUM(src.measurement_count)
+        FROM ({_SOURCES[source].format(locations=_COUNTRY_FILTER)}) AS src ({_SOURCE_COLUMNS})
+        JOIN dim_location l ON src.location_id = l.location_id
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """, {"country": country, "start": _as_datetime(start), "end": _as_datetime(end)})
+    return [CountryMonth(row[0], row[1], _float(row[2]), _float(row[3]), _float(row[4]),
+                         _float(row[5]), int(row[6])) for row in rows]
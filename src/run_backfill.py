@@ -0,0 +1,132 @@
+"""Historical backfill of hourly weather data."""
+import sys
+from pathlib import Path
+
+# Add project root to Python path so we can import from config and src
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+from config.locations import get_registry
+from extract.open_meteo import OpenMeteoExtractor
+from load.loader import UPDATE, WeatherLoader
+from utils.logger import logger
+from utils.database import db
+from src.config.config import settings
+
+
+def split_windows(start: date, end: date, window_days: int) -> List[Tuple[date, date]]:
+    """Split an inclusive date range into consecutive windows of at most window_days."""
+    windows = []
+    window_start = start
+    while window_start <= end:
+        window_end = min(window_start + timedelta(days=window_days - 1), end)
+        windows.append((window_start, window_end))
+        window_start = window_end + timedelta(days=1)
+    return windows
+
+
+class BackfillCheckpoint:
+    """Append-only record of the (city, window) pairs already loaded."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._done = set()
+        if self.path.exists():
+            self._done = set(line.strip() for line in self.path.read_text().splitlines() if line.strip())
+
+    @staticmethod
+    def _key(city: str, window: Tuple[date, date]) -> str:
+        return f"{city}|{window[0].isoformat()}|{window[1].isoformat()}"
+
+    def is_done(self, city: str, window: Tuple[date, date]) -> bool:
+        return self._key(city, window) in self._done
+
+    def mark_done(self, city: str, window: Tuple[date, date]):
+        key = self._key(city, window)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as f:
+                f.write(key + "\n")
+            self._done.add(key)
+
+
+def backfill(cities: List[str], start: date, end: date,
+             window_days: Optional[int] = None, max_workers: Optional[int] = None,
+             checkpoint_path: Optional[Path] = None,
+             extractor: Optional[OpenMeteoExtractor] = None) -> int:
+    """
+    Backfill hourly readings for cities over a date range.
+
+    Each (city, window) pair is fetched, parsed into a WeatherBatch and
+    loaded on its own, so memory stays flat regardless of the range. Pairs
+    recorded in the checkpoint file are skipped.
+
+    Returns:
+        Number of rows loaded
+    """
+    window_days = window_days or settings.backfill_window_days
+    max_workers = max_workers or settings.extract_max_workers
+    checkpoint = BackfillCheckpoint(checkpoint_path or settings.backfill_checkpoint_path)
+    owns_extractor = extractor is None
+    extractor = extractor or OpenMeteoExtractor(max_workers=max_workers)
+    # History lies behind the freshness watermarks, so it is never skipped as unchanged;
+    # archived values replace the readings already loaded for the same hour
+    loader = WeatherLoader(skip_unchanged=False, on_conflict=UPDATE)
+
+    tasks = [(city, window) for city in cities
+             for window in split_windows(start, end, window_days)
+             if not checkpoint.is_done(city, window)]
+    logger.info(f"Backfilling {len(tasks)} (city, window) pairs from {start} to {end}")
+
+    def run_task(city: str, window: Tuple[date, date]) -> int:
+        batch = extractor.get_hourly_history(city, *window)
+        if batch is None:
+            # Left out of the checkpoint, so the next run retries it
+            raise RuntimeError("no history fetched")
+        result = loader.load_batch(batch)
+        checkpoint.mark_done(city, window)
+        return result.loaded
+
+    loaded = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_task, city, window): (city, window) for city, window in tasks}
+        for future in as_completed(futures):
+            city, window = futures[future]
+            try:
+                loaded += future.result()
+            except Exception as e:
+                failed += 1
+                logger.error(f"Backfill failed for {city} {window[0]} to {window[1]}: {e}")
+
+    if owns_extractor:
+        extractor.close()
+
+    logger.success(f"Backfill complete. Loaded {loaded} records, {failed} windows failed")
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill hourly weather history")
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True)
+    parser.add_argument("--cities", nargs="+", default=None,
+                        help="City names (default: every location in the registry)")
+    parser.add_argument("--window-days", type=int, default=settings.backfill_window_days)
+    parser.add_argument("--workers", type=int, default=settings.extract_max_workers)
+    parser.add_argument("--checkpoint", type=Path, default=settings.backfill_checkpoint_path)
+    args = parser.parse_args()
+
+    db.initialize()
+    backfill(args.cities or get_registry().cities(), args.start, args.end,
+             args.window_days, args.workers, args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
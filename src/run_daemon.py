@@ -0,0 +1,268 @@
+"""Long-running streaming weather ETL daemon."""
+import sys
+from pathlib import Path
+
+# Add project root to Python path so we can import from config and src
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import math
+import queue
+import signal
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence
+from extract.open_meteo import OpenMeteoExtractor
+from load.freshness import freshness
+from load.loader import LoadResult, WeatherLoader
+from transform.batch import WeatherBatch
+from utils.logger import logger
+from utils.database import db
+from utils.metrics import metrics
+from src.config.config import settings
+
+# Queued by the last producer to stop; the consumer flushes and exits on it
+_DONE = object()
+
+
+def next_slot(now: float, interval: float, offset: float = 0.0) -> float:
+    """Epoch time of the first poll at or after now: a multiple of interval, plus offset."""
+    return math.ceil((now - offset) / interval) * interval + offset
+
+
+class MicroBatcher:
+    """
+    Readings buffered for the loader and loaded together once there are
+    max_rows of them or the oldest has waited max_seconds.
+
+    A failed flush keeps its readings for the next one; loads are
+    idempotent, so a retry of a batch that partly landed adds nothing
+    twice. After max_attempts failures in a row the readings are dropped.
+    """
+
+    def __init__(self, loader: WeatherLoader, max_rows: int, max_seconds: float,
+                 max_attempts: int = 3, clock: Callable[[], float] = time.monotonic):
+        self.loader = loader
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.totals = LoadResult()
+        self._pending: List[WeatherBatch] = []
+        self._rows = 0
+        self._since = 0.0
+        self._failures = 0
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    def add(self, batch: WeatherBatch):
+        if not len(batch):
+            return
+        if not self._pending:
+            self._since = self.clock()
+        self._pending.append(batch)
+        self._rows += len(batch)
+        # After a failure, wait for the time trigger instead of retrying on every batch
+        if self._rows >= self.max_rows and not self._failures:
+            self.flush("size")
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Time left before the buffered readings must be flushed, None while empty."""
+        if not self._pending:
+            return None
+        return max(0.0, self._since + self.max_seconds - self.clock())
+
+    def flush(self, reason: str = "time") -> Optional[LoadResult]:
+        """Load the buffered readings as one batch; None when empty or the load failed."""
+        if not self._pending:
+            return None
+        batch = WeatherBatch.concat(self._pending)
+        try:
+            with metrics.span("stage", stage="load"):
+                result = self.loader.load_batch(batch)
+        except Exception as e:
+            self._failures += 1
+            metrics.inc("daemon_flush_failures_total")
+            if self._failures >= self.max_attempts:
+                logger.error(f"Dropping {self._rows} readings after {self._failures} failed loads: {e}")
+                self._clear()
+            else:
+                logger.error(f"Loading {self._rows} readings failed, retrying on the next flush: {e}")
+                self._since = self.clock()
+            return None
+
+        metrics.inc("daemon_flushes_total", reason=reason)
+        metrics.observe("daemon_flush_rows", len(batch), buckets=(10, 100, 1000, 10_000, 100_000))
+        self.totals.loaded += result.loaded
+        self.totals.skipped += result.skipped
+        self.totals.conflicts += result.conflicts
+        self.totals.updated += result.updated
+        self.totals.rejects.extend(result.rejects)
+        self._clear()
+        return result
+
+    def drain(self):
+        """Flush until nothing is buffered, retrying failed loads at once."""
+        while self._pending:
+            self.flush("shutdown")
+
+    def _clear(self):
+        self._pending = []
+        self._rows = 0
+        self._failures = 0
+
+
+class StreamingDaemon:
+    """
+    Polls current weather every slot and streams it into the warehouse.
+
+    Producer threads each own an extractor and a shard of the locations.
+    At every poll time (a multiple of interval, offset seconds after the
+    provider's update slot) they extract their shard batch by batch onto
+    a bounded queue; when loading falls behind the queue fills and the
+    producers block, so memory stays bounded. One consumer thread drains
+    the queue into a MicroBatcher. Locations already loaded for the
+    current slot are skipped through the freshness watermarks, so a
+    restart within a slot does not poll them again.
+
+    stop() ends polling: producers stop after their current batch and the
+    consumer loads everything queued and buffered before run() returns.
+    """
+
+    def __init__(self, extractor_factory: Optional[Callable[[], OpenMeteoExtractor]] = None,
+                 loader: Optional[WeatherLoader] = None, producers: Optional[int] = None,
+                 interval: Optional[float] = None, offset: Optional[float] = None,
+                 queue_size: Optional[int] = None, flush_rows: Optional[int] = None,
+                 flush_seconds: Optional[float] = None, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            extractor_factory: Builds one extractor per producer (default:
+                OpenMeteoExtractor with the freshness watermarks)
+            loader: Loader for the micro-batches
+            producers: Producer threads, each polling a shard of the locations
+            interval: Seconds between polls, aligned to the epoch
+            offset: Seconds after each slot boundary to poll, for the provider to publish
+            queue_size: Request batches queued between producers and the consumer
+            flush_rows: Buffered readings that trigger a load
+            flush_seconds: Longest a reading waits in the buffer
+        """
+        self.extractor_factory = extractor_factory or (lambda: OpenMeteoExtractor(freshness=freshness))
+        self.loader = loader or WeatherLoader()
+        self.producers = max(1, producers or settings.daemon_producers)
+        self.interval = interval or settings.daemon_poll_interval_seconds
+        self.offset = settings.daemon_slot_offset_seconds if offset is None else offset
+        self.clock = clock
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size or settings.daemon_queue_size)
+        self.batcher = MicroBatcher(self.loader, flush_rows or settings.daemon_flush_rows,
+                                    settings.daemon_flush_seconds if flush_seconds is None else flush_seconds)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._running = 0
+
+    def stop(self):
+        """Stop polling and let run() return once in-flight readings are loaded (signal-safe)."""
+        self._stop.set()
+
+    def _produce(self, shard: int, max_slots: Optional[int]):
+        extractor = None
+        try:
+            extractor = self.extractor_factory()
+            locations = extractor.registry.shard(shard, self.producers)
+            polled = 0
+            while not self._stop.is_set() and (max_slots is None or polled < max_slots):
+                slot = next_slot(self.clock(), self.interval, self.offset)
+                if self._stop.wait(max(0.0, slot - self.clock())):
+                    break
+                try:
+                    self._poll(extractor, locations, slot, shard)
+                except Exception as e:
+                    metrics.inc("daemon_poll_failures_total")
+                    logger.error(f"Producer {shard} failed to poll: {e}")
+                polled += 1
+        except Exception as e:
+            logger.error(f"Producer {shard} stopped: {e}")
+        finally:
+            if extractor is not None:
+                extractor.close()
+            with self._lock:
+                self._running -= 1
+                last = self._running == 0
+            if last:
+                if self._stop.is_set():
+                    logger.info("Producers stopped; loading in-flight readings")
+                self.queue.put(_DONE)
+
+    def _poll(self, extractor: OpenMeteoExtractor, locations: Sequence[int], slot: float, shard: int):
+        started = time.perf_counter()
+        rows = 0
+        for batch in extractor.iter_city_batches(locations=locations):
+            if len(batch):
+                waiting = time.perf_counter()
+                self.queue.put(batch)
+                metrics.observe("daemon_queue_wait_seconds", time.perf_counter() - waiting)
+                rows += len(batch)
+            if self._stop.is_set():
+                break
+        metrics.throughput("extract", rows, time.perf_counter() - started)
+        logger.info(f"Producer {shard} polled the {datetime.fromtimestamp(slot):%H:%M} slot: "
+                    f"{rows} readings from {len(locations)} locations")
+
+    def _consume(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self.batcher.seconds_until_due())
+            except queue.Empty:
+                self.batcher.flush("time")
+                continue
+            if item is _DONE:
+                break
+            self.batcher.add(item)
+        self.batcher.drain()
+
+    def run(self, max_slots: Optional[int] = None) -> LoadResult:
+        """
+        Poll and load until stop() is called, or until each producer polled max_slots times.
+
+        Returns:
+            Totals over every micro-batch loaded
+        """
+        self._running = self.producers
+        threads = [threading.Thread(target=self._produce, args=(shard, max_slots), name=f"producer-{shard}")
+                   for shard in range(self.producers)]
+        consumer = threading.Thread(target=self._consume, name="consumer")
+        logger.info(f"Streaming every {self.interval:g}s with {self.producers} producers")
+        for thread in threads + [consumer]:
+            thread.start()
+        for thread in threads + [consumer]:
+            thread.join()
+
+        totals = self.batcher.totals
+        logger.success(f"Daemon stopped. Loaded {totals.loaded} records, skipped {totals.skipped} "
+                       f"unchanged, {totals.conflicts} already loaded")
+        return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--interval", type=float, default=settings.daemon_poll_interval_seconds,
+                        help="Seconds between polls, aligned to the provider's update slots")
+    parser.add_argument("--producers", type=int, default=settings.daemon_producers)
+    parser.add_argument("--slots", type=int, default=None, help="Exit after this many polls")
+    args = parser.parse_args()
+
+    db.initialize()
+    daemon = StreamingDaemon(producers=args.producers, interval=args.interval)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.stop())
+    daemon.run(max_slots=args.slots)
+    if metrics.enabled:
+        paths = metrics.write("daemon")
+        logger.info(f"Daemon metrics written to {paths['prometheus']} and {paths['summary']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,69 +6,23 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from datetime import datetime
-from extract.open_meteo import OpenMeteoExtractor
+import time
+from typing import Dict, List, Any, Union
+from extract.multi import MultiProviderExtractor
+from load.freshness import freshness
+from load.loader import LoadResult, WeatherLoader
+from transform.batch import WeatherBatch
 from utils.logger import logger
 from utils.database import db
+from utils.metrics import metrics
 from src.config.config import settings
 
-def get_location_id(city: str, country: str) -> int:
-    query = """
-        SELECT location_id 
-        FROM dim_location 
-        WHERE city_name = :city AND country = :country
-    """
-    rows = db.execute_query(query, {"city": city, "country": country})
-    row = rows[0] if rows else None
-    return row[0] if row else None
-
-
-def get_date_id(date: datetime) -> int:
-    query = """
-        SELECT date_id 
-        FROM dim_date 
-        WHERE full_date = :date
-    """
-    rows = db.execute_query(query, {"date": date.date()})
-    row = rows[0] if rows else None
-    
-    if row:
-        return row[0]
-    
-    # If not exists, insert it
-    insert_query = """
-        INSERT INTO dim_date (full_date, year, quarter, month, month_name,
-                            week_of_year, day_of_month, day_of_week, day_name, is_weekend)
-        VALUES (:full_date, :year, :quarter, :month, :month_name,
-                :week_of_year, :day_of_month, :day_of_week, :day_name, :is_weekend)
-        RETURNING date_id
-    """
-    params = {
-        "full_date": date.date(),
-        "year": date.year,
-        "quarter": (date.month - 1) // 3 + 1,
-        "month": date.month,
-        "month_name": date.strftime("%B"),
-        "week_of_year": date.isocalendar()[1],
-        "day_of_month": date.day,
-        "day_of_week": date.weekday(),
-        "day_name": date.strftime("%A"),
-        "is_weekend": date.weekday() >= 5
-    }
-    
-    rows = db.execute_query(insert_query, params)
-    return rows[0][0]
-
-
-def get_time_id(date: datetime) -> int:
-    query = """
-        SELECT time_id 
-        FROM dim_time 
-        WHERE hour = :hour AND minute = :minute
-    """
-    rows = db.execute_query(query, {"hour": date.hour, "minute": 0})
-    row = rows[0] if rows else None
-    return row[0] if row else None
+def load_weather(weather_data: Union[WeatherBatch, List[Dict[str, Any]]]) -> LoadResult:
+    """Load extracted readings in one transaction."""
+    with metrics.span("stage", stage="load"), db.unit_of_work():
+        if isinstance(weather_data, WeatherBatch):
+            return WeatherLoader().load_batch(weather_data)
+        return WeatherLoader().load(weather_data)
 
 def run_etl():
     """Run the ETL process."""
@@ -79,60 +33,25 @@ def run_etl():
     
     # Extract
     logger.info("Starting extraction phase")
-    extractor = OpenMeteoExtractor()
-    weather_data = extractor.extract_all_cities()
-    extractor.close()
-    
-    if not weather_data:
+    started = time.perf_counter()
+    with metrics.span("stage", stage="extract"):
+        extractor = MultiProviderExtractor.from_settings(freshness=freshness)
+        weather_data = extractor.extract_all_cities()
+        extractor.close()
+    metrics.throughput("extract", len(weather_data), time.perf_counter() - started)
+    
+    if not len(weather_data):
         logger.error("No data extracted")
         return
     
-    # Load (we're skipping transform since we only need temperature)
+    # Load (readings are already transformed into columnar batches by the extractors)
     logger.info("Starting load phase")
-    loaded_count = 0
-    
-    for data in weather_data:
-        try:
-            # Get dimension IDs
-            location_id = get_location_id(data["city"], data["country"])
-            if not location_id:
-                logger.warning(f"Location not found: {data['city']}, {data['country']}")
-                continue
-            
-            date_id = get_date_id(data["recorded_at"])
-            time_id = get_time_id(data["recorded_at"])
-            
-            if not time_id:
-                logger.warning(f"Time not found for hour: {data['recorded_at'].hour}")
-                continue
-            
-            # Insert into fact table
-            insert_query = """
-                INSERT INTO fact_weather_measurements 
-                (location_id, date_id, time_id, temperature_celsius, temperature_fahrenheit,
-                 api_source, recorded_at)
-                VALUES (:location_id, :date_id, :time_id, :temp_c, :temp_f,
-                        :api_source, :recorded_at)
-            """
-            
-            params = {
-                "location_id": location_id,
-                "date_id": date_id,
-                "time_id": time_id,
-                "temp_c": data["temperature_celsius"],
-                "temp_f": data["temperature_fahrenheit"],
-                "api_source": data["api_source"],
-                "recorded_at": data["recorded_at"]
-            }
-            
-            db.execute_query(insert_query, params)
-            loaded_count += 1
-            logger.info(f"Loaded data for {data['city']}")
-            
-        except Exception as e:
-            logger.error(f"Error loading data for {data['city']}: {e}")
+    result = load_weather(weather_data)
     
-    logger.success(f"ETL complete. Loaded {loaded_count} records")
+    logger.success(f"ETL complete. Loaded {result.loaded} records")
+    if metrics.enabled:
+        paths = metrics.write("run_etl")
+        logger.info(f"Run metrics written to {paths['prometheus']} and {paths['summary']}")
 
 if __name__ == "__main__":
     run_etl()
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""Warehouse maintenance commands."""
+import sys
+from pathlib import Path
+
+# Add project root to Python path so we can import from config and src
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+from config.locations import load_registry, sync_to_database
+from load.cold_tier import cold_tier
+from load.freshness import freshness
+from load.partitions import partitions
+from load.summary import rollups
+from utils.logger import logger
+from utils.database import db
+
+
+def maintain_partitions(args):
+    """Create upcoming partitions, move old ones to BRIN and expire the oldest."""
+    with db.unit_of_work():
+        result = partitions.maintain()
+    logger.success(f"Partition maintenance complete: {result}")
+
+
+def migrate_partitions(args):
+    """Convert the fact table to monthly partitions."""
+    partitions.migrate(keep_old=not args.drop_old)
+
+
+def verify_summary(args):
+    """Compare the incremental hourly, daily and monthly rollups against a full recompute."""
+    failed = False
+    # Archived facts are no longer in the fact table, but their rollup groups stay
+    since = cold_tier.archived_through()
+    for maintainer in rollups:
+        if not maintainer.enabled():
+            continue
+        mismatches = maintainer.verify(limit=args.limit, since=since)
+        for mismatch in mismatches:
+            logger.error(f"{maintainer.TABLE} mismatch: {mismatch}")
+        failed = failed or bool(mismatches)
+    if failed:
+        sys.exit(1)
+    logger.success("Rollups match the fact table" + (f" from {since}" if since else ""))
+
+
+def rebuild_summary(args):
+    """Recompute the hourly, daily and monthly rollups from the fact table."""
+    for maintainer in rollups:
+        if maintainer.enabled():
+            maintainer.rebuild()
+
+
+def archive_cold(args):
+    """Move facts older than the retention horizon to per-month, per-location Parquet files."""
+    archived = cold_tier.archive(after_months=args.after_months)
+    logger.success(f"Archived {sum(archived.values())} facts from {len(archived)} months to {cold_tier.root}")
+
+
+def sync_locations(args):
+    """Upsert the location registry file into dim_location."""
+    registry = load_registry(source=args.source, path=args.path)
+    changed = sync_to_database(registry)
+    logger.success(f"Synced {len(registry)} locations from {registry.source}, {changed} inserted or updated")
+
+
+def freshness_report(args):
+    """Report locations whose newest loaded reading lags behind their local time."""
+    report = freshness.lag_report(stale_after_minutes=args.stale_after)
+    stale = [row for row in report if row["stale"]]
+    for row in stale[:args.limit]:
+        lag = "never loaded" if row["lag_minutes"] is None else f"{row['lag_minutes']} minutes behind"
+        logger.warning(f"Stale: {row['city']}, {row['country']} ({row['api_source'] or 'no provider'}): {lag}")
+    if len(stale) > args.limit:
+        logger.warning(f"... and {len(stale) - args.limit} more stale locations")
+    logger.info(f"{len(stale)} of {len(report)} location watermarks are stale")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("partitions", help=maintain_partitions.__doc__).set_defaults(func=maintain_partitions)
+
+    migrate = commands.add_parser("migrate-partitions", help=migrate_partitions.__doc__)
+    migrate.add_argument("--drop-old", action="store_true",
+                         help="Drop the unpartitioned table after copying its rows")
+    migrate.set_defaults(func=migrate_partitions)
+
+    verify = commands.add_parser("verify-summary", help=verify_summary.__doc__)
+    verify.add_argument("--limit", type=int, default=20, help="Maximum mismatches to report")
+    verify.set_defaults(func=verify_summary)
+
+    commands.add_parser("rebuild-summary", help=rebuild_summary.__doc__).set_defaults(func=rebuild_summary)
+
+    archive = commands.add_parser("archive-cold", help=archive_cold.__doc__)
+    archive.add_argument("--after-months", type=int, default=None,
+                         help="Archive months older than this many (default: COLD_TIER_AFTER_MONTHS)")
+    archive.set_defaults(func=archive_cold)
+
+    sync = commands.add_parser("sync-locations", help=sync_locations.__doc__)
+    sync.add_argument("--source", choices=["csv", "parquet"], default=None,
+                      help="Registry file format (default: LOCATION_SOURCE)")
+    sync.add_argument("--path", default=None, help="Registry file (default: LOCATIONS_PATH)")
+    sync.set_defaults(func=sync_locations)
+
+    report = commands.add_parser("freshness-report", help=freshness_report.__doc__)
+    report.add_argument("--stale-after", type=float, default=None,
+                        help="Minutes of lag beyond which a location is stale "
+                             "(default: FRESHNESS_STALE_AFTER_MINUTES)")
+    report.add_argument("--limit", type=int, default=50, help="Maximum stale locations to list")
+    report.set_defaults(func=freshness_report)
+
+    args = parser.parse_args()
+    db.initialize()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Replay archived raw responses through parse, transform and load, without the network."""
+import sys
+from pathlib import Path
+
+# Add project root to Python path so we can import from config and src
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+from extract.base import WeatherAPIBase, create_provider
+# Imported for their register_provider side effect
+from extract import open_meteo, openweather, weatherapi  # noqa: F401
+from extract.raw_lake import RawResponseLake
+from load.loader import SKIP, UPDATE, WeatherLoader
+from transform.batch import WeatherBatch
+from utils.logger import logger
+from utils.database import db
+from src.config.config import settings
+
+# Parsers are built once per worker process
+_providers: Dict[str, WeatherAPIBase] = {}
+
+
+def parse_segment(lake: RawResponseLake, segment: Path, start: datetime, end: datetime) -> WeatherBatch:
+    """Parse the responses of one segment fetched in [start, end) into a batch."""
+    records = list(lake.read(segment, start, end))
+    if not records:
+        return WeatherBatch.empty()
+    name = lake.provider_of(segment)
+    if name not in _providers:
+        _providers[name] = create_provider(name, raw_lake=lake)
+    return _providers[name].parse_responses([record["city"] for record in records],
+                                            [record["response"] for record in records],
+                                            [record["country"] for record in records])
+
+
+def replay_segment(root: str, segment: str, start: datetime, end: datetime,
+                   on_conflict: str = UPDATE, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Parse one segment and load its readings in one transaction.
+
+    Returns:
+        Counts of readings parsed, loaded, updated, already loaded and rejected
+    """
+    batch = parse_segment(RawResponseLake(root), Path(segment), start, end)
+    counts = {"readings": len(batch), "loaded": 0, "updated": 0, "conflicts": 0, "rejected": 0}
+    if dry_run or not len(batch):
+        return counts
+    # History lies behind the freshness watermarks, so nothing is skipped as unchanged
+    result = WeatherLoader(skip_unchanged=False, on_conflict=on_conflict).load_batch(batch)
+    counts.update(loaded=result.loaded, updated=result.updated, conflicts=result.conflicts,
+                  rejected=result.rejected)
+    return counts
+
+
+def _init_worker():
+    db.initialize()
+
+
+def replay(start: datetime, end: datetime, providers: Optional[List[str]] = None,
+           workers: Optional[int] = None, root: Optional[str] = None,
+           on_conflict: str = UPDATE, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Replay the raw responses fetched in [start, end).
+
+    Segments are spread over worker processes, each parsing and loading
+    whole segments; with on_conflict="update" readings already loaded are
+    rewritten with the current transform, so a fix or a new derived column
+    reaches past data.
+
+    Args:
+        start: First UTC fetch time to replay
+        end: UTC fetch time to stop before
+        providers: Provider names (default: every provider in the lake)
+        workers: Worker processes; 1 replays in this process
+        root: Lake directory (default: RAW_LAKE_DIR)
+        on_conflict: "update" to rewrite loaded readings, "skip" to keep them
+        dry_run: Parse only, loading nothing
+
+    Returns:
+        Counts summed over every segment, plus segments and failed
+    """
+    lake = RawResponseLake(root)
+    segments = lake.segments(start, end, providers)
+    workers = max(1, workers or settings.replay_workers)
+    totals = {"segments": len(segments), "failed": 0, "readings": 0, "loaded": 0, "updated": 0,
+              "conflicts": 0, "rejected": 0}
+    logger.info(f"Replaying {len(segments)} segments from {start} to {end} with {workers} workers")
+
+    def add(segment, future_result):
+        try:
+            for key, value in future_result().items():
+                totals[key] += value
+        except Exception as e:
+            totals["failed"] += 1
+            logger.error(f"Replay of {segment} failed: {e}")
+
+    arguments = [(str(lake.root), str(segment), start, end, on_conflict, dry_run) for segment in segments]
+    if workers == 1:
+        for args in arguments:
+            add(args[1], lambda: replay_segment(*args))
+    else:
+        # Fresh interpreters, so no worker inherits the parent's database connections
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=None if dry_run else _init_worker) as pool:
+            futures = {pool.submit(replay_segment, *args): args[1] for args in arguments}
+            for future in as_completed(futures):
+                add(futures[future], future.result)
+
+    logger.success(f"Replay complete: {totals}")
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--start", type=datetime.fromisoformat, required=True, help="First UTC fetch time")
+    parser.add_argument("--end", type=datetime.fromisoformat, required=True, help="UTC fetch time to stop before")
+    parser.add_argument("--providers", nargs="+", default=None)
+    parser.add_argument("--workers", type=int, default=settings.replay_workers)
+    parser.add_argument("--root", default=None, help="Lake directory (default: RAW_LAKE_DIR)")
+    parser.add_argument("--keep-loaded", action="store_true",
+                        help="Leave readings that are already loaded unchanged instead of rewriting them")
+    parser.add_argument("--dry-run", action="store_true", help="Parse without loading")
+    args = parser.parse_args()
+
+    if not args.dry_run:
+        db.initialize()
+    replay(args.start, args.end, args.providers, args.workers, args.root,
+           SKIP if args.keep_loaded else UPDATE, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+from typing import Dict, Iterable, List, Any, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from transform.measurements import (
+    CONDITIONS, DECIMAL_COLUMNS, INTEGER_COLUMNS, MEASUREMENT_COLUMNS, to_frame, to_records,
+)
+
+# Missing recorded_at, the int64 value numpy reads back as NaT
+NAT = np.iinfo(np.int64).min
+
+_CONDITION_INDEX = pd.Index(CONDITIONS)
+
+
+class CategoricalColumn:
+    """Dictionary-encoded strings: integer codes into shared categories (-1 = missing)."""
+
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes: np.ndarray, categories: np.ndarray):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def encode(cls, values: Union[Sequence[Optional[str]], pd.Series]) -> "CategoricalColumn":
+        if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            return cls(values.cat.codes.to_numpy(dtype=np.int32),
+                       values.cat.categories.to_numpy(dtype=object))
+        codes, categories = pd.factorize(np.asarray(values, dtype=object))
+        return cls(codes.astype(np.int32), np.asarray(categories, dtype=object))
+
+    @classmethod
+    def repeat(cls, value: Optional[str], length: int) -> "CategoricalColumn":
+        """One value for every row."""
+        if value is None:
+            return cls(np.full(length, -1, dtype=np.int32), np.array([], dtype=object))
+        return cls(np.zeros(length, dtype=np.int32), np.array([value], dtype=object))
+
+    @classmethod
+    def concat(cls, columns: Sequence["CategoricalColumn"]) -> "CategoricalColumn":
+        """Join columns, recoding each onto the union of their categories."""
+        categories = pd.Index(np.concatenate([column.categories for column in columns])
+                              if columns else np.array([], dtype=object)).unique()
+        codes = []
+        for column in columns:
+            # The trailing -1 maps missing (-1) codes to themselves
+            recode = np.append(categories.get_indexer(column.categories), -1).astype(np.int32)
+            codes.append(recode[column.codes])
+        return cls(np.concatenate(codes) if codes else np.array([], dtype=np.int32),
+                   categories.to_numpy(dtype=object))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, key) -> "CategoricalColumn":
+        return CategoricalColumn(self.codes[key], self.categories)
+
+    def decode(self) -> List[Optional[str]]:
+        lookup = np.append(self.categories, None)
+        return lookup[self.codes].tolist()
+
+    def to_pandas(self) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.codes, categories=self.categories)
+
+    def to_arrow(self) -> pa.DictionaryArray:
+        missing = self.codes < 0
+        return pa.DictionaryArray.from_arrays(
+            pa.array(self.codes, mask=missing if missing.any() else None),
+            pa.array(self.categories, type=pa.string()),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(category) for category in self.categories)
+
+
+class WeatherBatch:
+    """
+    A batch of readings held as one array per column.
+
+    City, country and source are dictionary-encoded, recorded_at is int64
+    seconds since the epoch (naive, as reported by the provider; NAT when
+    missing), measurements are float64 arrays with NaN for NULL, and the
+    condition is an int8 code into CONDITIONS. Slicing with a slice returns
+    a batch of views over the same buffers; indexing with an array or mask
+    copies only the selected rows.
+
+    Columns match the keys of OpenMeteoExtractor.parse_response.
+    """
+
+    COLUMNS = ["city", "country", "latitude", "longitude", *MEASUREMENT_COLUMNS,
+               "condition", "recorded_at", "api_source"]
+
+    __slots__ = ("city", "country", "latitude", "longitude", "measurements",
+                 "condition", "recorded_at", "api_source")
+
+    def __init__(self, city: CategoricalColumn, country: CategoricalColumn,
+                 latitude: np.ndarray, longitude: np.ndarray,
+                 measurements: Dict[str, np.ndarray], condition: np.ndarray,
+                 recorded_at: np.ndarray, api_source: CategoricalColumn):
+        self.city = city
+        self.country = country
+        self.latitude = latitude
+        self.longitude = longitude
+        self.measurements = measurements
+        self.condition = condition
+        self.recorded_at = recorded_at
+        self.api_source = api_source
+
+    @classmethod
+    def build(cls, city, country, latitude, longitude,
+              measurements: Dict[str, np.ndarray], recorded_at,
+              api_source: str = "open_meteo") -> "WeatherBatch":
+        """
+        Assemble a batch from transform() output and per-row or scalar columns.
+
+        Args:
+            city: City names, or one name for every row
+            country: Countries, or one country for every row
+            latitude: Latitudes, or one latitude for every row
+            longitude: Longitudes, or one longitude for every row
+            measurements: Output of transform.measurements.transform
+            recorded_at: datetime64 values or ISO strings
+            api_source: Source name shared by every row
+        """
+        recorded_at = _epoch_seconds(recorded_at)
+        length = len(recorded_at)
+
+        def categorical(values):
+            if values is None or isinstance(values, str):
+                return CategoricalColumn.repeat(values, length)
+            return CategoricalColumn.encode(values)
+
+        def coordinate(values):
+            values = np.asarray(values, dtype=np.float64)
+            return np.full(length, values) if values.ndim == 0 else values
+
+        return cls(categorical(city), categorical(country), coordinate(latitude), coordinate(longitude),
+                   {name: measurements[name] for name in MEASUREMENT_COLUMNS},
+                   measurements["condition"].astype(np.int8, copy=False), recorded_at,
+                   CategoricalColumn.repeat(api_source, length))
+
+    @classmethod
+    def empty(cls) -> "WeatherBatch":
+        return cls.concat([])
+
+    @classmethod
+    def concat(cls, batches: Sequence["WeatherBatch"]) -> "WeatherBatch":
+        """Join batches in order; categories are merged."""
+        batches = list(batches)
+
+        def arrays(values, dtype):
+            return np.concatenate(values) if values else np.array([], dtype=dtype)
+
+        return cls(
+            CategoricalColumn.concat([batch.city for batch in batches]),
+            CategoricalColumn.concat([batch.country for batch in batches]),
+            arrays([batch.latitude for batch in batches], np.float64),
+            arrays([batch.longitude for batch in batches], np.float64),
+            {name: arrays([batch.measurements[name] for batch in batches], np.float64)
+             for name in MEASUREMENT_COLUMNS},
+            arrays([batch.condition for batch in batches], np.int8),
+            arrays([batch.recorded_at for batch in batches], np.int64),
+            CategoricalColumn.concat([batch.api_source for batch in batches]),
+        )
+
+    # Access
+
+    def __len__(self) -> int:
+        return len(self.recorded_at)
+
+    def __getitem__(self, key) -> "WeatherBatch":
+        """Rows selected by a slice (zero-copy), an index array or a boolean mask."""
+        if isinstance(key, (int, np.integer)):
+            raise TypeError("index a WeatherBatch with a slice or array; use row() for one reading")
+        return WeatherBatch(self.city[key], self.country[key], self.latitude[key], self.longitude[key],
+                            {name: values[key] for name, values in self.measurements.items()},
+                            self.condition[key], self.recorded_at[key], self.api_source[key])
+
+    def batches(self, size: int) -> Iterable["WeatherBatch"]:
+        """Consecutive zero-copy slices of at most size rows."""
+        for start in range(0, len(self), max(1, size)):
+            yield self[start:start + size]
+
+    def recorded_at_datetime64(self) -> np.ndarray:
+        """recorded_at as datetime64[s], a view of the same buffer."""
+        return self.recorded_at.view("datetime64[s]")
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """One reading as a dict."""
+        return self[index:index + 1].to_records()[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the column buffers."""
+        arrays = [self.latitude, self.longitude, self.condition, self.recorded_at,
+                  *self.measurements.values()]
+        return (sum(array.nbytes for array in arrays) + self.city.nbytes + self.country.nbytes
+                + self.api_source.nbytes)
+
+    # Conversion
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "WeatherBatch":
+        """Build a batch from parse_response-style dicts."""
+        return cls.from_pandas(pd.DataFrame.from_records(records, columns=cls.COLUMNS))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """One parse_response-style dict per reading."""
+        measured = to_records({**self.measurements, "condition": self.condition})
+        # datetime64[s] converts to datetime, NaT to None
+        recorded_at = self.recorded_at_datetime64().astype(object).tolist()
+        return [{"city": city, "country": country, "latitude": latitude, "longitude": longitude,
+                 **measures, "recorded_at": when, "api_source": source}
+                for city, country, latitude, longitude, measures, when, source in zip(
+                    self.city.decode(), self.country.decode(), self.latitude.tolist(),
+                    self.longitude.tolist(), measured, recorded_at, self.api_source.decode())]
+
+    @classmethod
+    def from_pandas(cls, frame: pd.DataFrame) -> "WeatherBatch":
+        """
+        Build a batch from a frame with the COLUMNS layout.
+
+        Missing measurement columns are NULL; string or datetime recorded_at
+        values that do not parse become NAT.
+        """
+        length = len(frame)
+
+        def floats(name):
+            if name not in frame:
+                return np.full(length, np.nan)
+            return pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+        measurements = {name: floats(name) for name in DECIMAL_COLUMNS}
+        for name in INTEGER_COLUMNS:
+            measurements[name] = np.rint(floats(name))
+        if "condition" in frame:
+            condition = _CONDITION_INDEX.get_indexer(frame["condition"].astype(object)).astype(np.int8)
+        else:
+            condition = np.full(length, -1, dtype=np.int8)
+
+        def categorical(name):
+            if name not in frame:
+                return CategoricalColumn.repeat(None, length)
+            values = frame[name]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                return CategoricalColumn.encode(values)
+            return CategoricalColumn.encode(values.where(values.notna(), None))
+
+        recorded_at = pd.to_datetime(frame["recorded_at"], errors="coerce") if "recorded_at" in frame \
+            else pd.Series(pd.NaT, index=frame.index)
+        return cls(categorical("city"), categorical("country"), floats("latitude"), floats("longitude"),
+                   measurements, condition, _epoch_seconds(recorded_at.to_numpy(dtype="datetime64[s]")),
+                   categorical("api_source"))
+
+    def to_pandas(self) -> pd.DataFrame:
+        """The batch as a DataFrame: categorical strings, nullable integers, datetime64 recorded_at."""
+        frame = pd.DataFrame({"city": self.city.to_pandas(), "country": self.country.to_pandas(),
+                              "latitude": self.latitude, "longitude": self.longitude})
+        measurements = to_frame({**self.measurements, "condition": self.condition})
+        frame = pd.concat([frame, measurements], axis=1)
+        frame["recorded_at"] = self.recorded_at_datetime64()
+        frame["api_source"] = self.api_source.to_pandas()
+        return frame
+
+    @classmethod
+    def from_arrow(cls, table: Union[pa.Table, pa.RecordBatch]) -> "WeatherBatch":
+        """Build a batch from an Arrow table in the staging layout."""
+        length = table.num_rows
+        names = set(table.schema.names)
+
+        def categorical(name):
+            if name not in names:
+                return CategoricalColumn.repeat(None, length)
+            column = table.column(name)
+            if isinstance(column, pa.ChunkedArray):
+                column = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+            if not pa.types.is_dictionary(column.type):
+                column = column.dictionary_encode()
+            codes = column.indices.to_numpy(zero_copy_only=False)
+            if column.indices.null_count:
+                codes = np.where(column.indices.is_null().to_numpy(zero_copy_only=False), -1, codes)
+            return CategoricalColumn(codes.astype(np.int32, copy=False),
+                                     np.asarray(column.dictionary.to_pylist(), dtype=object))
+
+        def floats(name):
+            if name not in names:
+                return np.full(length, np.nan)
+            # Nulls come back as NaN; float64 columns without nulls are not copied
+            return pc.cast(table.column(name), pa.float64()).to_numpy(zero_copy_only=False)
+
+        measurements = {name: floats(name) for name in MEASUREMENT_COLUMNS}
+        if "condition" in names:
+            condition = categorical("condition")
+            recode = np.append(_CONDITION_INDEX.get_indexer(condition.categories), -1).astype(np.int8)
+            condition = recode[condition.codes]
+        else:
+            condition = np.full(length, -1, dtype=np.int8)
+
+        if "recorded_at" in names:
+            timestamps = pc.cast(table.column("recorded_at"), pa.timestamp("s"), safe=False)
+            recorded_at = pc.fill_null(timestamps.cast(pa.int64()), NAT).to_numpy()
+        else:
+            recorded_at = np.full(length, NAT, dtype=np.int64)
+        return cls(categorical("city"), categorical("country"), floats("latitude"), floats("longitude"),
+                   measurements, condition, np.asarray(recorded_at, dtype=np.int64), categorical("api_source"))
+
+    def to_arrow(self) -> pa.Table:
+        """The batch as an Arrow table in the staging layout."""
+        missing_time = self.recorded_at == NAT
+        columns = {"city": self.city.to_arrow(), "country": self.country.to_arrow(),
+                   "latitude": pa.array(self.latitude), "longitude": pa.array(self.longitude)}
+        for name in DECIMAL_COLUMNS:
+            columns[name] = pa.array(self.measurements[name], from_pandas=True)
+        for name in INTEGER_COLUMNS:
+            values = self.measurements[name]
+            missing = np.isnan(values)
+            columns[name] = pa.array(np.where(missing, 0, values).astype(np.int32),
+                                     mask=missing if missing.any() else None)
+        condition_missing = self.condition < 0
+        columns["condition"] = pa.DictionaryArray.from_arrays(
+            pa.array(self.condition, mask=condition_missing if condition_missing.any() else None),
+            pa.array(CONDITIONS, type=pa.string()),
+        )
+        columns["recorded_at"] = pa.array(self.recorded_at, type=pa.int64(),
+                                          mask=missing_time if missing_time.any() else None
+                                          ).cast(pa.timestamp("s"))
+        columns["api_source"] = self.api_source.to_arrow()
+        return pa.table(columns)
+
+
+def _epoch_seconds(values) -> np.ndarray:
+    """datetime64 values, datetimes or ISO strings as int64 epoch seconds (NAT where missing)."""
+    if isinstance(values, np.ndarray) and values.dtype == np.int64:
+        return values
+    if isinstance(values, pd.Series):
+        values = values.to_numpy(dtype="datetime64[s]")
+    try:
+        parsed = np.asarray(values, dtype="datetime64[s]")
+    except (TypeError, ValueError):
+        parsed = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype="datetime64[s]")
+    return parsed.view(np.int64)
@@ -0,0 +1,238 @@
+from typing import Dict, List, Any, Mapping, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+# Open-Meteo variables requested for current and hourly readings
+OPEN_METEO_VARIABLES = [
+    "temperature_2m",
+    "relative_humidity_2m",
+    "pressure_msl",
+    "wind_speed_10m",
+    "wind_direction_10m",
+    "wind_gusts_10m",
+    "visibility",
+    "cloud_cover",
+    "precipitation",
+    "snowfall",
+    "uv_index",
+    "weather_code",
+]
+
+# Fact columns stored as DECIMAL(precision, scale)
+DECIMAL_COLUMNS = {
+    "temperature_celsius": (5, 2),
+    "temperature_fahrenheit": (5, 2),
+    "feels_like_celsius": (5, 2),
+    "feels_like_fahrenheit": (5, 2),
+    "dew_point_celsius": (5, 2),
+    "wind_speed_mps": (5, 2),
+    "wind_gust_mps": (5, 2),
+    "precipitation_mm": (5, 2),
+    "snow_mm": (5, 2),
+    "uv_index": (3, 1),
+}
+
+# Fact columns stored as INT
+INTEGER_COLUMNS = [
+    "humidity_percent",
+    "pressure_hpa",
+    "wind_direction_degrees",
+    "visibility_meters",
+    "cloudiness_percent",
+]
+
+MEASUREMENT_COLUMNS = list(DECIMAL_COLUMNS) + INTEGER_COLUMNS
+
+# DECIMAL_COLUMNS as column vectors, for rounding all of them in one call
+_DECIMAL_PRECISION = np.array([[precision] for precision, _ in DECIMAL_COLUMNS.values()])
+_DECIMAL_SCALE = np.array([[scale] for _, scale in DECIMAL_COLUMNS.values()])
+
+# Open-Meteo variable behind each integer column
+INTEGER_SOURCES = {
+    "humidity_percent": "relative_humidity_2m",
+    "pressure_hpa": "pressure_msl",
+    "wind_direction_degrees": "wind_direction_10m",
+    "visibility_meters": "visibility",
+    "cloudiness_percent": "cloud_cover",
+}
+
+# dim_weather_condition.main_condition values, in a fixed category order
+CONDITIONS = ["Clear", "Clouds", "Rain", "Drizzle", "Thunderstorm", "Snow",
+              "Mist", "Fog", "Haze", "Dust", "Smoke"]
+
+# WMO weather interpretation codes (Open-Meteo weather_code) -> main condition
+WMO_CONDITIONS = {
+    0: "Clear", 1: "Clear", 2: "Clouds", 3: "Clouds",
+    45: "Fog", 48: "Fog",
+    51: "Drizzle", 53: "Drizzle", 55: "Drizzle", 56: "Drizzle", 57: "Drizzle",
+    61: "Rain", 63: "Rain", 65: "Rain", 66: "Rain", 67: "Rain",
+    80: "Rain", 81: "Rain", 82: "Rain",
+    71: "Snow", 73: "Snow", 75: "Snow", 77: "Snow", 85: "Snow", 86: "Snow",
+    95: "Thunderstorm", 96: "Thunderstorm", 99: "Thunderstorm",
+}
+
+# Lookup table indexed by WMO code, holding category codes (-1 = unknown)
+_CONDITION_CODES = np.full(100, -1, dtype=np.int8)
+for _code, _condition in WMO_CONDITIONS.items():
+    _CONDITION_CODES[_code] = CONDITIONS.index(_condition)
+
+# Multipliers into the fact-table units, keyed by the unit strings Open-Meteo reports
+SPEED_TO_MPS = {"km/h": 1 / 3.6, "m/s": 1.0, "mp/h": 0.44704, "mph": 0.44704, "kn": 0.514444}
+LENGTH_TO_MM = {"mm": 1.0, "cm": 10.0, "inch": 25.4}
+
+# Default units of the variables above when no *_units block is present
+DEFAULT_UNITS = {"wind_speed_10m": "km/h", "wind_gusts_10m": "km/h",
+                 "precipitation": "mm", "snowfall": "cm", "temperature_2m": "°C"}
+
+
+def _column(raw: Mapping[str, Sequence], name: str, length: int) -> np.ndarray:
+    """A raw variable as a float array; missing variables and nulls become NaN."""
+    values = raw.get(name)
+    if values is None:
+        return np.full(length, np.nan)
+    return np.asarray(values, dtype=np.float64)
+
+
+def celsius_to_fahrenheit(celsius: np.ndarray) -> np.ndarray:
+    return celsius * 9 / 5 + 32
+
+
+def fahrenheit_to_celsius(fahrenheit: np.ndarray) -> np.ndarray:
+    return (fahrenheit - 32) * 5 / 9
+
+
+def dew_point(celsius: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """Dew point in Celsius from the Magnus formula."""
+    b, c = 17.62, 243.12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gamma = np.log(humidity / 100) + b * celsius / (c + celsius)
+        return c * gamma / (b - gamma)
+
+
+def feels_like(celsius: np.ndarray, humidity: np.ndarray, wind_mps: np.ndarray) -> np.ndarray:
+    """
+    Apparent temperature in Celsius, following the US National Weather Service.
+
+    The heat index (Rothfusz regression) applies at 80°F and above, wind
+    chill at 50°F and below with wind over 3 mph; otherwise it is the air
+    temperature. Where an input is missing the air temperature is used.
+    """
+    t = celsius_to_fahrenheit(celsius)
+    rh = humidity
+    mph = wind_mps / 0.44704
+
+    heat_index = (-42.379 + 2.04901523 * t + 10.14333127 * rh - 0.22475541 * t * rh
+                  - 6.83783e-3 * t ** 2 - 5.481717e-2 * rh ** 2 + 1.22874e-3 * t ** 2 * rh
+                  + 8.5282e-4 * t * rh ** 2 - 1.99e-6 * t ** 2 * rh ** 2)
+    dry = (rh < 13) & (t >= 80) & (t <= 112)
+    heat_index = np.where(dry, heat_index - (13 - rh) / 4 * np.sqrt(np.abs(17 - np.abs(t - 95)) / 17),
+                          heat_index)
+    humid = (rh > 85) & (t >= 80) & (t <= 87)
+    heat_index = np.where(humid, heat_index + (rh - 85) / 10 * (87 - t) / 5, heat_index)
+
+    # Negative speeds only come from bad input; NaN keeps them out of the wind chill
+    wind_factor = np.power(np.where(mph >= 0, mph, np.nan), 0.16)
+    wind_chill = 35.74 + 0.6215 * t - 35.75 * wind_factor + 0.4275 * t * wind_factor
+
+    apparent = np.where(t >= 80, heat_index, np.where((t <= 50) & (mph > 3), wind_chill, t))
+    apparent = np.where(np.isnan(apparent), t, apparent)
+    return fahrenheit_to_celsius(apparent)
+
+
+def round_decimal(values: np.ndarray, precision, scale) -> np.ndarray:
+    """
+    Round to a DECIMAL(precision, scale) column; values it cannot hold become NaN.
+
+    precision and scale may also be arrays broadcasting against values, so
+    a stack of columns with different DECIMAL types is rounded in one pass.
+    """
+    factor = np.power(10.0, scale)
+    limit = np.power(10.0, np.subtract(precision, scale)) - 1 / factor
+    rounded = np.round(values * factor) / factor
+    return np.where(np.abs(rounded) <= limit, rounded, np.nan)
+
+
+def map_conditions(weather_codes: np.ndarray) -> np.ndarray:
+    """Map WMO weather codes to indexes into CONDITIONS (-1 where unknown or missing)."""
+    valid = ~np.isnan(weather_codes) & (weather_codes >= 0) & (weather_codes < len(_CONDITION_CODES))
+    codes = np.full(len(weather_codes), -1, dtype=np.int8)
+    codes[valid] = _CONDITION_CODES[weather_codes[valid].astype(np.int64)]
+    return codes
+
+
+def transform(raw: Mapping[str, Sequence], units: Optional[Mapping[str, str]] = None,
+              length: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Convert raw Open-Meteo variables into fact-table measurements.
+
+    Every step works on whole columns: unit conversion to the fact-table
+    units, derived feels-like and dew point, rounding to the DECIMAL
+    scales (out-of-range values become NaN, i.e. NULL), integer columns
+    rounded to whole numbers and weather codes mapped to condition codes.
+
+    Args:
+        raw: Variable name -> values, as in an Open-Meteo "hourly" block
+        units: Variable name -> unit, as in a "*_units" block; defaults to
+            Open-Meteo's default units
+        length: Number of readings, if raw may be missing every variable
+
+    Returns:
+        MEASUREMENT_COLUMNS as float arrays plus "condition", an int8 array
+        of indexes into CONDITIONS
+    """
+    units = {**DEFAULT_UNITS, **(units or {})}
+    if length is None:
+        length = max((len(values) for values in raw.values() if values is not None), default=0)
+
+    def column(name):
+        return _column(raw, name, length)
+
+    celsius = column("temperature_2m")
+    if units["temperature_2m"] == "°F":
+        celsius = fahrenheit_to_celsius(celsius)
+    humidity = column("relative_humidity_2m")
+    wind_mps = column("wind_speed_10m") * SPEED_TO_MPS[units["wind_speed_10m"]]
+    apparent = feels_like(celsius, humidity, wind_mps)
+
+    measures = {
+        "temperature_celsius": celsius,
+        "temperature_fahrenheit": celsius_to_fahrenheit(celsius),
+        "feels_like_celsius": apparent,
+        "feels_like_fahrenheit": celsius_to_fahrenheit(apparent),
+        "dew_point_celsius": dew_point(celsius, humidity),
+        "wind_speed_mps": wind_mps,
+        "wind_gust_mps": column("wind_gusts_10m") * SPEED_TO_MPS[units["wind_gusts_10m"]],
+        "precipitation_mm": column("precipitation") * LENGTH_TO_MM[units["precipitation"]],
+        "snow_mm": column("snowfall") * LENGTH_TO_MM[units["snowfall"]],
+        "uv_index": column("uv_index"),
+    }
+    rounded = round_decimal(np.vstack([measures[name] for name in DECIMAL_COLUMNS]),
+                            _DECIMAL_PRECISION, _DECIMAL_SCALE)
+    columns = dict(zip(DECIMAL_COLUMNS, rounded))
+    for name, variable in INTEGER_SOURCES.items():
+        columns[name] = np.rint(column(variable))
+    columns["condition"] = map_conditions(column("weather_code"))
+    return columns
+
+
+def to_frame(columns: Mapping[str, np.ndarray]) -> pd.DataFrame:
+    """Transformed columns as a DataFrame with nullable integers and a categorical condition."""
+    frame = pd.DataFrame({name: columns[name] for name in DECIMAL_COLUMNS})
+    for name in INTEGER_COLUMNS:
+        values = columns[name]
+        missing = np.isnan(values)
+        frame[name] = pd.arrays.IntegerArray(np.where(missing, 0, values).astype(np.int64), missing)
+    frame["condition"] = pd.Categorical.from_codes(columns["condition"], categories=CONDITIONS)
+    return frame
+
+
+def to_records(columns: Mapping[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Transformed columns as one dict of plain Python values (None for NULL) per reading."""
+    values = {}
+    for name in DECIMAL_COLUMNS:
+        values[name] = [None if v != v else v for v in columns[name].tolist()]
+    for name in INTEGER_COLUMNS:
+        values[name] = [None if v != v else int(v) for v in columns[name].tolist()]
+    values["condition"] = [CONDITIONS[code] if code >= 0 else None for code in columns["condition"].tolist()]
+    names = list(values)
+    return [dict(zip(names, row)) for row in zip(*values.values())]
@@ -1,27 +1,64 @@
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 from config.config import settings
+from utils.metrics import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=256)
+def _statement(query: str):
+    """Parse a SQL string once; the same TextClause also hits SQLAlchemy's compiled cache."""
+    return text(query)
+
+
+@lru_cache(maxsize=256)
+def _statement_kind(query: str) -> str:
+    """Leading SQL keyword (select, insert, with, ...), used as a metrics label."""
+    words = query.split(None, 1)
+    return words[0].lower() if words else ""
+
+
 class DatabaseConnection:
     """Database connection manager."""
     
     def __init__(self):
         self.engine = None
         self.SessionLocal = None
+        self._local = threading.local()
+    
+    def initialize(self, pooled: bool = None):
+        """
+        Initialize database connection.
         
-    def initialize(self):
-        """Initialize database connection."""
+        Args:
+            pooled: Keep connections in a pool and reuse them across
+                statements. Defaults to settings.db_pool_enabled; when off,
+                every connect opens a fresh server connection (NullPool).
+        """
+        pooled = settings.db_pool_enabled if pooled is None else pooled
         try:
             # Create engine
-            self.engine = create_engine(
-                settings.database_url,
-                poolclass=NullPool,  # Don't use connection pooling for ETL
-                echo=False  # Set to True for SQL debugging
-            )
+            if pooled:
+                self.engine = create_engine(
+                    settings.database_url,
+                    pool_size=settings.db_pool_size,
+                    max_overflow=settings.db_max_overflow,
+                    pool_pre_ping=settings.db_pool_pre_ping,  # Drop connections the server closed
+                    pool_recycle=settings.db_pool_recycle,
+                    echo=False
+                )
+            else:
+                self.engine = create_engine(
+                    settings.database_url,
+                    poolclass=NullPool,
+                    echo=False  # Set to True for SQL debugging
+                )
             
             # Create session factory
             self.SessionLocal = sessionmaker(
@@ -34,7 +71,7 @@ class DatabaseConnection:
             with self.engine.connect() as conn:
                 result = conn.execute(text("SELECT 1"))
                 logger.info("Database connection successful")
-                
+        
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
             raise
@@ -45,20 +82,93 @@ class DatabaseConnection:
             self.initialize()
         return self.SessionLocal()
     
+    @property
+    def in_unit_of_work(self) -> bool:
+        """Whether the current thread is inside unit_of_work()."""
+        return getattr(self._local, "conn", None) is not None
+    
+    def on_rollback(self, callback):
+        """Run callback if the current unit of work is rolled back."""
+        if self.in_unit_of_work:
+            self._local.rollback_callbacks.append(callback)
+    
+    def before_commit(self, key, callback):
+        """
+        Run callback on the unit of work's connection just before it commits.
+        
+        Callbacks registered under the same key run once, so work done per
+        batch can defer a shared statement (holding its row locks only for
+        the commit) to the end of the run.
+        """
+        if self.in_unit_of_work:
+            self._local.commit_callbacks.setdefault(key, callback)
+    
+    def after_commit(self, key, callback):
+        """Run callback once the current unit of work has committed (once per key)."""
+        if self.in_unit_of_work:
+            self._local.committed_callbacks.setdefault(key, callback)
+    
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Share one connection and one transaction across a block of work.
+        
+        execute_query calls made on this thread inside the block run on the
+        yielded connection and are committed together when the block exits,
+        or rolled back if it raises. Nested blocks join the outer one.
+        """
+        if not self.engine:
+            self.initialize()
+        
+        if self.in_unit_of_work:
+            yield self._local.conn
+            return
+        
+        with self.engine.connect() as conn:
+            self._local.conn = conn
+            self._local.rollback_callbacks = []
+            self._local.commit_callbacks = {}
+            self._local.committed_callbacks = {}
+            try:
+                with conn.begin():
+                    yield conn
+                    for callback in self._local.commit_callbacks.values():
+                        callback()
+            except BaseException:
+                for callback in self._local.rollback_callbacks:
+                    callback()
+                raise
+            else:
+                committed = list(self._local.committed_callbacks.values())
+            finally:
+                self._local.conn = None
+                self._local.rollback_callbacks = []
+                self._local.commit_callbacks = {}
+                self._local.committed_callbacks = {}
+            for callback in committed:
+                callback()
+    
     def execute_query(self, query, params=None):
         """Execute a raw SQL query."""
         if not self.engine:
             self.initialize()
         
-        with self.engine.connect() as conn:
-            result = conn.execute(text(query), params or {})
+        with metrics.span("db_query", statement=_statement_kind(query)):
+            if self.in_unit_of_work:
+                result = self._local.conn.execute(_statement(query), params or {})
+                return result.fetchall() if result.returns_rows else None
             
-            # For SELECT queries, return all rows
-            if query.strip().lower().startswith("select"):
-                return result.fetchall()
-            else:
-                conn.commit()
-                return None
+            with self.engine.connect() as conn:
+                result = conn.execute(_statement(query), params or {})
+                
+                # For SELECT queries, return all rows
+                if query.strip().lower().startswith("select"):
+                    return result.fetchall()
+                else:
+                    # INSERT ... RETURNING also hands back its rows
+                    rows = result.fetchall() if result.returns_rows else None
+                    conn.commit()
+                    return rows
 
 # Global database instance
-db = DatabaseConnection()
\ No newline at end of file
+db = DatabaseConnection()
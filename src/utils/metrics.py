@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Any, Optional, Sequence, Tuple, Union
+from config.config import settings
+
+# Upper bounds (le) of the default histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Buckets for throughput histograms, in rows per second
+RATE_BUCKETS = (10, 100, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile: the upper bound of the bucket holding it."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum": round(self.sum, 6),
+                "mean": round(self.sum / self.count, 6) if self.count else None,
+                "min": self.min, "max": self.max,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95)}
+
+
+class _NoopSpan:
+    """Shared stand-in returned by span() while metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, histograms and stage spans for one pipeline run.
+
+    span() times a block into the "<name>_seconds" histogram and counts its
+    failures; counters and histograms take free-form string labels. The
+    registry exports the Prometheus text format (for the node_exporter
+    textfile collector) and a JSON run summary. While disabled every call
+    returns after a single attribute check, so instrumentation can stay in
+    hot paths.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, prefix: str = "weather_etl"):
+        self.enabled = settings.metrics_enabled if enabled is None else enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop all recorded values, starting a new run."""
+        with self._lock:
+            self._counters: Dict[str, Dict[Labels, float]] = {}
+            self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+            self._buckets: Dict[str, Sequence[float]] = {}
+            self.started_at = time.time()
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add value to a counter."""
+        if not self.enabled:
+            return
+        key = self._labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Optional[Sequence[float]] = None, **labels):
+        """
+        Record one observation in a histogram.
+
+        Args:
+            buckets: Bucket bounds, fixed by the first observation of name
+                (default LATENCY_BUCKETS)
+        """
+        if not self.enabled:
+            return
+        key = self._labels(labels)
+        with self._lock:
+            bounds = self._buckets.setdefault(name, buckets or LATENCY_BUCKETS)
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(bounds)
+            histogram.observe(value)
+
+    @contextmanager
+    def _timed(self, name: str, labels: Dict[str, Any]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+
+    def span(self, name: str, **labels):
+        """Context manager timing a block into the <name>_seconds histogram."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return self._timed(name, labels)
+
+    def throughput(self, name: str, rows: int, seconds: float, **labels):
+        """Record rows and rows/sec for a batch."""
+        if not self.enabled:
+            return
+        self.inc(f"{name}_rows_total", rows, **labels)
+        if seconds > 0:
+            self.observe(f"{name}_rows_per_second", rows / seconds, buckets=RATE_BUCKETS, **labels)
+
+    # Export
+
+    def _metric_name(self, name: str) -> str:
+        return f"{self.prefix}_{name}" if self.prefix else name
+
+    @staticmethod
+    def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ""
+        escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def to_prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = self._metric_name(name)
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{metric}{self._format_labels(labels)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                metric = self._metric_name(name)
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{self._format_labels(labels, (('le', f'{bound:g}'),))} "
+                                     f"{cumulative}")
+                    lines.append(f"{metric}_bucket{self._format_labels(labels, (('le', '+Inf'),))} "
+                                 f"{histogram.count}")
+                    lines.append(f"{metric}_sum{self._format_labels(labels)} {histogram.sum!r}")
+                    lines.append(f"{metric}_count{self._format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serializable run summary: counter values and histogram statistics."""
+        def key(name, labels):
+            return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "elapsed_seconds": round(time.time() - self.started_at, 3),
+                "counters": {key(name, labels): value
+                             for name, series in sorted(self._counters.items())
+                             for labels, value in sorted(series.items())},
+                "histograms": {key(name, labels): histogram.summary()
+                               for name, series in sorted(self._histograms.items())
+                               for labels, histogram in sorted(series.items())},
+            }
+
+    def write(self, job: str, directory: Optional[Union[str, Path]] = None) -> Dict[str, Path]:
+        """
+        Write <job>.prom and <job>.json into directory.
+
+        job names what produced the metrics, e.g. a stage and shard, not a
+        run: each run replaces its job's files, so a textfile collector
+        exports one current set of series per job instead of one per run
+        ever made. Files are written to a temporary name and renamed, so a
+        collector never reads a partial file.
+        """
+        directory = Path(directory or settings.metrics_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        safe_key = "".join(c if c.isalnum() or c in "-_" else "_" for c in job)
+        paths = {"prometheus": directory / f"{safe_key}.prom", "summary": directory / f"{safe_key}.json"}
+        contents = {"prometheus": self.to_prometheus(), "summary": json.dumps(self.summary(), indent=2)}
+        for kind, path in paths.items():
+            tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+            tmp.write_text(contents[kind])
+            tmp.replace(path)
+        return paths
+
+
+# Process-wide metrics shared by the extract and load stages
+metrics = MetricsRegistry()
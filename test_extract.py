@@ -25,7 +25,7 @@ def test_all_cities():
     extractor = OpenMeteoExtractor()
     
     logger.info("Testing extraction for all cities")
-    all_data = extractor.extract_all_cities()
+    all_data = extractor.extract_all_cities().to_records()
     
     logger.info(f"Extracted data for {len(all_data)} cities:")
     
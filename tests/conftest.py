@@ -0,0 +1,33 @@
+import os
+import sys
+from pathlib import Path
+
+# Tests opt into the response cache, the raw response lake and grid cells explicitly
+os.environ.setdefault("CACHE_ENABLED", "false")
+os.environ.setdefault("RAW_LAKE_ENABLED", "false")
+os.environ.setdefault("GRID_CELLS_ENABLED", "false")
+
+# Modules under src/ import each other as top-level packages (utils, config, ...)
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+import pytest
+
+
+@pytest.fixture
+def warehouse():
+    """Database connection to the warehouse schema, skipping when Postgres is unreachable."""
+    from utils.database import db
+
+    try:
+        db.initialize()
+    except Exception as e:
+        pytest.skip(f"warehouse database unavailable: {e}")
+    yield db
+    from load.summary import recompute_groups
+
+    groups = db.execute_query("DELETE FROM fact_weather_measurements WHERE api_source = 'test' "
+                              "RETURNING location_id, date_id")
+    recompute_groups(list(set(groups or [])), db)
+    db.execute_query("DELETE FROM etl_location_watermark WHERE api_source = 'test'")
@@ -0,0 +1,141 @@
+"""Local stand-in for the Open-Meteo forecast and archive endpoints."""
+import json
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeOpenMeteoServer:
+    """
+    Serve canned forecast and archive responses on localhost.
+
+    Latency, a random server-error rate, 503 responses to the first
+    fail_first requests and periodic 429 responses (every throttle_every-th
+    request, with a Retry-After header) can be injected. With grid set,
+    coordinates are snapped to a grid of that many degrees, as the real
+    API snaps them to its model's grid.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0,
+                 throttle_every: int = 0, retry_after: int = 1, seed: int = 0,
+                 fail_first: int = 0, grid: float = 0.0):
+        self.latency = latency
+        self.grid = grid
+        self.error_rate = error_rate
+        self.fail_first = fail_first
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.error_count = 0
+        self.throttled_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1/forecast"
+
+    @property
+    def archive_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1/archive"
+
+    def _fault(self):
+        """HTTP status to inject for the next request, or None to answer normally."""
+        with self._lock:
+            self.request_count += 1
+            if self.request_count <= self.fail_first:
+                self.error_count += 1
+                return 503
+            if self.throttle_every and self.request_count % self.throttle_every == 0:
+                self.throttled_count += 1
+                return 429
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.error_count += 1
+                return 500
+        return None
+
+    # Every other requested variable, in Open-Meteo's default units
+    CURRENT_READING = {
+        "relative_humidity_2m": 72, "pressure_msl": 1013.4, "wind_speed_10m": 14.4,
+        "wind_direction_10m": 225, "wind_gusts_10m": 28.8, "visibility": 24140.0,
+        "cloud_cover": 75, "precipitation": 0.2, "snowfall": 0.0, "uv_index": 0.0, "weather_code": 61,
+    }
+
+    def build_response(self, lat: float, lon: float) -> dict:
+        if self.grid:
+            lat, lon = round(lat / self.grid) * self.grid, round(lon / self.grid) * self.grid
+        return {
+            "latitude": lat,
+            "longitude": lon,
+            "current": {"time": "2025-08-03T00:45", "temperature_2m": 16.0, **self.CURRENT_READING},
+        }
+
+    def build_hourly_response(self, lat: float, lon: float, start: str, end: str) -> dict:
+        first = datetime.combine(date.fromisoformat(start), datetime.min.time())
+        hours = ((date.fromisoformat(end) - date.fromisoformat(start)).days + 1) * 24
+        times = [first + timedelta(hours=h) for h in range(hours)]
+        return {
+            "latitude": lat,
+            "longitude": lon,
+            "hourly": {
+                "time": [t.strftime("%Y-%m-%dT%H:%M") for t in times],
+                "temperature_2m": [round(10 + t.hour / 2, 1) for t in times],
+                **{name: [value] * hours for name, value in self.CURRENT_READING.items()},
+            },
+        }
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fault = fake._fault()
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fault:
+                    self._send({"error": True, "reason": "injected fault"}, status=fault)
+                    return
+                query = parse_qs(urlparse(self.path).query)
+                if "hourly" in query:
+                    self._send(fake.build_hourly_response(
+                        float(query["latitude"][0]), float(query["longitude"][0]),
+                        query["start_date"][0], query["end_date"][0]
+                    ))
+                    return
+                lats = query["latitude"][0].split(",")
+                lons = query["longitude"][0].split(",")
+                results = [fake.build_response(float(lat), float(lon))
+                           for lat, lon in zip(lats, lons)]
+                # Open-Meteo returns an array only for multi-location requests
+                self._send(results if len(results) > 1 else results[0])
+
+            def _send(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", str(fake.retry_after))
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,55 @@
+"""Tests for the hourly history backfill."""
+from datetime import date
+
+from extract.open_meteo import OpenMeteoExtractor
+from run_backfill import backfill, split_windows
+from utils.rate_limiter import TokenBucket
+from tests.fake_open_meteo import FakeOpenMeteoServer
+
+
+class _TestExtractor(OpenMeteoExtractor):
+    # Tags the backfilled readings so the warehouse fixture removes exactly these
+    name = "test"
+
+
+def test_split_windows_covers_range():
+    windows = split_windows(date(2024, 1, 1), date(2024, 3, 5), 31)
+
+    assert windows[0] == (date(2024, 1, 1), date(2024, 1, 31))
+    assert windows[-1] == (date(2024, 3, 3), date(2024, 3, 5))
+    assert len(windows) == 3
+
+
+def test_parse_hourly_response_is_columnar():
+    extractor = OpenMeteoExtractor()
+    batch = extractor.parse_hourly_response("Berlin", {
+        "latitude": 52.52,
+        "longitude": 13.42,
+        "hourly": {"time": ["2024-01-01T00:00", "2024-01-01T01:00"],
+                   "temperature_2m": [-1.5, None]},
+    })
+    extractor.close()
+    frame = batch.to_pandas()
+
+    assert list(frame["temperature_fahrenheit"].fillna(-999)) == [29.3, -999]
+    assert str(frame["recorded_at"][1]) == "2024-01-01 01:00:00"
+    assert set(frame["country"]) == {"Germany"}
+
+
+def test_backfill_loads_windows_and_resumes(warehouse, tmp_path):
+    checkpoint = tmp_path / "checkpoint.txt"
+    start, end = date(2019, 1, 1), date(2019, 1, 5)
+    with FakeOpenMeteoServer() as server:
+        extractor = _TestExtractor(archive_url=server.url,
+                                   rate_limiter=TokenBucket(1000, 1000))
+        loaded = backfill(["Berlin", "London"], start, end, window_days=2,
+                          max_workers=4, checkpoint_path=checkpoint, extractor=extractor)
+        requests_first_run = server.request_count
+        reloaded = backfill(["Berlin", "London"], start, end, window_days=2,
+                            max_workers=4, checkpoint_path=checkpoint, extractor=extractor)
+        extractor.close()
+
+    assert loaded == 2 * 5 * 24
+    assert requests_first_run == 2 * 3
+    assert reloaded == 0
+    assert server.request_count == requests_first_run
@@ -0,0 +1,62 @@
+"""Tests for the columnar WeatherBatch."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from transform.batch import NAT, WeatherBatch
+from transform.measurements import transform
+
+
+def _batch():
+    measurements = transform({"temperature_2m": [16.0, None, 20.0],
+                              "relative_humidity_2m": [72, None, 50],
+                              "weather_code": [61, None, 0]})
+    return WeatherBatch.build(["Berlin", "London", "Berlin"], ["Germany", "UK", "Germany"],
+                              [52.52, 51.51, 52.52], [13.41, -0.13, 13.41], measurements,
+                              ["2025-08-03T00:45", None, "2025-08-03T01:45"])
+
+
+def test_columns_are_encoded():
+    batch = _batch()
+
+    assert batch.city.codes.tolist() == [0, 1, 0]
+    assert batch.city.categories.tolist() == ["Berlin", "London"]
+    assert batch.recorded_at.dtype == np.int64
+    assert batch.recorded_at[1] == NAT
+    assert batch.row(0)["recorded_at"] == datetime(2025, 8, 3, 0, 45)
+    assert batch.row(1)["recorded_at"] is None
+    assert batch.row(2)["condition"] == "Clear"
+
+
+def test_slices_share_buffers():
+    batch = _batch()
+    tail = batch[1:]
+
+    assert len(tail) == 2
+    assert np.shares_memory(tail.recorded_at, batch.recorded_at)
+    assert np.shares_memory(tail.measurements["temperature_celsius"], batch.measurements["temperature_celsius"])
+    assert tail.city.categories is batch.city.categories
+    assert [len(part) for part in batch.batches(2)] == [2, 1]
+
+
+def test_round_trips_are_lossless():
+    batch = _batch()
+    records = batch.to_records()
+
+    assert WeatherBatch.from_records(records).to_records() == records
+    assert WeatherBatch.from_pandas(batch.to_pandas()).to_records() == records
+    assert WeatherBatch.from_arrow(batch.to_arrow()).to_records() == records
+    frame = batch.to_pandas()
+    assert str(frame["humidity_percent"].dtype) == "Int64"
+    assert isinstance(frame["city"].dtype, pd.CategoricalDtype)
+
+
+def test_concat_merges_categories():
+    batch = _batch()
+    other = WeatherBatch.from_records([{**batch.row(0), "city": "Paris", "country": "France"}])
+    joined = WeatherBatch.concat([batch, other, WeatherBatch.empty()])
+
+    assert joined.city.decode() == ["Berlin", "London", "Berlin", "Paris"]
+    assert joined.country.decode()[-1] == "France"
+    assert len(WeatherBatch.empty()) == 0
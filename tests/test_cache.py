@@ -0,0 +1,104 @@
+"""Tests for the on-disk response cache."""
+import sqlite3
+import threading
+from multiprocessing import Pool
+
+import pytest
+
+from extract.cache import ResponseCache
+from config.locations import get_registry
+from extract.open_meteo import OpenMeteoExtractor
+from utils.rate_limiter import TokenBucket
+from tests.fake_open_meteo import FakeOpenMeteoServer
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_rerun_in_same_slot_makes_no_requests(tmp_path):
+    with FakeOpenMeteoServer() as server:
+        for _ in range(2):
+            extractor = OpenMeteoExtractor(base_url=server.url,
+                                           rate_limiter=TokenBucket(1000, 1000),
+                                           cache=ResponseCache(tmp_path / "cache.sqlite3"))
+            data = extractor.extract_all_cities()
+            stats = extractor.cache.stats()
+            extractor.close()
+
+    assert len(data) == len(get_registry())
+    assert server.request_count == len(data)
+    assert stats["hits"] == len(data) and stats["misses"] == 0
+
+
+def test_entries_expire_at_end_of_update_slot(tmp_path):
+    clock = FakeClock(now=900 * 1000 + 100)
+    cache = ResponseCache(tmp_path / "cache.sqlite3", update_interval=900, clock=clock)
+    cache.put("http://x/forecast", {"latitude": 1, "longitude": 2}, {"ok": True})
+
+    clock.now += 700
+    assert cache.get("http://x/forecast", {"longitude": 2, "latitude": 1}) == {"ok": True}
+    clock.now += 200
+    assert cache.get("http://x/forecast", {"latitude": 1, "longitude": 2}) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_entries=2, clock=clock)
+    for name in ("a", "b"):
+        clock.now += 1
+        cache.put("http://x", {"q": name}, name, ttl=3600)
+    clock.now += 1
+    cache.get("http://x", {"q": "a"})
+    clock.now += 1
+    cache.put("http://x", {"q": "c"}, "c", ttl=3600)
+
+    assert cache.get("http://x", {"q": "b"}) is None
+    assert cache.get("http://x", {"q": "a"}) == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_puts_below_the_bound_do_not_count_the_table(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_entries=100)
+    statements = []
+    cache._connection().set_trace_callback(statements.append)
+    for i in range(20):
+        cache.put("http://x", {"i": i}, i, ttl=3600)
+
+    # Only the first put counts, to seed the estimate
+    assert sum("COUNT(*)" in statement for statement in statements) == 1
+
+
+def test_close_closes_every_thread_connection(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+    opened = []
+    worker = threading.Thread(target=lambda: opened.append(cache._connection()))
+    worker.start()
+    worker.join()
+
+    cache.close()
+
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        opened[0].execute("SELECT 1")
+    assert cache.get("http://x") is None
+
+
+def _write_entries(args):
+    path, worker = args
+    cache = ResponseCache(path)
+    for i in range(50):
+        cache.put("http://x", {"worker": worker, "i": i}, i, ttl=3600)
+    return cache.stats()["entries"]
+
+
+def test_concurrent_processes_share_the_cache(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    with Pool(4) as pool:
+        pool.map(_write_entries, [(path, worker) for worker in range(4)])
+
+    assert ResponseCache(path).stats()["entries"] == 200
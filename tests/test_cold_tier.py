@@ -0,0 +1,104 @@
+"""Tests for cold-tier archival and the federated range reader (need a warehouse database)."""
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from load.cold_tier import ColdTier
+from load.loader import WeatherLoader
+from load.partitions import PartitionManager
+from load.summary import maintainers, recompute_groups
+from load.watermark import LoadWatermark
+from query import weather
+from query.cache import QueryCache
+from query.federated import weather_data
+
+
+def _reading(city, country, recorded_at, temp):
+    return {"city": city, "country": country, "latitude": 0.0, "longitude": 0.0,
+            "temperature_celsius": temp, "temperature_fahrenheit": temp * 9 / 5 + 32,
+            "recorded_at": recorded_at, "api_source": "test"}
+
+
+@pytest.fixture
+def archive(warehouse, tmp_path):
+    cold = ColdTier(warehouse, root=tmp_path, load_watermark=LoadWatermark(warehouse, poll_interval=0),
+                    row_group_rows=2)
+    if not cold.enabled():
+        pytest.skip("etl_cold_archive is missing")
+    manager = PartitionManager(warehouse)
+    existing = set(manager.list_partitions())
+    yield cold
+    groups = warehouse.execute_query("""
+        SELECT DISTINCT a.location_id, d.date_id
+        FROM etl_cold_archive a
+        JOIN dim_date d ON d.full_date >= a.month AND d.full_date < a.month + INTERVAL '1 month'
+        WHERE a.month = '2019-05-01'
+    """)
+    warehouse.execute_query("DELETE FROM etl_cold_archive WHERE month = '2019-05-01'")
+    # Before dropping the partitions the load created, which would take the facts without their rollups
+    groups += warehouse.execute_query("DELETE FROM fact_weather_measurements WHERE api_source = 'test' "
+                                      "RETURNING location_id, date_id")
+    recompute_groups(list(set(groups)), warehouse)
+    for month in set(manager.list_partitions()) - existing:
+        warehouse.execute_query(f"DROP TABLE IF EXISTS {manager.partition_name(month)}")
+
+
+def test_archive_moves_old_months_and_reader_spans_both_tiers(warehouse, archive):
+    WeatherLoader(warehouse).load([
+        _reading("Berlin", "Germany", datetime(2019, 5, 3, 10), 10.0),
+        _reading("Berlin", "Germany", datetime(2019, 5, 1, 9), 11.0),
+        _reading("Berlin", "Germany", datetime(2019, 5, 20, 8), 12.0),
+        _reading("London", "UK", datetime(2019, 5, 2, 7), 13.0),
+        _reading("Berlin", "Germany", datetime(2019, 6, 2, 7), 14.0),
+    ])
+    before = weather_data(date(2019, 5, 2), date(2019, 6, 3), archive=archive)
+
+    archived = archive.archive_month(date(2019, 5, 1))
+
+    assert archived == 4
+    assert warehouse.execute_query("SELECT COUNT(*) FROM fact_weather_measurements "
+                                   "WHERE api_source = 'test' AND recorded_at < '2019-06-01'")[0][0] == 0
+    files = archive.files(datetime(2019, 5, 1), datetime(2019, 6, 1))
+    assert [path.parent.name for path in files] == sorted(path.parent.name for path in files)
+    assert len(files) == 2
+    berlin = pq.ParquetFile(max(files, key=lambda path: pq.ParquetFile(path).metadata.num_rows))
+    stats = [berlin.metadata.row_group(i).column(berlin.schema_arrow.get_field_index("recorded_at")).statistics
+             for i in range(berlin.num_row_groups)]
+    assert [(s.min, s.max) for s in stats] == [(datetime(2019, 5, 1, 9), datetime(2019, 5, 3, 10)),
+                                               (datetime(2019, 5, 20, 8), datetime(2019, 5, 20, 8))]
+
+    after = weather_data(date(2019, 5, 2), date(2019, 6, 3), archive=archive)
+    assert after.drop(columns="weather_condition").astype(str).values.tolist() == \
+        before.drop(columns="weather_condition").astype(str).values.tolist()
+    assert [float(t) for t in after.temperature_celsius] == [13.0, 10.0, 12.0, 14.0]
+    assert archive.files(datetime(2019, 5, 21), datetime(2019, 6, 1)) == []
+    assert archive.read(datetime(2019, 5, 4), datetime(2019, 5, 10)).num_rows == 0
+
+    london = weather_data(date(2019, 5, 1), date(2019, 7, 1), city="London", country="UK", archive=archive)
+    assert london.recorded_at.tolist() == [datetime(2019, 5, 2, 7)]
+
+    for maintainer in maintainers(warehouse):
+        if maintainer.enabled():
+            assert maintainer.verify(since=archive.archived_through()) == []
+
+
+def test_archived_months_are_closed_to_loads_and_read_by_fact_queries(warehouse, archive, monkeypatch):
+    monkeypatch.setattr(weather, "cold_tier", archive)
+    monkeypatch.setattr(weather, "query_cache", QueryCache(load_watermark=LoadWatermark(warehouse, poll_interval=0)))
+    loader = WeatherLoader(warehouse, archive=archive)
+    loader.load([_reading("Berlin", "Germany", datetime(2019, 5, 3, 10, 15), 10.0),
+                 _reading("Berlin", "Germany", datetime(2019, 6, 2, 7, 15), 14.0)])
+    archive.archive_month(date(2019, 5, 1))
+
+    result = loader.load([_reading("Berlin", "Germany", datetime(2019, 5, 3, 10, 15), 99.0),
+                          _reading("Berlin", "Germany", datetime(2019, 6, 2, 8, 15), 15.0)])
+    frame = loader.load_frame(pd.DataFrame([_reading("Berlin", "Germany", datetime(2019, 5, 4, 10), 99.0)]))
+
+    assert result.loaded == 1
+    assert [reject["reason"] for reject in result.rejects + frame.rejects] == ["month archived"] * 2
+    assert weather.route(datetime(2019, 5, 3, 10, 30), datetime(2019, 6, 2, 7, 30)) == "fact"
+    assert [point.max_celsius for point in weather.temperature_series(
+        "Berlin", datetime(2019, 5, 3, 10, 10), datetime(2019, 6, 2, 8, 30), "day", country="Germany")] == \
+        [10.0, 15.0]
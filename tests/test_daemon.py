@@ -0,0 +1,102 @@
+"""Tests for the streaming daemon with a fake server and an in-memory loader."""
+import threading
+import time
+
+from config.locations import get_registry
+from extract.open_meteo import OpenMeteoExtractor
+from load.loader import LoadResult
+from run_daemon import MicroBatcher, StreamingDaemon, next_slot
+from transform.batch import WeatherBatch
+from utils.rate_limiter import TokenBucket
+from tests.fake_open_meteo import FakeOpenMeteoServer
+
+
+class RecordingLoader:
+    """Loader that keeps the batches it is given, optionally slowly or failing first."""
+
+    def __init__(self, delay=0.0, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.batches = []
+
+    def load_batch(self, batch):
+        time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("warehouse unavailable")
+        self.batches.append(batch)
+        return LoadResult(loaded=len(batch))
+
+
+def _batch(rows):
+    return WeatherBatch.from_records([{"city": "Berlin", "country": "Germany", "temperature_celsius": 20.0,
+                                       "recorded_at": "2025-08-03T10:15"}] * rows)
+
+
+def test_next_slot_is_aligned_to_the_interval():
+    assert next_slot(1000.0, 900) == 1800.0
+    assert next_slot(1800.0, 900) == 1800.0
+    assert next_slot(1000.0, 900, offset=60) == 1860.0
+    assert next_slot(1850.0, 900, offset=60) == 1860.0
+
+
+def test_micro_batches_flush_by_size_and_age():
+    now = [0.0]
+    loader = RecordingLoader()
+    batcher = MicroBatcher(loader, max_rows=5, max_seconds=10, clock=lambda: now[0])
+
+    batcher.add(_batch(3))
+    assert loader.batches == [] and batcher.seconds_until_due() == 10
+    batcher.add(_batch(3))
+    assert [len(batch) for batch in loader.batches] == [6]
+
+    batcher.add(_batch(2))
+    now[0] = 12.0
+    assert batcher.seconds_until_due() == 0
+    batcher.flush()
+    assert [len(batch) for batch in loader.batches] == [6, 2]
+    assert batcher.totals.loaded == 8
+
+
+def test_failed_flush_is_retried():
+    loader = RecordingLoader(failures=1)
+    batcher = MicroBatcher(loader, max_rows=2, max_seconds=10)
+
+    batcher.add(_batch(2))
+    assert batcher.rows == 2
+    batcher.drain()
+    assert batcher.rows == 0 and [len(batch) for batch in loader.batches] == [2]
+
+
+def test_daemon_streams_every_slot_through_a_bounded_queue():
+    cities = len(get_registry())
+    # The slow loader fills the one-batch queue, so producers wait on it
+    loader = RecordingLoader(delay=0.05)
+    with FakeOpenMeteoServer() as server:
+        daemon = StreamingDaemon(
+            extractor_factory=lambda: OpenMeteoExtractor(base_url=server.url, rate_limiter=TokenBucket(1000, 1000)),
+            loader=loader, producers=2, interval=0.2, offset=0, queue_size=1, flush_rows=4, flush_seconds=0.05,
+        )
+        totals = daemon.run(max_slots=2)
+
+    assert totals.loaded == 2 * cities
+    assert sorted(WeatherBatch.concat(loader.batches).city.decode()) == sorted(get_registry().cities() * 2)
+
+
+def test_stop_loads_what_is_in_flight():
+    loader = RecordingLoader()
+    with FakeOpenMeteoServer() as server:
+        daemon = StreamingDaemon(
+            extractor_factory=lambda: OpenMeteoExtractor(base_url=server.url, rate_limiter=TokenBucket(1000, 1000)),
+            loader=loader, interval=0.2, offset=0, flush_rows=10_000, flush_seconds=60,
+        )
+        runner = threading.Thread(target=daemon.run)
+        runner.start()
+        time.sleep(0.5)
+        daemon.stop()
+        runner.join(timeout=5)
+
+    assert not runner.is_alive()
+    # Nothing reached the size or age trigger; the buffered readings were loaded on shutdown
+    assert daemon.batcher.rows == 0
+    assert daemon.batcher.totals.loaded == sum(len(batch) for batch in loader.batches) > 0
@@ -0,0 +1,35 @@
+"""Tests for pooled connections and run-scoped transactions (need a warehouse database)."""
+import pytest
+
+
+def test_unit_of_work_shares_one_connection(warehouse):
+    with warehouse.unit_of_work():
+        first = warehouse.execute_query("SELECT pg_backend_pid()")[0][0]
+        second = warehouse.execute_query("SELECT pg_backend_pid()")[0][0]
+
+    assert first == second
+
+
+def test_unit_of_work_rolls_back_together(warehouse):
+    callbacks = []
+    with pytest.raises(RuntimeError):
+        with warehouse.unit_of_work():
+            warehouse.execute_query(
+                "INSERT INTO dim_location (city_name, country) VALUES ('Testville', 'Testland')"
+            )
+            warehouse.on_rollback(lambda: callbacks.append("rolled back"))
+            raise RuntimeError("abort batch")
+
+    rows = warehouse.execute_query("SELECT 1 FROM dim_location WHERE city_name = 'Testville'")
+    assert rows == []
+    assert callbacks == ["rolled back"]
+
+
+def test_execute_query_returns_returning_rows(warehouse):
+    rows = warehouse.execute_query(
+        "INSERT INTO dim_location (city_name, country) VALUES ('Testville', 'Testland') "
+        "RETURNING location_id"
+    )
+    warehouse.execute_query("DELETE FROM dim_location WHERE city_name = 'Testville'")
+
+    assert len(rows) == 1
@@ -0,0 +1,70 @@
+"""Tests for the in-memory dimension-key resolver (need a warehouse database)."""
+import threading
+from datetime import date
+
+from load.dimensions import BoundedCache, DimensionKeyResolver
+
+
+def test_bounded_cache_evicts_least_recently_used():
+    cache = BoundedCache(max_size=2)
+    cache.store("a", 1)
+    cache.store("b", 2)
+    cache.lookup("a")
+    cache.store("c", 3)
+
+    assert list(cache) == ["a", "c"]
+
+
+def test_resolver_preloads_and_counts_hits(warehouse):
+    resolver = DimensionKeyResolver(warehouse)
+    resolver.refresh_if_changed()
+
+    locations = resolver.resolve_locations([("Berlin", "Germany"), ("Atlantis", "Nowhere")])
+    dates = resolver.resolve_dates([date(2025, 8, 3), date(2025, 8, 3)])
+
+    assert list(locations) == [("Berlin", "Germany")]
+    assert list(dates) == [date(2025, 8, 3)]
+    assert resolver.resolve_time(10) is not None
+    stats = resolver.stats()
+    assert stats["location"]["hits"] == 1 and stats["location"]["misses"] == 1
+    assert stats["date"]["hits"] == 1
+    assert stats["time"] == {"hits": 1, "misses": 0, "size": 24}
+
+
+def test_resolver_reloads_when_locations_change(warehouse):
+    resolver = DimensionKeyResolver(warehouse)
+    resolver.refresh_if_changed()
+    warehouse.execute_query(
+        "INSERT INTO dim_location (city_name, country) VALUES ('Testville', 'Testland')"
+    )
+    try:
+        resolver.refresh_if_changed()
+        assert ("Testville", "Testland") in resolver.locations
+    finally:
+        warehouse.execute_query("DELETE FROM dim_location WHERE city_name = 'Testville'")
+
+
+def test_resolver_keeps_answering_while_another_thread_reloads(warehouse):
+    resolver = DimensionKeyResolver(warehouse, max_locations=2)
+    resolver.refresh_if_changed()
+    misses = []
+    done = threading.Event()
+
+    def resolve():
+        while not done.is_set():
+            resolver.resolve_locations([("Berlin", "Germany"), ("London", "UK"), ("Paris", "France")])
+            if resolver.resolve_time(10) is None:
+                misses.append(10)
+
+    threads = [threading.Thread(target=resolve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(20):
+            resolver.preload()
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+
+    assert misses == []
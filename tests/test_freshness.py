@@ -0,0 +1,85 @@
+"""Tests for per-location freshness watermarks in the loader and extractors."""
+from datetime import datetime, timedelta, timezone
+
+from config.locations import get_registry
+from extract.open_meteo import OpenMeteoExtractor
+from load.freshness import LocationFreshness
+from load.loader import WeatherLoader
+from load.seen_keys import SeenKeyIndex
+from utils.rate_limiter import TokenBucket
+from tests.fake_open_meteo import FakeOpenMeteoServer
+
+
+def _reading(recorded_at, temp=20.0):
+    return {"city": "Berlin", "country": "Germany", "latitude": 52.52, "longitude": 13.41,
+            "temperature_celsius": temp, "recorded_at": recorded_at, "api_source": "test"}
+
+
+class StubFreshness:
+    """Watermarks held in memory, keyed like LocationFreshness."""
+
+    def __init__(self, latest):
+        self._latest = latest
+
+    def latest(self, city, country, api_source):
+        return self._latest.get((city, country, api_source))
+
+
+def test_readings_not_newer_than_the_watermark_are_skipped(warehouse):
+    store = LocationFreshness(warehouse, ttl=3600)
+    # Without the seen-key index, which would drop the replayed readings first
+    loader = WeatherLoader(warehouse, location_freshness=store, seen_key_index=SeenKeyIndex(warehouse, 0))
+    assert store.latest("Berlin", "Germany", "test") is None
+
+    first = loader.load([_reading(datetime(2025, 8, 3, 10, 15))])
+    again = loader.load([_reading(datetime(2025, 8, 3, 10, 15), temp=21.0)])
+    newer = loader.load([_reading(datetime(2025, 8, 3, 10, 15)), _reading(datetime(2025, 8, 3, 10, 30))])
+
+    assert (first.loaded, first.skipped) == (1, 0)
+    assert (again.loaded, again.skipped) == (0, 1)
+    assert (newer.loaded, newer.skipped) == (1, 1)
+    # The cached copy took the committed watermark without reloading
+    assert store.latest("Berlin", "Germany", "test") == datetime(2025, 8, 3, 10, 30)
+    assert warehouse.execute_query("""
+        SELECT w.last_recorded_at FROM etl_location_watermark w
+        JOIN dim_location l ON w.location_id = l.location_id
+        WHERE l.city_name = 'Berlin' AND w.api_source = 'test'
+    """)[0][0] == datetime(2025, 8, 3, 10, 30)
+
+    backfill = WeatherLoader(warehouse, location_freshness=store, skip_unchanged=False)
+    assert backfill.load([_reading(datetime(2025, 8, 3, 10, 0))]).loaded == 1
+
+
+def test_lag_report_flags_stale_locations(warehouse):
+    store = LocationFreshness(warehouse)
+    WeatherLoader(warehouse, location_freshness=store).load([_reading(datetime(2025, 8, 3, 10, 15))])
+
+    berlin = [row for row in store.lag_report(stale_after_minutes=90)
+              if row["city"] == "Berlin" and row["api_source"] == "test"]
+    assert len(berlin) == 1 and berlin[0]["stale"] and berlin[0]["lag_minutes"] > 90
+    assert not [row for row in store.lag_report(stale_after_minutes=1e9)
+                if row["city"] == "Berlin" and row["api_source"] == "test"][0]["stale"]
+
+
+def test_extractor_skips_locations_loaded_for_the_current_slot():
+    registry = get_registry()
+    now = datetime(2025, 8, 3, 10, 20, tzinfo=timezone.utc)
+    extractor = OpenMeteoExtractor(rate_limiter=TokenBucket(1000, 1000))
+    slot = extractor._slot_start(registry.timezone(0), now)
+    assert slot.minute % 15 == 0 and slot.second == 0
+
+    fresh = (registry.city(0), registry.country(0), "open_meteo")
+    extractor.freshness = StubFreshness({fresh: slot})
+    assert extractor.is_fresh(0, now)
+    extractor.freshness = StubFreshness({fresh: slot - timedelta(minutes=1)})
+    assert not extractor.is_fresh(0, now)
+    assert not extractor.is_fresh(1, now)
+
+    with FakeOpenMeteoServer() as server:
+        extractor = OpenMeteoExtractor(base_url=server.url, rate_limiter=TokenBucket(1000, 1000),
+                                       freshness=StubFreshness({fresh: datetime(2100, 1, 1)}))
+        data = extractor.extract_all_cities()
+        extractor.close()
+
+    assert data.city.decode() == registry.cities()[1:]
+    assert server.request_count == len(registry) - 1
@@ -0,0 +1,175 @@
+"""Tests for the set-based bulk loader (need a warehouse database)."""
+import calendar
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from load.loader import WeatherLoader
+from load.seen_keys import SeenKeyIndex
+
+
+def _test_rows(warehouse):
+    return warehouse.execute_query("SELECT COUNT(*) FROM fact_weather_measurements WHERE api_source = 'test'")[0][0]
+
+
+def _reading(city, country, recorded_at, temp=20.0):
+    return {
+        "city": city,
+        "country": country,
+        "latitude": 0.0,
+        "longitude": 0.0,
+        "temperature_celsius": temp,
+        "temperature_fahrenheit": temp * 9 / 5 + 32,
+        "recorded_at": recorded_at,
+        "api_source": "test",
+    }
+
+
+def test_load_batch_and_report_rejects(warehouse):
+    records = [
+        _reading("Berlin", "Germany", datetime(2025, 8, 3, 10, 15)),
+        _reading("Atlantis", "Nowhere", datetime(2025, 8, 3, 10, 15)),
+        _reading("London", "UK", "2031-02-01T23:45"),
+        {"city": "Delhi", "country": "India", "recorded_at": None},
+    ]
+
+    result = WeatherLoader(warehouse).load(records)
+
+    assert result.loaded == 2
+    assert [(r["row"], r["reason"]) for r in result.rejects] == [
+        (1, "location not found"),
+        (3, "missing recorded_at"),
+    ]
+    rows = warehouse.execute_query("""
+        SELECT l.city_name, d.full_date, t.hour, f.temperature_celsius
+        FROM fact_weather_measurements f
+        JOIN dim_location l ON f.location_id = l.location_id
+        JOIN dim_date d ON f.date_id = d.date_id
+        JOIN dim_time t ON f.time_id = t.time_id
+        WHERE f.api_source = 'test'
+        ORDER BY l.city_name
+    """)
+    assert [(r[0], str(r[1]), r[2], float(r[3])) for r in rows] == [
+        ("Berlin", "2025-08-03", 10, 20.0),
+        ("London", "2031-02-01", 23, 20.0),
+    ]
+
+
+def test_staged_batch_carries_all_measurements(warehouse, tmp_path):
+    from extract.open_meteo import OpenMeteoExtractor
+    from load.staging import StagingWriter, read_staging_batches
+    from tests.fake_open_meteo import FakeOpenMeteoServer
+
+    response = FakeOpenMeteoServer().build_response(52.52, 13.41)
+    extractor = OpenMeteoExtractor()
+    record = {**extractor.parse_response("Berlin", response, "Germany"), "api_source": "test"}
+    extractor.close()
+    with StagingWriter(tmp_path / "staged.parquet") as writer:
+        writer.write([record])
+
+    batch = next(read_staging_batches(tmp_path / "staged.parquet"))
+    assert WeatherLoader(warehouse).load_batch(batch).loaded == 1
+
+    row = warehouse.execute_query("""
+        SELECT f.humidity_percent, f.visibility_meters, f.wind_speed_mps, f.dew_point_celsius,
+               c.main_condition
+        FROM fact_weather_measurements f
+        JOIN dim_weather_condition c ON f.condition_id = c.condition_id
+        WHERE f.api_source = 'test'
+    """)[0]
+    assert (row[0], row[1], float(row[2]), row[4]) == (72, 24140, 4.0, "Rain")
+    assert float(row[3]) == record["dew_point_celsius"]
+
+
+def test_load_batch_rejects_unknown_and_undated_rows(warehouse):
+    from transform.batch import WeatherBatch
+
+    batch = WeatherBatch.from_records([
+        _reading("Berlin", "Germany", datetime(2025, 8, 3, 11, 15)),
+        _reading("Atlantis", "Nowhere", datetime(2025, 8, 3, 11, 15)),
+        _reading("Berlin", "Germany", None),
+    ])
+
+    result = WeatherLoader(warehouse).load_batch(batch)
+
+    assert result.loaded == 1
+    assert [(r["row"], r["reason"]) for r in result.rejects] == [
+        (1, "location not found"),
+        (2, "missing city, country or recorded_at"),
+    ]
+
+
+def test_reloads_are_idempotent(warehouse):
+    from transform.batch import WeatherBatch
+
+    records = [
+        _reading("Berlin", "Germany", datetime(2025, 8, 3, 12, 15)),
+        _reading("Berlin", "Germany", datetime(2025, 8, 3, 12, 15), temp=21.0),
+        _reading("London", "UK", datetime(2025, 8, 3, 12, 15)),
+    ]
+    # Without the seen-key index or freshness skips every repeat reaches the unique key
+    loader = WeatherLoader(warehouse, seen_key_index=SeenKeyIndex(warehouse, 0), skip_unchanged=False)
+
+    first = loader.load(records)
+    again = loader.load_batch(WeatherBatch.from_records(records))
+
+    assert (first.loaded, first.conflicts) == (2, 1)
+    assert (again.loaded, again.conflicts) == (0, 3)
+    assert _test_rows(warehouse) == 2
+
+
+def test_update_rewrites_conflicting_readings(warehouse):
+    from load.summary import DailySummaryMaintainer
+
+    loader = WeatherLoader(warehouse, skip_unchanged=False, on_conflict="update")
+    loader.load([_reading("Berlin", "Germany", datetime(2025, 8, 3, 13, 15), temp=20.0)])
+
+    changed = loader.load([_reading("Berlin", "Germany", datetime(2025, 8, 3, 13, 15), temp=25.0)])
+    same = loader.load([_reading("Berlin", "Germany", datetime(2025, 8, 3, 13, 15), temp=25.0)])
+
+    assert (changed.loaded, changed.conflicts, changed.updated) == (0, 1, 1)
+    assert (same.loaded, same.conflicts, same.updated) == (0, 1, 0)
+    assert float(warehouse.execute_query(
+        "SELECT temperature_celsius FROM fact_weather_measurements WHERE api_source = 'test'"
+    )[0][0]) == 25.0
+    daily = DailySummaryMaintainer(warehouse)
+    if daily.enabled():
+        assert daily.verify() == []
+
+
+def test_seen_key_index_drops_known_keys_before_staging(warehouse):
+    index = SeenKeyIndex(warehouse, window_hours=24)
+    loader = WeatherLoader(warehouse, seen_key_index=index, skip_unchanged=False)
+    records = [_reading("Berlin", "Germany", datetime(2025, 8, 3, 14, 15))]
+
+    assert loader.load(records).loaded == 1
+
+    berlin = warehouse.execute_query("SELECT location_id FROM dim_location WHERE city_name = 'Berlin'")[0][0]
+    seconds = calendar.timegm(datetime(2025, 8, 3, 14, 15).timetuple())
+    known = index.seen(np.array([berlin, berlin, berlin]), np.array([seconds, seconds + 900, seconds]),
+                       ["test", "test", "other"])
+    assert known.tolist() == [True, False, False]
+
+    result = loader.load(records)
+    assert (result.loaded, result.conflicts) == (0, 1)
+    assert _test_rows(warehouse) == 1
+
+
+def test_seen_key_index_windows_each_location_in_its_own_local_time(warehouse):
+    # Sydney's local clock runs 17 hours ahead of Bellevue's, well past the window
+    now = datetime.utcnow().replace(minute=15, second=0, microsecond=0)
+    sydney, bellevue = now + timedelta(hours=10), now - timedelta(hours=7)
+    index = SeenKeyIndex(warehouse, window_hours=6)
+    loader = WeatherLoader(warehouse, seen_key_index=index, skip_unchanged=False)
+
+    assert loader.load([_reading("Sydney", "Australia", sydney),
+                        _reading("Bellevue", "USA", bellevue)]).loaded == 2
+
+    ids = dict(warehouse.execute_query(
+        "SELECT city_name, location_id FROM dim_location WHERE city_name IN ('Sydney', 'Bellevue')"))
+    locations = np.array([ids["Sydney"], ids["Bellevue"]])
+    seconds = np.array([calendar.timegm(sydney.timetuple()), calendar.timegm(bellevue.timetuple())])
+    assert index.seen(locations, seconds, ["test", "test"]).tolist() == [True, True]
+    # Seeded from the warehouse, too
+    assert SeenKeyIndex(warehouse, window_hours=6).seen(locations, seconds, ["test", "test"]).tolist() == \
+        [True, True]
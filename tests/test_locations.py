@@ -0,0 +1,110 @@
+"""Tests for the array-backed location registry."""
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.locations import LocationRegistry, get_registry, load_registry, shard_of, sync_to_database
+
+
+def _synthetic(count):
+    return pd.DataFrame({
+        "city_name": [f"City {i}" for i in range(count)],
+        "country": [f"Country {i % 200}" for i in range(count)],
+        "state": "",
+        "latitude": np.linspace(-80, 80, count),
+        "longitude": np.linspace(-170, 170, count),
+        "timezone": "UTC",
+    })
+
+
+def test_registry_file_lists_monitored_cities():
+    registry = get_registry()
+    berlin = registry.find("Berlin")
+
+    assert len(registry) == 10
+    assert registry.get(berlin)["country"] == "Germany"
+    assert registry.find("Bellevue", "USA") == registry.find("Bellevue")
+    assert registry.find("Bellevue", "UK") is None
+    assert registry.find("Atlantis") is None
+
+
+def test_lookup_disambiguates_by_country_and_id():
+    frame = pd.DataFrame({
+        "location_id": [7, 3, 11],
+        "city_name": ["Paris", "Paris", "Lyon"],
+        "country": ["France", "USA", "France"],
+        "latitude": [48.85, 33.66, 45.76],
+        "longitude": [2.35, -95.55, 4.84],
+    })
+    registry = LocationRegistry(frame)
+
+    assert registry.find("Paris", "USA") == 1
+    assert registry.find("Paris") == 0
+    assert registry.find_id(11) == 2
+    assert registry.find_id(4) is None
+    assert registry.timezone(0) == "UTC"
+
+
+def test_registry_scales_to_100k_locations(tmp_path):
+    path = tmp_path / "locations.parquet"
+    _synthetic(100_000).to_parquet(path)
+
+    start = time.perf_counter()
+    registry = LocationRegistry.from_parquet(path)
+    elapsed = time.perf_counter() - start
+
+    assert len(registry) == 100_000
+    assert registry.find("City 98765", "Country 165") == 98765
+    assert registry.find_id(98766) == 98765
+    assert elapsed < 5
+    # Arrays only: well under 100 bytes per location
+    assert registry.nbytes < 100 * len(registry)
+
+
+def test_default_csv_path_resolves_outside_the_project_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    registry = load_registry("csv")
+
+    assert registry.find("Bellevue", "USA") is not None
+
+
+def test_sync_upserts_into_dim_location(warehouse):
+    registry = LocationRegistry.from_csv("data/locations.csv")
+    sync_to_database(registry, warehouse)
+
+    assert sync_to_database(registry, warehouse) == 0
+    stored = LocationRegistry.from_database(warehouse)
+    bellevue = stored.find("Bellevue", "USA")
+    assert stored.timezone(bellevue) == "America/Los_Angeles"
+
+
+def test_shards_partition_locations_evenly():
+    registry = LocationRegistry(_synthetic(10_000))
+    shards = [registry.shard(shard, 8) for shard in range(8)]
+
+    assert sorted(np.concatenate(shards).tolist()) == list(range(10_000))
+    assert min(len(s) for s in shards) > 0.9 * 10_000 / 8
+    # The assignment is a pure function of location_id
+    assert (shard_of(registry.location_ids, 8)[shards[3]] == 3).all()
+
+
+def test_nearest_location_by_coordinates():
+    registry = get_registry()
+    berlin = registry.find("Berlin")
+
+    assert registry.nearest(52.4, 13.6) == berlin
+    assert registry.nearest(52.4, 13.6, max_distance_km=5) is None
+
+    # Across the antimeridian: 179.9 E is closer to 179.9 W than to 170 E
+    frame = _synthetic(3).assign(latitude=[0.0, 0.0, 60.0], longitude=[-179.9, 170.0, 0.0])
+    assert LocationRegistry(frame).nearest(0.0, 179.9) == 0
+
+    frame = _synthetic(5000)
+    registry = LocationRegistry(frame)
+    rng = np.random.default_rng(0)
+    for lat, lon in zip(rng.uniform(-90, 90, 50), rng.uniform(-180, 180, 50)):
+        lat1, lon1, lat2, lon2 = map(np.radians, (lat, lon, frame.latitude, frame.longitude))
+        haversine = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        assert registry.nearest(lat, lon) == int(np.argmin(haversine))
@@ -0,0 +1,83 @@
+"""Tests for the run metrics registry."""
+import json
+import time
+
+import pytest
+
+from extract.open_meteo import OpenMeteoExtractor
+from extract.retry import RetryPolicy
+from utils.metrics import MetricsRegistry, metrics
+from utils.rate_limiter import TokenBucket
+from tests.fake_open_meteo import FakeOpenMeteoServer
+
+
+def test_prometheus_export_has_counters_and_cumulative_buckets():
+    registry = MetricsRegistry(enabled=True, prefix="t")
+    registry.inc("requests_total", endpoint="forecast")
+    registry.inc("requests_total", 2, endpoint="forecast")
+    for value in (0.002, 0.02, 0.2):
+        registry.observe("latency_seconds", value, buckets=(0.01, 0.1, 1.0))
+
+    text = registry.to_prometheus()
+
+    assert 't_requests_total{endpoint="forecast"} 3' in text
+    assert 't_latency_seconds_bucket{le="0.01"} 1' in text
+    assert 't_latency_seconds_bucket{le="0.1"} 2' in text
+    assert 't_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "t_latency_seconds_count 3" in text
+
+
+def test_span_times_block_and_counts_errors(tmp_path):
+    registry = MetricsRegistry(enabled=True)
+    with registry.span("stage", stage="load"):
+        pass
+    with pytest.raises(ValueError):
+        with registry.span("stage", stage="load"):
+            raise ValueError
+
+    summary = registry.summary()
+    assert summary["histograms"]["stage_seconds{stage=load}"]["count"] == 2
+    assert summary["counters"]["stage_errors_total{stage=load}"] == 1
+
+    paths = registry.write("load shard", tmp_path)
+    assert json.loads(paths["summary"].read_text())["counters"] == summary["counters"]
+    assert paths["prometheus"].name == "load_shard.prom"
+    # The next run of the job replaces its files rather than adding to them
+    registry.write("load shard", tmp_path)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["load_shard.json", "load_shard.prom"]
+
+
+def test_disabled_registry_records_nothing_cheaply():
+    registry = MetricsRegistry(enabled=False)
+    start = time.perf_counter()
+    for _ in range(100_000):
+        with registry.span("stage"):
+            registry.inc("rows_total")
+    elapsed = time.perf_counter() - start
+
+    assert registry.summary()["counters"] == {} and registry.summary()["histograms"] == {}
+    # Roughly a microsecond per instrumented block
+    assert elapsed < 1.0
+
+
+def test_extractor_records_http_calls():
+    enabled = metrics.enabled
+    metrics.enabled = True
+    metrics.reset()
+    try:
+        with FakeOpenMeteoServer(throttle_every=4, retry_after=0) as server:
+            extractor = OpenMeteoExtractor(base_url=server.url, rate_limiter=TokenBucket(1000, 1000),
+                                           retry_policy=RetryPolicy(base_delay=0.01))
+            extractor.extract_all_cities(max_workers=1)
+            extractor.close()
+        counters = metrics.summary()["counters"]
+        histograms = metrics.summary()["histograms"]
+    finally:
+        metrics.enabled = enabled
+        metrics.reset()
+
+    # Every throttled request is retried, so all ten cities are answered
+    assert counters["http_responses_total{endpoint=forecast,status=200}"] == 10
+    assert counters["http_responses_total{endpoint=forecast,status=429}"] == 3
+    assert counters["http_request_events_total{endpoint=forecast,event=retries}"] == 3
+    assert histograms["http_request_seconds{endpoint=forecast}"]["count"] == 13
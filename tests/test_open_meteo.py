@@ -0,0 +1,137 @@
+"""Tests for the Open-Meteo extractor against a local fake server."""
+import time
+
+import pandas as pd
+
+from config.locations import LocationRegistry, get_registry
+from extract.grid_cells import GridCells
+from extract.open_meteo import OpenMeteoExtractor
+from extract.retry import RetryPolicy
+from utils.rate_limiter import TokenBucket
+from transform.batch import WeatherBatch
+from tests.fake_open_meteo import FakeOpenMeteoServer
+
+
+def _timed_extract(server, workers):
+    extractor = OpenMeteoExtractor(base_url=server.url,
+                                   rate_limiter=TokenBucket(1000, 1000),
+                                   max_workers=workers)
+    start = time.perf_counter()
+    data = extractor.extract_all_cities().to_records()
+    elapsed = time.perf_counter() - start
+    extractor.close()
+    return data, elapsed
+
+
+def test_extract_all_cities_returns_same_records():
+    with FakeOpenMeteoServer() as server:
+        data, _ = _timed_extract(server, workers=4)
+
+    assert [d["city"] for d in data] == get_registry().cities()
+    assert data[0]["temperature_celsius"] == 16.0
+    assert data[0]["temperature_fahrenheit"] == 60.8
+    assert data[0]["api_source"] == "open_meteo"
+
+
+def test_wall_clock_scales_with_concurrency():
+    cities = len(get_registry())
+    with FakeOpenMeteoServer(latency=0.1) as server:
+        _, sequential = _timed_extract(server, workers=1)
+        _, parallel = _timed_extract(server, workers=cities)
+
+    # Sequential pays latency once per city, parallel roughly once overall
+    assert sequential >= 0.1 * cities
+    assert parallel < sequential / 3
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    # First token is free, the next five wait 1/20 s each
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_batched_extraction_matches_per_city():
+    with FakeOpenMeteoServer() as server:
+        per_city, _ = _timed_extract(server, workers=1)
+        server.request_count = 0
+        extractor = OpenMeteoExtractor(base_url=server.url,
+                                       rate_limiter=TokenBucket(1000, 1000))
+        batched = extractor.extract_all_cities_batched(batch_size=4)
+        extractor.close()
+
+    assert batched.to_records() == per_city
+    assert server.request_count == 3
+
+
+def test_chunk_cities_respects_url_length():
+    extractor = OpenMeteoExtractor(base_url="http://127.0.0.1/v1/forecast")
+    cities = get_registry().cities()
+    batches = extractor.chunk_cities(cities, batch_size=100, max_url_length=250)
+    extractor.close()
+
+    assert [city for batch in batches for city in batch] == cities
+    assert len(batches) > 1
+
+
+def test_shards_together_extract_every_city():
+    registry = get_registry()
+    with FakeOpenMeteoServer() as server:
+        extractor = OpenMeteoExtractor(base_url=server.url,
+                                       rate_limiter=TokenBucket(1000, 1000))
+        shards = [[city for batch in extractor.iter_city_batches(
+                      batch_size=4, locations=registry.shard(shard, 3)) for city in batch.city.decode()]
+                  for shard in range(3)]
+        extractor.close()
+
+    assert sorted(city for shard in shards for city in shard) == sorted(registry.cities())
+    assert all(shards)
+
+
+def test_injected_faults_are_retried():
+    with FakeOpenMeteoServer(throttle_every=3, retry_after=0, error_rate=0.2) as server:
+        extractor = OpenMeteoExtractor(base_url=server.url,
+                                       rate_limiter=TokenBucket(1000, 1000),
+                                       retry_policy=RetryPolicy(max_attempts=10, base_delay=0.01),
+                                       max_workers=1)
+        data = extractor.extract_all_cities()
+        extractor.close()
+
+    assert server.throttled_count + server.error_count > 0
+    assert len(data) == len(get_registry())
+    assert extractor.run_stats["retries"] == server.throttled_count + server.error_count
+
+
+def test_locations_sharing_a_grid_cell_are_requested_once(tmp_path):
+    frame = pd.DataFrame({
+        "city_name": ["Seattle", "Bellevue", "Redmond", "Tacoma", "Berlin"],
+        "country": ["USA", "USA", "USA", "USA", "Germany"],
+        "latitude": [47.61, 47.62, 47.67, 47.25, 52.52],
+        "longitude": [-122.33, -122.20, -122.12, -122.44, 13.40],
+    })
+    registry = LocationRegistry(frame)
+    with FakeOpenMeteoServer(grid=0.5) as server:
+        def extract(registry, recheck_hours=24):
+            extractor = OpenMeteoExtractor(base_url=server.url, registry=registry,
+                                           rate_limiter=TokenBucket(1000, 1000),
+                                           grid_cells=GridCells(tmp_path / "cells.parquet",
+                                                                recheck_hours=recheck_hours))
+            batch = WeatherBatch.concat(list(extractor.iter_city_batches(batch_size=1)))
+            extractor.close()
+            server.request_count, requests = 0, server.request_count
+            return sorted(zip(batch.city.decode(), batch.latitude.tolist())), requests
+
+        first, first_requests = extract(registry)
+        second, second_requests = extract(registry)
+        # Cells follow the city, not its position: reordering the registry shifts every synthetic id
+        reordered, reordered_requests = extract(LocationRegistry(frame.iloc[::-1]))
+        _, recheck_requests = extract(registry, recheck_hours=0)
+
+    # Bellevue and Redmond both snap to 47.5, -122.0; the others have cells of their own
+    assert [city for city, _ in first] == sorted(registry.cities())
+    assert first == second == reordered
+    assert (first_requests, second_requests, reordered_requests) == (5, 4, 4)
+    # Past the recheck interval, members are requested on their own again
+    assert recheck_requests == 5
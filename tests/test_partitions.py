@@ -0,0 +1,28 @@
+"""Tests for monthly fact-table partition management."""
+from datetime import date, datetime
+
+import pytest
+
+from load.partitions import PartitionManager, add_months, month_start
+
+
+def test_month_arithmetic():
+    assert month_start(datetime(2025, 8, 3, 10)) == date(2025, 8, 1)
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert PartitionManager.partition_name(date(2025, 8, 1)) == "fact_weather_measurements_y2025m08"
+
+
+def test_ensure_range_creates_missing_months(warehouse):
+    manager = PartitionManager(warehouse)
+    if not manager.is_partitioned():
+        pytest.skip("fact table is not partitioned")
+
+    months = [date(2040, 1, 1), date(2040, 2, 1)]
+    try:
+        with warehouse.unit_of_work():
+            manager.ensure_range(datetime(2040, 1, 15), datetime(2040, 2, 3))
+        assert set(months) <= set(manager.list_partitions())
+    finally:
+        for month in months:
+            warehouse.execute_query(f"DROP TABLE IF EXISTS {manager.partition_name(month)}")
@@ -0,0 +1,127 @@
+"""Tests for the provider registry and the hedged/merge multi-provider runner with stub providers."""
+import time
+from datetime import datetime
+
+import pytest
+
+from config.config import settings
+from config.locations import get_registry
+from extract.base import PROVIDERS, WeatherAPIBase, create_provider
+from extract.multi import MultiProviderExtractor
+from extract.openweather import OpenWeatherExtractor
+from extract.weatherapi import WeatherAPIExtractor
+from transform.measurements import transform
+
+
+class StubProvider(WeatherAPIBase):
+    """Provider answering from memory after a fixed latency, failing for the given locations."""
+
+    def __init__(self, name, temperature, latency=0.0, failing=()):
+        super().__init__()
+        self.name = name
+        self.temperature = temperature
+        self.latency = latency
+        self.failing = set(failing)
+        self.calls = 0
+
+    def _current_request(self, index):
+        return f"stub://{self.name}", {"index": index}
+
+    def _fetch_current(self, index):
+        self.calls += 1
+        time.sleep(self.latency)
+        return None if index in self.failing else {"temperature": self.temperature}
+
+    def parse_responses(self, cities, responses, countries=None):
+        raw = {"temperature_2m": [response["temperature"] for response in responses]}
+        return self._build_batch(cities, countries, 0.0, 0.0, transform(raw, length=len(responses)),
+                                 ["2025-08-03T00:45"] * len(responses))
+
+
+def test_registry_knows_the_configured_providers():
+    assert {"open_meteo", "openweather", "weatherapi"} <= set(PROVIDERS)
+    assert isinstance(create_provider("openweather", api_key="k"), OpenWeatherExtractor)
+    with pytest.raises(ValueError):
+        create_provider("nope")
+
+
+def test_from_settings_skips_providers_without_keys(monkeypatch):
+    monkeypatch.setattr(settings, "weatherapi_key", "")
+    extractor = MultiProviderExtractor.from_settings(["open_meteo", "weatherapi"])
+
+    assert [provider.name for provider in extractor.providers] == ["open_meteo"]
+
+    # The example .env's placeholders are not keys either
+    monkeypatch.setattr(settings, "weatherapi_key", "your_weatherapi_key")
+    assert not WeatherAPIExtractor.configured()
+    monkeypatch.setattr(settings, "weatherapi_key", "3f9a0c")
+    assert WeatherAPIExtractor.configured()
+
+
+def test_hedged_mode_takes_the_first_good_answer():
+    slow, fast = StubProvider("slow", 10.0, latency=0.5), StubProvider("fast", 20.0, latency=0.01)
+    extractor = MultiProviderExtractor([slow, fast], "hedged", hedge_delay=0.05, max_workers=10)
+    start = time.perf_counter()
+    data = extractor.extract_all_cities()
+    elapsed = time.perf_counter() - start
+
+    assert data.city.decode() == get_registry().cities()
+    assert set(data.api_source.decode()) == {"fast"}
+    assert elapsed < 0.5
+    # Once the slow provider's losing answers arrive, the fast one is asked first
+    time.sleep(0.6)
+    assert extractor.ranked()[0] is fast
+
+
+def test_hedged_mode_fails_over_and_steers_away_from_failures():
+    flaky, backup = StubProvider("flaky", 10.0, failing={0, 1, 2}), StubProvider("backup", 20.0)
+    extractor = MultiProviderExtractor([flaky, backup], "hedged", hedge_delay=1.0, max_workers=1)
+    data = extractor.extract_all_cities(locations=[0, 1, 2, 3])
+
+    assert data.api_source.decode() == ["backup"] * 4
+    # After its first failure the flaky provider ranks behind the backup and is not asked again
+    assert flaky.calls == 1
+    assert extractor.health["flaky"].failures == 1
+    assert extractor.ranked()[0] is backup
+
+
+def test_merge_mode_keeps_every_answer_tagged_by_provider():
+    first, second = StubProvider("first", 10.0, failing={1}), StubProvider("second", 20.0)
+    data = MultiProviderExtractor([first, second], "merge").extract_all_cities(locations=[0, 1])
+    rows = data.to_records()
+
+    assert [(row["city"], row["api_source"], row["temperature_celsius"]) for row in rows] == [
+        (get_registry().city(0), "first", 10.0),
+        (get_registry().city(0), "second", 20.0),
+        (get_registry().city(1), "second", 20.0),
+    ]
+
+
+def test_openweather_response_is_parsed():
+    response = {"coord": {"lat": 52.52, "lon": 13.41}, "weather": [{"id": 501}],
+                "main": {"temp": 16.0, "humidity": 72, "pressure": 1013}, "visibility": 10000,
+                "wind": {"speed": 4.0, "deg": 225}, "clouds": {"all": 75}, "rain": {"1h": 0.4},
+                "dt": 1754174700, "timezone": 7200}
+    row = OpenWeatherExtractor(api_key="k").parse_response("Berlin", response, "Germany")
+
+    assert row["temperature_celsius"] == 16.0
+    assert row["wind_speed_mps"] == 4.0
+    assert row["precipitation_mm"] == 0.4
+    assert row["condition"] == "Rain"
+    assert row["recorded_at"] == datetime(2025, 8, 3, 0, 45)
+    assert row["api_source"] == "openweather"
+
+
+def test_weatherapi_response_is_parsed():
+    response = {"location": {"lat": 52.52, "lon": 13.41},
+                "current": {"last_updated": "2025-08-03 00:45", "temp_c": 16.0, "humidity": 72,
+                            "pressure_mb": 1013.0, "wind_kph": 14.4, "wind_degree": 225, "vis_km": 10.0,
+                            "cloud": 75, "precip_mm": 0.2, "uv": 1.0, "condition": {"code": 1183}}}
+    row = WeatherAPIExtractor(api_key="k").parse_response("Berlin", response, "Germany")
+
+    assert row["temperature_celsius"] == 16.0
+    assert row["wind_speed_mps"] == 4.0
+    assert row["visibility_meters"] == 10000
+    assert row["condition"] == "Rain"
+    assert row["recorded_at"] == datetime(2025, 8, 3, 0, 45)
+    assert row["api_source"] == "weatherapi"
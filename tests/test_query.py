@@ -0,0 +1,67 @@
+"""Tests for the routed, cached analytical queries (need a warehouse database)."""
+from datetime import date, datetime
+
+import pytest
+
+from load.loader import WeatherLoader
+from load.watermark import LoadWatermark
+from query import weather
+from query.cache import QueryCache
+from query.weather import CountryMonth, TemperaturePoint
+
+
+def _reading(city, country, recorded_at, temp, humidity=50):
+    return {"city": city, "country": country, "latitude": 0.0, "longitude": 0.0,
+            "temperature_celsius": temp, "humidity_percent": humidity,
+            "recorded_at": recorded_at, "api_source": "test"}
+
+
+@pytest.fixture
+def readings(warehouse, monkeypatch):
+    monkeypatch.setattr(weather, "query_cache", QueryCache(load_watermark=LoadWatermark(warehouse, poll_interval=0)))
+    WeatherLoader(warehouse).load([
+        _reading("Berlin", "Germany", datetime(2032, 3, 1, 10, 15), 10.0),
+        _reading("Berlin", "Germany", datetime(2032, 3, 1, 10, 45), 12.0, 70),
+        _reading("Berlin", "Germany", datetime(2032, 3, 2, 9, 15), 20.0),
+        _reading("London", "UK", datetime(2032, 3, 1, 11, 15), 30.0),
+    ])
+    return warehouse
+
+
+def test_route_picks_coarsest_aligned_rollup(warehouse):
+    assert weather.route(date(2032, 3, 1), date(2032, 4, 1)) == "month"
+    assert weather.route(date(2032, 3, 1), date(2032, 4, 1), "day") == "day"
+    assert weather.route(date(2032, 3, 2), date(2032, 4, 1)) == "day"
+    assert weather.route(datetime(2032, 3, 1, 10), date(2032, 3, 2)) == "hour"
+    assert weather.route(datetime(2032, 3, 1, 10, 30), date(2032, 3, 2)) == "fact"
+    with pytest.raises(ValueError):
+        weather.route(date(2032, 3, 1), date(2032, 4, 1), "week")
+
+
+def test_sources_agree(readings):
+    expected = [TemperaturePoint(datetime(2032, 3, 1), 11.0, 10.0, 12.0, 2),
+                TemperaturePoint(datetime(2032, 3, 2), 20.0, 20.0, 20.0, 1)]
+
+    assert weather.temperature_series("Berlin", date(2032, 3, 1), date(2032, 3, 3)) == expected
+    hourly = weather.temperature_series("Berlin", datetime(2032, 3, 1, 10), datetime(2032, 3, 2, 10), "hour")
+    assert [(p.period.hour, p.avg_celsius, p.readings) for p in hourly] == [(10, 11.0, 2), (9, 20.0, 1)]
+    from_fact = weather.temperature_series("Berlin", datetime(2032, 3, 1, 10, 30), date(2032, 3, 3))
+    assert [(p.avg_celsius, p.readings) for p in from_fact] == [(12.0, 1), (20.0, 1)]
+
+    assert weather.country_monthly_averages(date(2032, 3, 1), date(2032, 4, 1), "Germany") == [
+        CountryMonth("Germany", date(2032, 3, 1), 14.0, 10.0, 20.0, 170 / 3, 3)]
+    hottest = weather.hottest_cities(date(2032, 3, 1), date(2032, 4, 1), limit=1)
+    assert [(c.city, c.max_celsius) for c in hottest] == [("London", 30.0)]
+
+
+def test_cache_is_invalidated_by_loads(readings):
+    cache = weather.query_cache
+    series = weather.temperature_series("London", date(2032, 3, 1), date(2032, 3, 2))
+    assert weather.temperature_series("London", date(2032, 3, 1), date(2032, 3, 2)) == series
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    WeatherLoader(readings).load([_reading("London", "UK", datetime(2032, 3, 1, 12, 15), 40.0)])
+
+    series = weather.temperature_series("London", date(2032, 3, 1), date(2032, 3, 2))
+    assert series[0].max_celsius == 40.0
+    assert cache.invalidations == 1
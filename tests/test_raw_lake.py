@@ -0,0 +1,44 @@
+"""Tests for the raw response lake and replays from it."""
+from datetime import datetime
+
+from extract.open_meteo import OpenMeteoExtractor
+from extract.raw_lake import RawResponseLake
+from run_replay import parse_segment, replay
+from utils.rate_limiter import TokenBucket
+from tests.fake_open_meteo import FakeOpenMeteoServer
+
+
+def test_frames_outside_the_window_are_not_read(tmp_path):
+    lake = RawResponseLake(tmp_path, block_records=2)
+    for minute in range(0, 60, 10):
+        lake.append("open_meteo", [("Berlin", "Germany", {"minute": minute})],
+                    fetched_at=datetime(2025, 8, 3, 14, minute))
+    lake.append("open_meteo", [("Berlin", "Germany", {"minute": 0})], fetched_at=datetime(2025, 8, 3, 15))
+    lake.flush()
+
+    segments = lake.segments(datetime(2025, 8, 3, 14, 20), datetime(2025, 8, 3, 14, 40))
+    assert [segment.parent.name for segment in segments] == ["dt=2025-08-03"]
+    index = segments[0].with_name(segments[0].name.replace(".ndjson.zst", ".idx"))
+    assert len(index.read_text().splitlines()) == 3
+
+    records = list(lake.read(segments[0], datetime(2025, 8, 3, 14, 20), datetime(2025, 8, 3, 14, 40)))
+    assert [record["response"]["minute"] for record in records] == [20, 30]
+    assert len(lake.segments(datetime(2025, 8, 3), datetime(2025, 8, 4))) == 2
+
+
+def test_replay_reproduces_the_extracted_batch_without_the_network(tmp_path):
+    lake = RawResponseLake(tmp_path)
+    started = datetime.utcnow()
+    with FakeOpenMeteoServer() as server:
+        extractor = OpenMeteoExtractor(base_url=server.url, rate_limiter=TokenBucket(1000, 1000), raw_lake=lake)
+        extracted = extractor.extract_all_cities_batched(batch_size=4)
+        extractor.close()
+    finished = datetime.utcnow()
+
+    segments = lake.segments(started, finished)
+    replayed = [parse_segment(lake, segment, started, finished) for segment in segments]
+    assert sorted(map(str, (row for batch in replayed for row in batch.to_records()))) == \
+        sorted(map(str, extracted.to_records()))
+
+    totals = replay(started, finished, root=str(tmp_path), workers=2, dry_run=True)
+    assert totals["readings"] == len(extracted) and totals["failed"] == 0
@@ -0,0 +1,102 @@
+"""Tests for extractor retries, circuit breakers and the run deadline against the fault-injecting server."""
+import random
+import time
+
+from config.locations import get_registry
+from extract.open_meteo import OpenMeteoExtractor
+from extract.retry import CircuitBreaker, Deadline, RetryPolicy, parse_retry_after
+from utils.rate_limiter import TokenBucket
+from tests.fake_open_meteo import FakeOpenMeteoServer
+
+
+def _extractor(server, **kwargs):
+    kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=0.05))
+    return OpenMeteoExtractor(base_url=server.url, rate_limiter=TokenBucket(1000, 1000), **kwargs)
+
+
+def test_backoff_is_jittered_and_honors_retry_after():
+    policy = RetryPolicy(max_attempts=5, base_delay=1, max_delay=4, rng=random.Random(0))
+    delays = [policy.backoff(attempt) for attempt in (1, 2, 3, 4, 5) for _ in range(50)]
+
+    assert all(0 <= d <= 4 for d in delays)
+    assert len(set(delays)) == len(delays)
+    assert 7 <= policy.backoff(1, retry_after=7) <= 8
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+
+
+def test_breaker_opens_and_probes_after_reset():
+    now = [0.0]
+    breaker = CircuitBreaker("forecast", failure_threshold=2, reset_seconds=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    assert Deadline(None).remaining() == float("inf")
+
+
+def test_server_errors_are_retried():
+    with FakeOpenMeteoServer(fail_first=2) as server:
+        extractor = _extractor(server)
+        reading = extractor.get_current_weather("Berlin")
+        extractor.close()
+
+    assert reading["temperature_celsius"] == 16.0
+    assert server.request_count == 3
+    assert extractor.run_stats["server_errors"] == 2
+    assert extractor.run_stats["retries"] == 2
+
+
+def test_throttled_requests_wait_for_retry_after():
+    with FakeOpenMeteoServer(throttle_every=2, retry_after=1) as server:
+        extractor = _extractor(server)
+        start = time.perf_counter()
+        data = extractor.extract_all_cities(max_workers=1, locations=[0, 1])
+        elapsed = time.perf_counter() - start
+        extractor.close()
+
+    assert len(data) == 2
+    assert elapsed >= 1
+    stats = extractor.run_stats.as_dict()
+    assert (stats["throttled"], stats["retries"], stats["gave_up"]) == (1, 1, 0)
+
+
+def test_open_breaker_stops_requests_to_failing_endpoint():
+    registry = get_registry()
+    with FakeOpenMeteoServer(error_rate=1.0) as server:
+        extractor = _extractor(server, retry_policy=RetryPolicy(max_attempts=2, base_delay=0, max_delay=0),
+                               circuit_breakers={"forecast": CircuitBreaker("forecast", failure_threshold=3,
+                                                                            reset_seconds=60)})
+        data = extractor.extract_all_cities(max_workers=1)
+        extractor.close()
+
+    assert len(data) == 0
+    assert server.request_count == 3
+    assert extractor.run_stats["circuit_open"] == len(registry) - 1
+
+
+def test_deadline_bounds_the_run():
+    with FakeOpenMeteoServer(latency=0.2) as server:
+        extractor = _extractor(server, deadline_seconds=0.5)
+        start = time.perf_counter()
+        data = extractor.extract_all_cities(max_workers=1)
+        elapsed = time.perf_counter() - start
+        extractor.close()
+
+    assert 0 < len(data) < len(get_registry())
+    assert elapsed < 1.0
+    assert extractor.run_stats["deadline_exceeded"] > 0
+    # Requests after the run are no longer bound by its deadline
+    assert extractor.deadline.remaining() == float("inf")
@@ -0,0 +1,36 @@
+"""Tests for the Parquet staging file between extract and load."""
+from datetime import datetime
+
+import pyarrow.parquet as pq
+
+from load.staging import StagingWriter, read_staging_batches, staging_path
+
+
+def _reading(city, hour):
+    return {
+        "city": city,
+        "country": "UK",
+        "latitude": 51.5,
+        "longitude": -0.13,
+        "temperature_celsius": 12.5,
+        "temperature_fahrenheit": 54.5,
+        "recorded_at": datetime(2025, 8, 3, hour, 15),
+        "api_source": "open_meteo",
+    }
+
+
+def test_staging_round_trip_in_row_groups(tmp_path):
+    path = staging_path("2025-08-03T10:00:00+00:00", tmp_path)
+    with StagingWriter(path) as writer:
+        writer.write([_reading("London", hour) for hour in range(3)])
+        writer.write([])
+        writer.write([_reading("Leeds", hour) for hour in range(2)])
+
+    assert writer.row_count == 5
+    assert pq.ParquetFile(path).num_row_groups == 2
+
+    batches = list(read_staging_batches(path, batch_size=2))
+    assert sum(len(batch) for batch in batches) == 5
+    assert max(len(batch) for batch in batches) <= 2
+    assert batches[-1].city.decode() == ["Leeds"]
+    assert batches[0].row(1)["recorded_at"] == datetime(2025, 8, 3, 1, 15)
@@ -0,0 +1,38 @@
+"""Tests for the incrementally maintained daily summary (need a warehouse database)."""
+from datetime import datetime
+
+import pytest
+
+from load.loader import WeatherLoader
+from load.summary import DailySummaryMaintainer
+
+
+def _reading(hour, temp):
+    return {
+        "city": "Ames",
+        "country": "USA",
+        "temperature_celsius": temp,
+        "temperature_fahrenheit": None if temp is None else temp * 9 / 5 + 32,
+        "recorded_at": datetime(2041, 3, 1, hour),
+        "api_source": "test",
+    }
+
+
+def test_batches_fold_into_exact_daily_aggregates(warehouse):
+    maintainer = DailySummaryMaintainer(warehouse)
+    if not maintainer.enabled():
+        pytest.skip("agg_daily_weather_summary is not installed")
+
+    loader = WeatherLoader(warehouse)
+    loader.load([_reading(1, 10.0), _reading(2, 11.5)])
+    loader.load([_reading(3, None), _reading(4, 3.25)])
+
+    rows = warehouse.execute_query("""
+        SELECT avg_temp_celsius, min_temp_celsius, max_temp_celsius, measurement_count
+        FROM v_daily_weather_summary
+        WHERE city_name = 'Ames' AND full_date = '2041-03-01'
+    """)
+    avg, low, high, count = rows[0]
+    assert round(float(avg), 4) == round((10.0 + 11.5 + 3.25) / 3, 4)
+    assert (float(low), float(high), count) == (3.25, 11.5, 4)
+    assert maintainer.verify() == []
@@ -0,0 +1,65 @@
+"""Tests for the vectorized measurement transform."""
+import numpy as np
+import pandas as pd
+
+from transform.measurements import (
+    CONDITIONS, MEASUREMENT_COLUMNS, dew_point, feels_like, map_conditions, round_decimal,
+    to_frame, to_records, transform,
+)
+
+
+def test_unit_conversion_and_rounding():
+    columns = transform({
+        "temperature_2m": [16.0, None, 21.347],
+        "relative_humidity_2m": [72, 50.6, None],
+        "wind_speed_10m": [36.0, 0.0, 7.2],
+        "snowfall": [1.5, 0.0, None],
+    })
+
+    np.testing.assert_allclose(columns["temperature_fahrenheit"], [60.8, np.nan, 70.42])
+    np.testing.assert_allclose(columns["temperature_celsius"], [16.0, np.nan, 21.35])
+    np.testing.assert_allclose(columns["wind_speed_mps"], [10.0, 0.0, 2.0])
+    np.testing.assert_allclose(columns["snow_mm"], [15.0, 0.0, np.nan])
+    np.testing.assert_allclose(columns["humidity_percent"], [72, 51, np.nan])
+    assert np.isnan(columns["uv_index"]).all()
+
+
+def test_units_block_overrides_defaults():
+    columns = transform({"temperature_2m": [50.0], "wind_speed_10m": [10.0]},
+                        {"temperature_2m": "°F", "wind_speed_10m": "m/s"})
+    assert columns["temperature_celsius"][0] == 10.0
+    assert columns["wind_speed_mps"][0] == 10.0
+
+
+def test_derived_measurements():
+    # Heat index at 32°C / 70%, wind chill at -5°C / 20 km/h, plain air temperature in between
+    apparent = feels_like(np.array([32.0, -5.0, 18.0]), np.array([70.0, 80.0, 60.0]),
+                          np.array([1.0, 20 / 3.6, 5.0]))
+    np.testing.assert_allclose(apparent, [40.4, -11.5, 18.0], atol=0.1)
+    np.testing.assert_allclose(dew_point(np.array([20.0]), np.array([50.0])), [9.3], atol=0.05)
+
+
+def test_out_of_range_values_become_null():
+    np.testing.assert_array_equal(round_decimal(np.array([999.994, 1000.0, -1234.5]), 5, 2),
+                                  [999.99, np.nan, np.nan])
+
+
+def test_condition_mapping():
+    codes = map_conditions(np.array([0, 3, 45, 63, 75, 99, 42, np.nan, 250]))
+    assert [CONDITIONS[c] if c >= 0 else None for c in codes] == [
+        "Clear", "Clouds", "Fog", "Rain", "Snow", "Thunderstorm", None, None, None
+    ]
+
+
+def test_frame_and_records_agree():
+    columns = transform({"temperature_2m": [16.0, None], "relative_humidity_2m": [72, None],
+                         "weather_code": [61, None]})
+    frame = to_frame(columns)
+    records = to_records(columns)
+
+    assert list(frame.columns) == MEASUREMENT_COLUMNS + ["condition"]
+    assert str(frame["humidity_percent"].dtype) == "Int64"
+    assert records[0]["humidity_percent"] == 72 and records[0]["condition"] == "Rain"
+    assert records[1]["temperature_celsius"] is None and records[1]["condition"] is None
+    restored = pd.DataFrame.from_records(records).astype(frame.dtypes.to_dict())
+    pd.testing.assert_frame_equal(restored, frame)